@@ -0,0 +1,126 @@
+# apps/dashboard/exports.py
+"""Date-ranged sales exports for accounting.
+
+Two datasets, each covering local calendar days ``[start, end]``:
+
+* ``lines``: one row per order line from both apps. It is read from
+  OrderLineFact, which already carries the order, table and menu details.
+* ``orders``: one row per staff or customer order. The two tables are
+  read in parallel and merged by time.
+
+Rows come off ``.iterator(chunk_size=...)``: a server-side cursor where the
+database has one, chunked fetches on SQLite. They are written out as they
+arrive, as CSV text or as Parquet row groups, so memory use does not grow
+with the length of the range. Parquet needs the optional ``pyarrow``
+package.
+"""
+import heapq
+from datetime import datetime
+from itertools import islice
+from operator import itemgetter
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Value
+from django.utils import timezone
+
+from apps.orders.models import Order
+from core.dates import local_day_range
+from core.streaming import csv_lines
+from customer.models import CustomerOrder
+from .models import OrderLineFact
+
+DATASETS = {
+    'lines': (
+        'source', 'order_number', 'order_type', 'table_number', 'status', 'ordered_at',
+        'menu_item_name', 'category_name', 'quantity', 'unit_price', 'line_total',
+    ),
+    'orders': (
+        'source', 'order_number', 'order_type', 'table_number', 'status', 'payment_status',
+        'created_at', 'total_amount',
+    ),
+}
+FORMATS = ('csv', 'parquet')
+CHUNK_SIZE = 2000
+
+
+def export_range(start_day, end_day):
+    """Aware ``[start, end)`` covering the local days ``start_day`` to ``end_day`` inclusive."""
+    return local_day_range(start_day)[0], local_day_range(end_day)[1]
+
+
+def line_rows(start, end, chunk_size=CHUNK_SIZE):
+    return OrderLineFact.objects.filter(ordered_at__gte=start, ordered_at__lt=end).order_by(
+        'ordered_at', 'pk',
+    ).values_list(*DATASETS['lines']).iterator(chunk_size=chunk_size)
+
+
+def order_rows(start, end, chunk_size=CHUNK_SIZE):
+    staff = Order.objects.filter(created_at__gte=start, created_at__lt=end).order_by(
+        'created_at', 'pk',
+    ).values_list(
+        Value('order'), 'order_number', Value('dine_in'), 'table__number', 'status', Value(''),
+        'created_at', 'total_amount',
+    )
+    online = CustomerOrder.objects.filter(created_at__gte=start, created_at__lt=end).order_by(
+        'created_at', 'pk',
+    ).values_list(
+        Value('customer_order'), 'order_number', 'order_type', 'table_number', 'status', 'payment_status',
+        'created_at', 'total_amount',
+    )
+    # Both cursors are already in time order, so merging them holds one row of each
+    return heapq.merge(
+        staff.iterator(chunk_size=chunk_size), online.iterator(chunk_size=chunk_size),
+        key=itemgetter(DATASETS['orders'].index('created_at')),
+    )
+
+
+def sales_rows(dataset, start, end, chunk_size=CHUNK_SIZE):
+    return (line_rows if dataset == 'lines' else order_rows)(start, end, chunk_size)
+
+
+def _csv_value(value):
+    # Times in local time with their offset, which spreadsheets and ledgers both read
+    if isinstance(value, datetime):
+        return timezone.localtime(value).isoformat()
+    return value
+
+
+def sales_csv_lines(dataset, start, end, chunk_size=CHUNK_SIZE):
+    rows = sales_rows(dataset, start, end, chunk_size)
+    return csv_lines(DATASETS[dataset], (map(_csv_value, row) for row in rows))
+
+
+def _parquet_schema(pa, dataset):
+    money = pa.decimal128(12, 2)
+    types = {
+        'table_number': pa.int32(),
+        'quantity': pa.int32(),
+        'unit_price': money,
+        'line_total': money,
+        'total_amount': money,
+        'ordered_at': pa.timestamp('us', tz='UTC'),
+        'created_at': pa.timestamp('us', tz='UTC'),
+    }
+    return pa.schema([(column, types.get(column, pa.string())) for column in DATASETS[dataset]])
+
+
+def write_parquet(path, dataset, start, end, chunk_size=CHUNK_SIZE):
+    """Write the export to a Parquet file, one row group per chunk. Returns the row count."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImproperlyConfigured('Parquet exports need the pyarrow package (pip install pyarrow)')
+
+    schema = _parquet_schema(pa, dataset)
+    rows = sales_rows(dataset, start, end, chunk_size)
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        while batch := list(islice(rows, chunk_size)):
+            columns = zip(*batch)
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            count += len(batch)
+    return count
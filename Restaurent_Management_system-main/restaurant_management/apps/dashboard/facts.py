@@ -0,0 +1,155 @@
+# apps/dashboard/facts.py
+"""Maintenance of OrderLineFact, the one-row-per-line read model.
+
+Single-line writes are mirrored by apps.dashboard.signals; bulk paths go
+through ``record_order_lines`` in rollups.py, which calls ``record_facts``.
+``rebuild_order_facts`` repopulates the table from both apps' order history.
+"""
+from datetime import datetime, time
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.inventory.models import MenuItem
+from .models import OrderLineFact
+
+# Columns copied from the order onto each of its lines
+ORDER_FACT_FIELDS = ('order_number', 'order_type', 'table_number', 'status')
+FACT_UPDATE_FIELDS = ORDER_FACT_FIELDS + (
+    'order_id', 'menu_item', 'menu_item_name', 'category_name',
+    'quantity', 'unit_price', 'line_total', 'ordered_at',
+)
+
+
+def order_fact_values(source, order):
+    if source == 'order':
+        return {
+            'order_number': order.order_number,
+            'order_type': 'dine_in',
+            'table_number': order.table.number if order.table_id else None,
+            'status': order.status,
+        }
+    return {
+        'order_number': order.order_number,
+        'order_type': order.order_type,
+        'table_number': order.table_number,
+        'status': order.status,
+    }
+
+
+def record_facts(source, order, lines):
+    """Insert or refresh the facts for some of ``order``'s lines in two queries."""
+    lines = [line for line in lines if line.pk]
+    if not lines:
+        return
+    menu_items = MenuItem.objects.select_related('category').in_bulk(
+        {line.menu_item_id for line in lines}
+    )
+    values = order_fact_values(source, order)
+    facts = []
+    for line in lines:
+        menu_item = menu_items.get(line.menu_item_id)
+        facts.append(OrderLineFact(
+            source=source,
+            order_id=order.pk,
+            line_id=line.pk,
+            menu_item_id=line.menu_item_id,
+            menu_item_name=menu_item.name if menu_item else '',
+            category_name=menu_item.category.name if menu_item else '',
+            quantity=line.quantity,
+            unit_price=line.price_at_time,
+            line_total=line.price_at_time * line.quantity,
+            ordered_at=order.created_at,
+            **values,
+        ))
+    OrderLineFact.objects.bulk_create(
+        facts,
+        update_conflicts=True,
+        unique_fields=['source', 'line_id'],
+        update_fields=list(FACT_UPDATE_FIELDS),
+    )
+
+
+def forget_facts(source, line_ids):
+    OrderLineFact.objects.filter(source=source, line_id__in=list(line_ids)).delete()
+
+
+def sync_order_facts(source, order):
+    """Copy order-level changes (status, table, ...) onto its facts in one UPDATE."""
+    OrderLineFact.objects.filter(source=source, order_id=order.pk).update(
+        **order_fact_values(source, order)
+    )
+
+
+def forget_order_facts(source, order_id):
+    OrderLineFact.objects.filter(source=source, order_id=order_id).delete()
+
+
+def iter_fact_rows(source, item_model, fact_model=OrderLineFact, since=None, chunk_size=2000):
+    """Build facts straight from an order-line table with one joined query.
+
+    Takes the models as arguments so migrations can pass historical ones.
+    """
+    table_number = 'order__table__number' if source == 'order' else 'order__table_number'
+    order_type = None if source == 'order' else 'order__order_type'
+    fields = [
+        'pk', 'order_id', 'order__order_number', 'order__status', 'order__created_at',
+        table_number, 'menu_item_id', 'menu_item__name', 'menu_item__category__name',
+        'quantity', 'price_at_time',
+    ]
+    if order_type:
+        fields.append(order_type)
+    lines = item_model.objects.all()
+    if since is not None:
+        lines = lines.filter(order__created_at__gte=since)
+    for row in lines.values(*fields).iterator(chunk_size=chunk_size):
+        yield fact_model(
+            source=source,
+            order_id=row['order_id'],
+            line_id=row['pk'],
+            order_number=row['order__order_number'],
+            order_type=row[order_type] if order_type else 'dine_in',
+            table_number=row[table_number],
+            status=row['order__status'],
+            menu_item_id=row['menu_item_id'],
+            menu_item_name=row['menu_item__name'] or '',
+            category_name=row['menu_item__category__name'] or '',
+            quantity=row['quantity'],
+            unit_price=row['price_at_time'],
+            line_total=row['price_at_time'] * row['quantity'],
+            ordered_at=row['order__created_at'],
+        )
+
+
+def bulk_insert_facts(rows, fact_model=OrderLineFact, batch_size=2000):
+    count, batch = 0, []
+    for fact in rows:
+        batch.append(fact)
+        if len(batch) == batch_size:
+            fact_model.objects.bulk_create(batch)
+            count, batch = count + len(batch), []
+    fact_model.objects.bulk_create(batch)
+    return count + len(batch)
+
+
+@transaction.atomic
+def rebuild_order_facts(since=None, batch_size=2000):
+    """Repopulate OrderLineFact from both order tables, optionally from a date on.
+
+    Returns the number of facts written.
+    """
+    from apps.orders.models import OrderItem
+    from customer.models import CustomerOrderItem
+
+    stale = OrderLineFact.objects.all()
+    if since is not None:
+        since = timezone.make_aware(datetime.combine(since, time.min))
+        stale = stale.filter(ordered_at__gte=since)
+    stale.delete()
+    return sum(
+        bulk_insert_facts(
+            iter_fact_rows(source, item_model, since=since, chunk_size=batch_size),
+            batch_size=batch_size,
+        )
+        for source, item_model in (('order', OrderItem), ('customer_order', CustomerOrderItem))
+    )
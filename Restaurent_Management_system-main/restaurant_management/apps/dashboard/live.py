@@ -0,0 +1,71 @@
+# apps/dashboard/live.py
+import asyncio
+import threading
+
+from django.db import transaction
+from django.utils import timezone
+
+SUBSCRIBER_BACKLOG = 100
+
+
+class SalesFeed:
+    """In-process fan-out of hourly sales deltas to streaming report clients.
+
+    Deltas are computed once by the rollup signals and pushed to every open
+    stream, so N report tabs cost one computation rather than N polls. Each
+    server process has its own feed; run a single ASGI worker per host, or
+    let extra workers' clients fall back to polling ``sales-data``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_BACKLOG)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        for queue, loop in subscribers:
+            if loop.is_closed():
+                self.unsubscribe(queue)
+                continue
+            loop.call_soon_threadsafe(self._offer, queue, event)
+
+    @staticmethod
+    def _offer(queue, event):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A stalled client gets a fresh snapshot instead of the backlog
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait({'type': 'resync'})
+
+
+sales_feed = SalesFeed()
+
+
+def publish_sales_delta(day, hour, revenue, orders):
+    if day != timezone.localdate() or not sales_feed.subscriber_count:
+        return
+    event = {
+        'type': 'delta',
+        'date': day.isoformat(),
+        'hour': hour,
+        'revenue': float(revenue),
+        'orders': orders,
+    }
+    transaction.on_commit(lambda: sales_feed.publish(event))
@@ -0,0 +1,77 @@
+# apps/dashboard/management/commands/benchmark_routes.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.runner import (
+    BUDGETS_PATH,
+    METRICS,
+    check_budgets,
+    comparison_report,
+    isolated_database,
+    load_budgets,
+    run_benchmarks,
+)
+from benchmarks.seed import SeedConfig, seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway database and record query count, p50/p95 latency and '
+        'response size for every named route, checked against benchmarks/budgets.json'
+    )
+
+    def add_arguments(self, parser):
+        defaults = SeedConfig()
+        parser.add_argument('--tables', type=int, default=defaults.tables)
+        parser.add_argument('--menu-items', type=int, default=defaults.menu_items)
+        parser.add_argument('--months', type=int, default=defaults.months)
+        parser.add_argument('--orders-per-day', type=int, default=defaults.orders_per_day)
+        parser.add_argument('--customer-orders-per-day', type=int, default=defaults.customer_orders_per_day)
+        parser.add_argument('--seed', type=int, default=defaults.seed)
+        parser.add_argument('--repeat', type=int, default=20, help='Timed requests per route.')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per route first.')
+        parser.add_argument('--route', action='append', dest='routes',
+                            help='Only benchmark this route name (repeatable).')
+        parser.add_argument('--budgets', default=str(BUDGETS_PATH))
+        parser.add_argument('--skip-latency', action='store_true',
+                            help='Only enforce the query and size budgets (for noisy machines).')
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+        parser.add_argument('--compare', help='A previous --output file to report changes against.')
+
+    def handle(self, *args, **options):
+        config = SeedConfig(
+            tables=options['tables'],
+            menu_items=options['menu_items'],
+            months=options['months'],
+            orders_per_day=options['orders_per_day'],
+            customer_orders_per_day=options['customer_orders_per_day'],
+            seed=options['seed'],
+        )
+        previous = None
+        if options['compare']:
+            with open(options['compare']) as fh:
+                previous = json.load(fh)
+
+        with isolated_database():
+            self.stdout.write('Seeding benchmark data...')
+            user = seed_dataset(config)
+            results = run_benchmarks(
+                user, routes=options['routes'], repeat=options['repeat'], warmup=options['warmup'],
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(results, fh, indent=2, sort_keys=True)
+
+        if previous is not None:
+            self.stdout.write(comparison_report(previous, results))
+        else:
+            for name, result in sorted(results.items()):
+                self.stdout.write(f'{name:<34}' + ''.join(f'{metric}={result[metric]:<10}' for metric in METRICS))
+
+        metrics = [m for m in METRICS if not (options['skip_latency'] and m.endswith('_ms'))]
+        violations = check_budgets(results, load_budgets(options['budgets']), metrics)
+        if violations:
+            raise CommandError('Budgets exceeded:\n  ' + '\n  '.join(violations))
+        self.stdout.write(self.style.SUCCESS(f'{len(results)} routes within budget'))
@@ -0,0 +1,34 @@
+# apps/dashboard/management/commands/benchmark_serializers.py
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.runner import isolated_database
+from benchmarks.serialization import CASES, compare_serializers, seed_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway database and compare ModelSerializer against the .values() '
+        'list rows used by the API, checking both render the same JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Rows per list.')
+        parser.add_argument('--repeat', type=int, default=3, help='Best of this many runs.')
+        parser.add_argument('--case', action='append', dest='cases', choices=sorted(CASES),
+                            help='Only compare this list (repeatable).')
+
+    def handle(self, *args, **options):
+        with isolated_database():
+            self.stdout.write(f"Seeding {options['rows']} rows per list...")
+            seed_rows(options['rows'])
+            results = compare_serializers(options['cases'], repeat=options['repeat'])
+
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<12} rows={result['rows']:<8} serializer={result['serializer_ms']}ms "
+                f"values={result['values_ms']}ms speedup={result['speedup']}x"
+            )
+        different = [name for name, result in results.items() if not result['identical']]
+        if different:
+            raise CommandError('Fast rows differ from the serializer output: ' + ', '.join(different))
+        self.stdout.write(self.style.SUCCESS('Fast rows match the serializer output'))
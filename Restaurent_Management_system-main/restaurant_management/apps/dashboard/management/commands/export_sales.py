@@ -0,0 +1,50 @@
+# apps/dashboard/management/commands/export_sales.py
+from datetime import date
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.dashboard.exports import CHUNK_SIZE, DATASETS, FORMATS, export_range, sales_csv_lines, write_parquet
+
+
+class Command(BaseCommand):
+    help = 'Export order lines or orders for a date range to CSV or Parquet, streamed in constant memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First local day to include (YYYY-MM-DD). Defaults to today.')
+        parser.add_argument('--end', help='Last local day to include (YYYY-MM-DD). Defaults to --start.')
+        parser.add_argument('--dataset', choices=sorted(DATASETS), default='lines')
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--output', help='File to write (default: stdout; required for parquet).')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            start_day = date.fromisoformat(options['start']) if options['start'] else timezone.localdate()
+            end_day = date.fromisoformat(options['end']) if options['end'] else start_day
+        except ValueError:
+            raise CommandError('--start and --end must be dates in YYYY-MM-DD format')
+        if end_day < start_day:
+            raise CommandError('--end must not be before --start')
+        start, end = export_range(start_day, end_day)
+        dataset, output, chunk_size = options['dataset'], options['output'], options['chunk_size']
+
+        if options['format'] == 'parquet':
+            if not output:
+                raise CommandError('--output is required for parquet')
+            try:
+                count = write_parquet(output, dataset, start, end, chunk_size=chunk_size)
+            except ImproperlyConfigured as e:
+                raise CommandError(str(e))
+            self.stderr.write(self.style.SUCCESS(f'Wrote {count} {dataset} rows to {output}'))
+            return
+
+        lines = sales_csv_lines(dataset, start, end, chunk_size=chunk_size)
+        if not output:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(output, 'w', encoding='utf-8', newline='') as fh:
+            fh.writelines(lines)
+        self.stderr.write(self.style.SUCCESS(f'Wrote {dataset} for {start_day} to {end_day} to {output}'))
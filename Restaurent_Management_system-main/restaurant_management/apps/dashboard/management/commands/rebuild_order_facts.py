@@ -0,0 +1,28 @@
+# apps/dashboard/management/commands/rebuild_order_facts.py
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.dashboard.facts import rebuild_order_facts
+
+
+class Command(BaseCommand):
+    help = 'Backfill or rebuild the order-line fact table from staff and customer orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help='Only rebuild facts for orders placed from this date on (YYYY-MM-DD). Defaults to everything.',
+        )
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError('--since must be a date in YYYY-MM-DD format')
+
+        count = rebuild_order_facts(since=since, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} order-line facts'))
@@ -0,0 +1,39 @@
+# apps/dashboard/management/commands/rebuild_sales_rollups.py
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.dashboard.facts import rebuild_order_facts
+from apps.dashboard.rollups import rebuild_sales_rollups
+
+
+class Command(BaseCommand):
+    help = 'Backfill or rebuild the daily/hourly sales rollup tables from order history'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help='Only rebuild rollups from this date on (YYYY-MM-DD). Defaults to everything.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--with-facts',
+            action='store_true',
+            help='Rebuild the order-line fact table first; item rollups are computed from it.',
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError('--since must be a date in YYYY-MM-DD format')
+
+        if options['with_facts']:
+            facts = rebuild_order_facts(since=since, batch_size=options['batch_size'])
+            self.stdout.write(f'Rebuilt {facts} order-line facts')
+        daily, hourly, items = rebuild_sales_rollups(since=since, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {daily} daily, {hourly} hourly and {items} item rollup rows'
+        ))
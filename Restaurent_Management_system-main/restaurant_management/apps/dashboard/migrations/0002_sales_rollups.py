@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+        ('inventory', '0002_alter_category_options_category_category_type_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('source', models.CharField(choices=[('order', 'Staff Order'), ('customer_order', 'Customer Order')], max_length=20)),
+                ('status', models.CharField(max_length=20)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('order_count', models.IntegerField(default=0)),
+                ('items_sold', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['date'],
+                'unique_together': {('date', 'source', 'status')},
+            },
+        ),
+        migrations.CreateModel(
+            name='HourlySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('source', models.CharField(choices=[('order', 'Staff Order'), ('customer_order', 'Customer Order')], max_length=20)),
+                ('status', models.CharField(max_length=20)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('order_count', models.IntegerField(default=0)),
+                ('items_sold', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['date', 'hour'],
+                'unique_together': {('date', 'hour', 'source', 'status')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyItemSalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('source', models.CharField(choices=[('order', 'Staff Order'), ('customer_order', 'Customer Order')], max_length=20)),
+                ('line_count', models.IntegerField(default=0)),
+                ('quantity', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('menu_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.menuitem')),
+            ],
+            options={
+                'ordering': ['date'],
+                'unique_together': {('date', 'source', 'menu_item')},
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_facts(apps, schema_editor):
+    from apps.dashboard.facts import bulk_insert_facts, iter_fact_rows
+
+    fact_model = apps.get_model('dashboard', 'OrderLineFact')
+    for source, item_model in (
+        ('order', apps.get_model('orders', 'OrderItem')),
+        ('customer_order', apps.get_model('customer', 'CustomerOrderItem')),
+    ):
+        bulk_insert_facts(iter_fact_rows(source, item_model, fact_model), fact_model)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0002_sales_rollups'),
+        ('inventory', '0002_alter_category_options_category_category_type_and_more'),
+        ('orders', '0002_order_number_sequence'),
+        ('customer', '0004_customerorder_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderLineFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('order', 'Staff Order'), ('customer_order', 'Customer Order')], max_length=20)),
+                ('order_id', models.PositiveBigIntegerField()),
+                ('line_id', models.PositiveBigIntegerField()),
+                ('order_number', models.CharField(max_length=10)),
+                ('order_type', models.CharField(default='dine_in', max_length=20)),
+                ('table_number', models.PositiveIntegerField(blank=True, null=True)),
+                ('status', models.CharField(max_length=20)),
+                ('menu_item_name', models.CharField(max_length=100)),
+                ('category_name', models.CharField(blank=True, max_length=100)),
+                ('quantity', models.PositiveIntegerField()),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('line_total', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('ordered_at', models.DateTimeField()),
+                ('menu_item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='inventory.menuitem')),
+            ],
+            options={
+                'ordering': ['ordered_at'],
+                'indexes': [models.Index(fields=['ordered_at'], name='fact_ordered_at_idx'), models.Index(fields=['source', 'order_id'], name='fact_order_idx')],
+                'unique_together': {('source', 'line_id')},
+            },
+        ),
+        migrations.RunPython(backfill_facts, migrations.RunPython.noop),
+    ]
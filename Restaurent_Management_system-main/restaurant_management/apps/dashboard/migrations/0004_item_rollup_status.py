@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:05
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def split_by_status(apps, schema_editor):
+    # Existing rows have no status; recount them per status from the line facts
+    rollup_model = apps.get_model('dashboard', 'DailyItemSalesRollup')
+    fact_model = apps.get_model('dashboard', 'OrderLineFact')
+    rollup_model.objects.all().delete()
+    rows = fact_model.objects.exclude(menu_item=None).annotate(
+        day=TruncDate('ordered_at'),
+    ).values('day', 'source', 'status', 'menu_item').annotate(
+        line_count=Count('id'),
+        total_quantity=Sum('quantity'),
+        total_revenue=Sum('line_total'),
+    ).order_by()
+    rollup_model.objects.bulk_create([
+        rollup_model(
+            date=row['day'], source=row['source'], status=row['status'],
+            menu_item_id=row['menu_item'], line_count=row['line_count'],
+            quantity=row['total_quantity'] or 0, revenue=row['total_revenue'] or 0,
+        )
+        for row in rows.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0003_order_line_facts'),
+        ('inventory', '0005_stock_alerts'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='dailyitemsalesrollup',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='dailyitemsalesrollup',
+            name='status',
+            field=models.CharField(default='', max_length=20),
+            preserve_default=False,
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailyitemsalesrollup',
+            unique_together={('date', 'source', 'status', 'menu_item')},
+        ),
+        migrations.RunPython(split_by_status, migrations.RunPython.noop),
+    ]
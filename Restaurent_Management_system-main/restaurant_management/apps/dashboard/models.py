@@ -37,3 +37,93 @@ class OrderItem(models.Model):
     
     def __str__(self):
         return f"{self.quantity}x {self.menu_item.name} in Order #{self.order.id}"
+
+
+# Sales rollups, maintained incrementally by apps/dashboard/signals.py
+SALES_SOURCES = [
+    ('order', 'Staff Order'),
+    ('customer_order', 'Customer Order'),
+]
+
+class DailySalesRollup(models.Model):
+    date = models.DateField()
+    source = models.CharField(max_length=20, choices=SALES_SOURCES)
+    status = models.CharField(max_length=20)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_count = models.IntegerField(default=0)
+    items_sold = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('date', 'source', 'status')
+        ordering = ['date']
+
+    def __str__(self):
+        return f"{self.date} {self.source}/{self.status}: {self.order_count} orders"
+
+class HourlySalesRollup(models.Model):
+    date = models.DateField()
+    hour = models.PositiveSmallIntegerField()
+    source = models.CharField(max_length=20, choices=SALES_SOURCES)
+    status = models.CharField(max_length=20)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_count = models.IntegerField(default=0)
+    items_sold = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('date', 'hour', 'source', 'status')
+        ordering = ['date', 'hour']
+
+    def __str__(self):
+        return f"{self.date} {self.hour:02d}:00 {self.source}/{self.status}: {self.order_count} orders"
+
+class DailyItemSalesRollup(models.Model):
+    date = models.DateField()
+    source = models.CharField(max_length=20, choices=SALES_SOURCES)
+    status = models.CharField(max_length=20)
+    menu_item = models.ForeignKey('inventory.MenuItem', on_delete=models.CASCADE)
+    line_count = models.IntegerField(default=0)
+    quantity = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('date', 'source', 'status', 'menu_item')
+        ordering = ['date']
+
+    def __str__(self):
+        return f"{self.date} {self.source}/{self.status}: {self.quantity}x {self.menu_item_id}"
+
+class OrderLineFact(models.Model):
+    """One row per order line, for staff and online orders alike.
+
+    Written alongside the lines themselves (apps.dashboard.facts), with the
+    order, table and menu details copied in as they were at the time of the
+    sale, so reports and exports read this one table instead of joining each
+    app's orders, lines, menu items and categories.
+    """
+    source = models.CharField(max_length=20, choices=SALES_SOURCES)
+    order_id = models.PositiveBigIntegerField()
+    line_id = models.PositiveBigIntegerField()
+    order_number = models.CharField(max_length=10)
+    order_type = models.CharField(max_length=20, default='dine_in')
+    table_number = models.PositiveIntegerField(null=True, blank=True)
+    status = models.CharField(max_length=20)
+    menu_item = models.ForeignKey(
+        'inventory.MenuItem', null=True, blank=True, on_delete=models.SET_NULL, related_name='+'
+    )
+    menu_item_name = models.CharField(max_length=100)
+    category_name = models.CharField(max_length=100, blank=True)
+    quantity = models.PositiveIntegerField()
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    line_total = models.DecimalField(max_digits=12, decimal_places=2)
+    ordered_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('source', 'line_id')
+        indexes = [
+            models.Index(fields=['ordered_at'], name='fact_ordered_at_idx'),
+            models.Index(fields=['source', 'order_id'], name='fact_order_idx'),
+        ]
+        ordering = ['ordered_at']
+
+    def __str__(self):
+        return f"{self.source} #{self.order_number}: {self.quantity}x {self.menu_item_name}"
@@ -0,0 +1,221 @@
+# apps/dashboard/rollups.py
+from collections import defaultdict
+from datetime import datetime, time
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Sum, Value, When
+from django.db.models.functions import ExtractHour, TruncDate
+from django.utils import timezone
+
+from .facts import forget_facts, record_facts
+from .live import publish_sales_delta
+from .models import DailySalesRollup, HourlySalesRollup, DailyItemSalesRollup, OrderLineFact
+
+
+def _bucket(created_at):
+    local = timezone.localtime(created_at)
+    return local.date(), local.hour
+
+
+def _upsert(model, key, deltas):
+    deltas = {name: value for name, value in deltas.items() if value}
+    if not deltas:
+        return
+    increments = {name: F(name) + value for name, value in deltas.items()}
+    if model.objects.filter(**key).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **deltas)
+    except IntegrityError:
+        # Another writer created the row first
+        model.objects.filter(**key).update(**increments)
+
+
+def bump_sales(source, created_at, status, revenue=0, orders=0, items=0):
+    day, hour = _bucket(created_at)
+    deltas = {'revenue': revenue, 'order_count': orders, 'items_sold': items}
+    _upsert(DailySalesRollup, {'date': day, 'source': source, 'status': status}, deltas)
+    _upsert(
+        HourlySalesRollup,
+        {'date': day, 'hour': hour, 'source': source, 'status': status},
+        deltas,
+    )
+    if revenue or orders:
+        publish_sales_delta(day, hour, revenue, orders)
+
+
+def bump_item_sales(source, created_at, status, menu_item_id, lines=0, quantity=0, revenue=0):
+    day, _ = _bucket(created_at)
+    _upsert(
+        DailyItemSalesRollup,
+        {'date': day, 'source': source, 'status': status, 'menu_item_id': menu_item_id},
+        {'line_count': lines, 'quantity': quantity, 'revenue': revenue},
+    )
+
+
+def _item_deltas(lines, sign):
+    """``{menu_item_id: deltas}`` for (menu_item_id, quantity, price) triples."""
+    per_item = defaultdict(lambda: {'line_count': 0, 'quantity': 0, 'revenue': Decimal('0')})
+    for menu_item_id, quantity, price in lines:
+        entry = per_item[menu_item_id]
+        entry['line_count'] += sign
+        entry['quantity'] += sign * quantity
+        entry['revenue'] += sign * price * quantity
+    return per_item
+
+
+def _bump_items(source, created_at, status, per_item):
+    """Apply per-item deltas to one day and status in a constant number of queries."""
+    if not per_item:
+        return
+    day, _ = _bucket(created_at)
+    rollups = DailyItemSalesRollup.objects.filter(
+        date=day, source=source, status=status, menu_item_id__in=list(per_item)
+    )
+    existing = set(rollups.values_list('menu_item_id', flat=True))
+    if existing:
+        # One UPDATE with per-item increments keeps concurrent writers safe
+        rollups.filter(menu_item_id__in=existing).update(**{
+            name: F(name) + Case(
+                *[When(menu_item_id=item_id, then=Value(per_item[item_id][name]))
+                  for item_id in existing],
+                output_field=DailyItemSalesRollup._meta.get_field(name),
+            )
+            for name in ('line_count', 'quantity', 'revenue')
+        })
+    missing = [item_id for item_id in per_item if item_id not in existing]
+    if missing:
+        try:
+            with transaction.atomic():
+                DailyItemSalesRollup.objects.bulk_create([
+                    DailyItemSalesRollup(
+                        date=day, source=source, status=status, menu_item_id=item_id,
+                        **per_item[item_id]
+                    )
+                    for item_id in missing
+                ])
+        except IntegrityError:
+            for item_id in missing:
+                values = per_item[item_id]
+                bump_item_sales(
+                    source, created_at, status, item_id, lines=values['line_count'],
+                    quantity=values['quantity'], revenue=values['revenue'],
+                )
+
+
+def record_order_lines(source, order, lines, sign=1):
+    """Add (or with sign=-1 remove) a batch of order lines to the rollups
+    and the order-line fact table.
+
+    Used by bulk write paths that bypass the OrderItem signals. Issues a
+    constant number of queries however many lines or menu items there are.
+    """
+    lines = list(lines)
+    if sign > 0:
+        record_facts(source, order, lines)
+    else:
+        forget_facts(source, [line.pk for line in lines])
+    if not lines:
+        return
+    _bump_items(source, order.created_at, order.status, _item_deltas(
+        ((line.menu_item_id, line.quantity, line.price_at_time) for line in lines), sign,
+    ))
+    bump_sales(
+        source, order.created_at, order.status,
+        items=sign * sum(line.quantity for line in lines),
+    )
+
+
+def move_item_sales(source, created_at, old_status, new_status, lines):
+    """Move an order's (menu_item_id, quantity, price) lines to another status."""
+    _bump_items(source, created_at, old_status, _item_deltas(lines, -1))
+    _bump_items(source, created_at, new_status, _item_deltas(lines, 1))
+
+
+def _order_models():
+    from apps.orders.models import Order
+    from customer.models import CustomerOrder
+    return [('order', Order), ('customer_order', CustomerOrder)]
+
+
+@transaction.atomic
+def rebuild_sales_rollups(since=None, batch_size=1000):
+    """Recompute all rollups, optionally from a date on.
+
+    Order counts and revenue come from the order tables; everything per line
+    is read from OrderLineFact, so keep that current (``rebuild_order_facts``)
+    before rebuilding from it.
+    """
+    order_filter, fact_filter, rollup_filter = {}, {}, {}
+    if since is not None:
+        start = timezone.make_aware(datetime.combine(since, time.min))
+        order_filter = {'created_at__gte': start}
+        fact_filter = {'ordered_at__gte': start}
+        rollup_filter = {'date__gte': since}
+
+    DailySalesRollup.objects.filter(**rollup_filter).delete()
+    HourlySalesRollup.objects.filter(**rollup_filter).delete()
+    DailyItemSalesRollup.objects.filter(**rollup_filter).delete()
+
+    hourly = defaultdict(lambda: {'revenue': Decimal('0'), 'order_count': 0, 'items_sold': 0})
+    for source, order_model in _order_models():
+        orders = order_model.objects.filter(**order_filter).annotate(
+            day=TruncDate('created_at'),
+            hour=ExtractHour('created_at'),
+        ).values('day', 'hour', 'status').annotate(
+            revenue=Sum('total_amount'),
+            order_count=Count('id'),
+        ).order_by()
+        for row in orders:
+            bucket = hourly[(row['day'], row['hour'], source, row['status'])]
+            bucket['revenue'] += row['revenue'] or 0
+            bucket['order_count'] += row['order_count']
+
+    facts = OrderLineFact.objects.filter(**fact_filter)
+    items = facts.annotate(
+        day=TruncDate('ordered_at'),
+        hour=ExtractHour('ordered_at'),
+    ).values('day', 'hour', 'source', 'status').annotate(
+        total_quantity=Sum('quantity'),
+    ).order_by()
+    for row in items:
+        key = (row['day'], row['hour'], row['source'], row['status'])
+        hourly[key]['items_sold'] += row['total_quantity'] or 0
+
+    per_item = facts.exclude(menu_item=None).annotate(
+        day=TruncDate('ordered_at'),
+    ).values('day', 'source', 'status', 'menu_item').annotate(
+        line_count=Count('id'),
+        total_quantity=Sum('quantity'),
+        total_revenue=Sum('line_total'),
+    ).order_by()
+    item_rows = [
+        DailyItemSalesRollup(
+            date=row['day'], source=row['source'], status=row['status'],
+            menu_item_id=row['menu_item'],
+            line_count=row['line_count'], quantity=row['total_quantity'] or 0,
+            revenue=row['total_revenue'] or 0,
+        )
+        for row in per_item
+    ]
+
+    daily = defaultdict(lambda: {'revenue': Decimal('0'), 'order_count': 0, 'items_sold': 0})
+    hourly_rows = []
+    for (day, hour, source, status), values in hourly.items():
+        hourly_rows.append(HourlySalesRollup(
+            date=day, hour=hour, source=source, status=status, **values
+        ))
+        totals = daily[(day, source, status)]
+        for name, value in values.items():
+            totals[name] += value
+    daily_rows = [
+        DailySalesRollup(date=day, source=source, status=status, **values)
+        for (day, source, status), values in daily.items()
+    ]
+
+    DailySalesRollup.objects.bulk_create(daily_rows, batch_size=batch_size)
+    HourlySalesRollup.objects.bulk_create(hourly_rows, batch_size=batch_size)
+    DailyItemSalesRollup.objects.bulk_create(item_rows, batch_size=batch_size)
+    return len(daily_rows), len(hourly_rows), len(item_rows)
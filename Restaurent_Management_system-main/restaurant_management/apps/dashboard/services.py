@@ -0,0 +1,179 @@
+# apps/dashboard/services.py
+from dataclasses import dataclass, field
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.orders.models import Order
+from apps.inventory.alerts import LOW_STOCK_STATES
+from apps.inventory.models import MenuItem
+from apps.tables.models import Table
+from customer.models import CustomerOrder
+from .models import DailySalesRollup, HourlySalesRollup, DailyItemSalesRollup
+
+ACTIVE_ORDER_STATUSES = ['in_progress', 'preparing', 'ready']
+ACTIVE_CUSTOMER_ORDER_STATUSES = ['pending', 'confirmed', 'preparing', 'ready']
+SALES_CHART_DAYS = 7
+
+
+@dataclass
+class DashboardSnapshot:
+    """Everything the manager dashboard shows, computed in a fixed number of queries."""
+    active_orders_count: int = 0
+    active_customer_orders_count: int = 0
+    available_tables: int = 0
+    low_stock_count: int = 0
+    today_sales_count: int = 0
+    today_sales_amount: Decimal = Decimal('0')
+    revenue_data: list = field(default_factory=list)
+    orders_data: list = field(default_factory=list)
+    tables: list = field(default_factory=list)
+
+
+def get_dashboard_snapshot(now=None):
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    chart_start = today - timedelta(days=SALES_CHART_DAYS - 1)
+
+    # Open orders are read from the order tables, where status is authoritative
+    order_stats = Order.objects.aggregate(
+        active=Count('id', filter=Q(status__in=ACTIVE_ORDER_STATUSES)),
+    )
+    customer_stats = CustomerOrder.objects.aggregate(
+        active=Count('id', filter=Q(status__in=ACTIVE_CUSTOMER_ORDER_STATUSES)),
+    )
+
+    # 7-day series (today included) straight from the daily rollup, both sources
+    daily = DailySalesRollup.objects.filter(
+        status='completed',
+        date__gte=chart_start,
+        date__lte=today,
+    ).values('date').annotate(
+        revenue=Sum('revenue'),
+        order_count=Sum('order_count'),
+    ).order_by()
+    daily_by_date = {row['date']: row for row in daily}
+
+    revenue_data = []
+    orders_data = []
+    for i in range(SALES_CHART_DAYS):
+        row = daily_by_date.get(chart_start + timedelta(days=i))
+        revenue_data.append(float(row['revenue']) if row else 0.0)
+        orders_data.append(row['order_count'] if row else 0)
+
+    # The table grid is rendered anyway, so count availability from it
+    tables = list(Table.objects.order_by('number'))
+
+    low_stock_count = MenuItem.objects.filter(stock_state__in=LOW_STOCK_STATES).count()
+
+    return DashboardSnapshot(
+        active_orders_count=order_stats['active'],
+        active_customer_orders_count=customer_stats['active'],
+        available_tables=sum(1 for table in tables if table.status == 'available'),
+        low_stock_count=low_stock_count,
+        today_sales_count=orders_data[-1],
+        today_sales_amount=daily_by_date.get(today, {}).get('revenue') or Decimal('0'),
+        revenue_data=revenue_data,
+        orders_data=orders_data,
+        tables=tables,
+    )
+
+
+def recent_active_orders(limit=5):
+    return Order.objects.filter(
+        status__in=ACTIVE_ORDER_STATUSES
+    ).select_related('table').annotate(
+        item_count=Count('items')
+    ).order_by('-created_at')[:limit]
+
+
+def recent_active_customer_orders(limit=5):
+    return CustomerOrder.objects.filter(
+        status__in=ACTIVE_CUSTOMER_ORDER_STATUSES
+    ).annotate(
+        item_count=Count('items')
+    ).order_by('-created_at')[:limit]
+
+
+# Report readers. These only touch the rollup tables, never the order history.
+# ``source`` narrows them to one of SALES_SOURCES; None covers both.
+def _for_source(manager, source):
+    return manager.filter(source=source) if source else manager.all()
+
+
+def daily_sales(start_date, end_date, source=None):
+    return _for_source(DailySalesRollup.objects, source).filter(
+        date__gte=start_date,
+        date__lte=end_date,
+    ).values('date').annotate(
+        revenue=Sum('revenue'),
+        orders=Sum('order_count'),
+    ).order_by('date')
+
+
+def hourly_sales(day, up_to_hour=23, source=None):
+    """Return (hours, revenue, orders) lists for 00:00 .. up_to_hour on day."""
+    rows = _for_source(HourlySalesRollup.objects, source).filter(
+        date=day,
+        hour__lte=up_to_hour,
+    ).values('hour').annotate(
+        revenue=Sum('revenue'),
+        orders=Sum('order_count'),
+    )
+    by_hour = {row['hour']: row for row in rows}
+
+    hours = []
+    hourly_revenue = []
+    hourly_orders = []
+    for hour in range(up_to_hour + 1):
+        row = by_hour.get(hour)
+        hours.append(f'{hour:02d}:00')
+        hourly_revenue.append(float(row['revenue']) if row else 0.0)
+        hourly_orders.append(row['orders'] if row else 0)
+    return hours, hourly_revenue, hourly_orders
+
+
+def top_selling_items(limit=5, source=None, since=None):
+    rollups = _for_source(DailyItemSalesRollup.objects, source)
+    if since is not None:
+        rollups = rollups.filter(date__gte=since)
+    return rollups.values(
+        'menu_item__name'
+    ).annotate(
+        total_orders=Sum('line_count')
+    ).order_by('-total_orders')[:limit]
+
+
+def most_ordered_items(since, limit=5, source='order', status='completed'):
+    """Menu items on the most ``status`` order lines from the date ``since`` on."""
+    return DailyItemSalesRollup.objects.filter(
+        source=source, status=status, date__gte=since, line_count__gt=0,
+    ).values(
+        'menu_item__name'
+    ).annotate(
+        total_orders=Sum('line_count')
+    ).order_by('-total_orders')[:limit]
+
+
+def revenue_by_category(limit=5, source=None):
+    return _for_source(DailyItemSalesRollup.objects, source).values(
+        'menu_item__category__name'
+    ).annotate(
+        total_revenue=Sum('revenue')
+    ).order_by('-total_revenue')[:limit]
+
+
+def lifetime_sales(source=None):
+    totals = _for_source(DailySalesRollup.objects, source).aggregate(
+        revenue=Sum('revenue'),
+        orders=Sum('order_count'),
+    )
+    revenue = totals['revenue'] or Decimal('0')
+    orders = totals['orders'] or 0
+    return {
+        'total_revenue': revenue,
+        'total_orders': orders,
+        'avg_order_value': revenue / orders if orders else 0,
+    }
@@ -0,0 +1,138 @@
+# apps/dashboard/signals.py
+from decimal import Decimal
+
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+
+from apps.orders.models import Order, OrderItem
+from customer.models import CustomerOrder, CustomerOrderItem
+from .facts import forget_facts, forget_order_facts, record_facts, sync_order_facts
+from .rollups import bump_item_sales, bump_sales, move_item_sales
+
+ORDER_SOURCES = {Order: 'order', CustomerOrder: 'customer_order'}
+ITEM_SOURCES = {OrderItem: 'order', CustomerOrderItem: 'customer_order'}
+ORDER_MODELS = {OrderItem: Order, CustomerOrderItem: CustomerOrder}
+
+
+def _remember_order(instance):
+    values = instance.__dict__
+    if 'status' in values and 'total_amount' in values:
+        instance._rollup_state = (values['status'], Decimal(values['total_amount'] or 0))
+    else:
+        instance._rollup_state = None
+
+
+def _remember_item(instance):
+    values = instance.__dict__
+    if all(name in values for name in ('menu_item_id', 'quantity', 'price_at_time')):
+        instance._rollup_state = (
+            values['menu_item_id'], values['quantity'] or 0, Decimal(values['price_at_time'] or 0)
+        )
+    else:
+        instance._rollup_state = None
+
+
+def order_loaded(sender, instance, **kwargs):
+    _remember_order(instance)
+
+
+def order_saving(sender, instance, **kwargs):
+    # Deferred loads have no snapshot to diff against, so read the stored row
+    if instance.pk and instance._rollup_state is None:
+        stored = sender.objects.filter(pk=instance.pk).values('status', 'total_amount').first()
+        if stored:
+            instance._rollup_state = (stored['status'], Decimal(stored['total_amount']))
+
+
+def order_saved(sender, instance, created, **kwargs):
+    source = ORDER_SOURCES[sender]
+    total = Decimal(instance.total_amount or 0)
+    previous = None if created else instance._rollup_state
+
+    if previous is None:
+        bump_sales(source, instance.created_at, instance.status, revenue=total, orders=1)
+    else:
+        old_status, old_total = previous
+        if old_status != instance.status:
+            lines = list(instance.items.values_list('menu_item_id', 'quantity', 'price_at_time'))
+            items = sum(quantity for _, quantity, _ in lines)
+            move_item_sales(source, instance.created_at, old_status, instance.status, lines)
+            bump_sales(source, instance.created_at, old_status,
+                       revenue=-old_total, orders=-1, items=-items)
+            bump_sales(source, instance.created_at, instance.status,
+                       revenue=total, orders=1, items=items)
+        elif old_total != total:
+            bump_sales(source, instance.created_at, instance.status, revenue=total - old_total)
+        sync_order_facts(source, instance)
+    _remember_order(instance)
+
+
+def order_deleted(sender, instance, **kwargs):
+    # Line items are removed from the rollups by their own delete signals
+    source = ORDER_SOURCES[sender]
+    bump_sales(
+        source, instance.created_at, instance.status,
+        revenue=-Decimal(instance.total_amount or 0), orders=-1,
+    )
+    forget_order_facts(source, instance.pk)
+
+
+def item_loaded(sender, instance, **kwargs):
+    _remember_item(instance)
+
+
+def _apply_item(source, order, menu_item_id, quantity, price, sign):
+    bump_item_sales(
+        source, order.created_at, order.status, menu_item_id,
+        lines=sign, quantity=sign * quantity, revenue=sign * quantity * price,
+    )
+    bump_sales(source, order.created_at, order.status, items=sign * quantity)
+
+
+def item_saving(sender, instance, **kwargs):
+    if instance.pk and instance._rollup_state is None:
+        stored = sender.objects.filter(pk=instance.pk).values(
+            'menu_item_id', 'quantity', 'price_at_time'
+        ).first()
+        if stored:
+            instance._rollup_state = (
+                stored['menu_item_id'], stored['quantity'], Decimal(stored['price_at_time'])
+            )
+
+
+def item_saved(sender, instance, created, **kwargs):
+    source = ITEM_SOURCES[sender]
+    current = (instance.menu_item_id, instance.quantity, Decimal(instance.price_at_time))
+    previous = None if created else instance._rollup_state
+    if previous != current:
+        order = instance.order
+        if previous is not None:
+            _apply_item(source, order, *previous, sign=-1)
+        _apply_item(source, order, *current, sign=1)
+        record_facts(source, order, [instance])
+    _remember_item(instance)
+
+
+def item_deleted(sender, instance, **kwargs):
+    forget_facts(ITEM_SOURCES[sender], [instance.pk])
+    order = ORDER_MODELS[sender].objects.filter(pk=instance.order_id).only(
+        'created_at', 'status', 'total_amount'
+    ).first()
+    if order is None:
+        return
+    _apply_item(
+        ITEM_SOURCES[sender], order, instance.menu_item_id,
+        instance.quantity, Decimal(instance.price_at_time), sign=-1,
+    )
+
+
+def connect():
+    for model in ORDER_SOURCES:
+        post_init.connect(order_loaded, sender=model, dispatch_uid=f'rollup_init_{model.__name__}')
+        pre_save.connect(order_saving, sender=model, dispatch_uid=f'rollup_pre_{model.__name__}')
+        post_save.connect(order_saved, sender=model, dispatch_uid=f'rollup_save_{model.__name__}')
+        post_delete.connect(order_deleted, sender=model, dispatch_uid=f'rollup_delete_{model.__name__}')
+    for model in ITEM_SOURCES:
+        post_init.connect(item_loaded, sender=model, dispatch_uid=f'rollup_init_{model.__name__}')
+        pre_save.connect(item_saving, sender=model, dispatch_uid=f'rollup_pre_{model.__name__}')
+        post_save.connect(item_saved, sender=model, dispatch_uid=f'rollup_save_{model.__name__}')
+        post_delete.connect(item_deleted, sender=model, dispatch_uid=f'rollup_delete_{model.__name__}')
@@ -1,3 +1,415 @@
+import csv
+import importlib.util
+import json
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipIf, skipUnless
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.dashboard.exports import export_range, sales_rows, write_parquet
+from apps.dashboard.facts import rebuild_order_facts
+from apps.dashboard.models import (
+    DailySalesRollup, HourlySalesRollup, DailyItemSalesRollup, OrderLineFact,
+)
+from apps.dashboard.live import SalesFeed, sales_feed
+from apps.dashboard.services import get_dashboard_snapshot
+from apps.inventory.models import Category, MenuItem
+from apps.orders.models import Order, OrderItem
+from apps.orders.services import create_order
+from apps.tables.models import Table
+from customer.models import CustomerOrder, CustomerOrderItem
+
+# session + user lookups from login_required, then the dashboard itself
+DASHBOARD_QUERY_BUDGET = 8
+
+
+class DashboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('manager', password='secret')
+        category = Category.objects.create(name='Mains')
+        cls.burger = MenuItem.objects.create(
+            name='Burger', category=category, price=Decimal('12.50'),
+            stock_quantity=3, low_stock_threshold=5,
+        )
+        MenuItem.objects.create(
+            name='Fries', category=category, price=Decimal('4.00'),
+            stock_quantity=50, low_stock_threshold=5,
+        )
+        tables = [Table.objects.create(number=n, capacity=4) for n in range(1, 6)]
+        Table.objects.filter(number=1).update(status='occupied')
+
+        for n in range(12):
+            order = Order.objects.create(
+                order_number=f'D{n:04d}',
+                table=tables[n % len(tables)],
+                status='completed' if n % 2 else 'preparing',
+                total_amount=Decimal('25.00'),
+            )
+            OrderItem.objects.create(
+                order=order, menu_item=cls.burger, quantity=2,
+                price_at_time=cls.burger.price,
+            )
+        CustomerOrder.objects.create(
+            order_number='C0001', customer_name='Ana', customer_email='ana@example.com',
+            customer_phone='123', total_amount=Decimal('10.00'), status='completed',
+        )
+        CustomerOrder.objects.create(
+            order_number='C0002', customer_name='Rui', customer_email='rui@example.com',
+            customer_phone='456', total_amount=Decimal('8.00'), status='confirmed',
+        )
+
+    def test_snapshot_values(self):
+        snapshot = get_dashboard_snapshot()
+        self.assertEqual(snapshot.active_orders_count, 6)
+        self.assertEqual(snapshot.active_customer_orders_count, 1)
+        self.assertEqual(snapshot.available_tables, 4)
+        self.assertEqual(snapshot.low_stock_count, 1)
+        self.assertEqual(snapshot.today_sales_count, 7)
+        self.assertEqual(snapshot.today_sales_amount, Decimal('160.00'))
+        self.assertEqual(len(snapshot.revenue_data), 7)
+        # The chart covers staff and online orders alike
+        self.assertEqual(snapshot.revenue_data[-1], 160.0)
+        self.assertEqual(snapshot.orders_data, [0, 0, 0, 0, 0, 0, 7])
+
+    def test_dashboard_query_budget(self):
+        self.client.force_login(self.user)
+        with self.assertNumQueries(DASHBOARD_QUERY_BUDGET):
+            response = self.client.get(reverse('dashboard:dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['active_orders_count'], 6)
+
+    def test_dashboard_query_count_independent_of_data_size(self):
+        table = Table.objects.get(number=2)
+        for n in range(30):
+            Order.objects.create(
+                order_number=f'X{n:04d}', table=table,
+                status='ready', total_amount=Decimal('5.00'),
+            )
+        self.client.force_login(self.user)
+        with self.assertNumQueries(DASHBOARD_QUERY_BUDGET):
+            self.client.get(reverse('dashboard:dashboard'))
+
+
+class SalesRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('manager', password='secret')
+        category = Category.objects.create(name='Drinks')
+        cls.soda = MenuItem.objects.create(name='Soda', category=category, price=Decimal('2.00'))
+        cls.table = Table.objects.create(number=1, capacity=2)
+
+    def make_order(self, number, quantity, status='in_progress'):
+        order = Order.objects.create(
+            order_number=number, table=self.table, status=status,
+            total_amount=self.soda.price * quantity,
+        )
+        OrderItem.objects.create(
+            order=order, menu_item=self.soda, quantity=quantity, price_at_time=self.soda.price,
+        )
+        return order
+
+    def rollup_state(self):
+        return (
+            sorted(DailySalesRollup.objects.exclude(order_count=0, items_sold=0).values_list(
+                'date', 'source', 'status', 'revenue', 'order_count', 'items_sold')),
+            sorted(HourlySalesRollup.objects.exclude(order_count=0, items_sold=0).values_list(
+                'date', 'hour', 'source', 'status', 'revenue', 'order_count', 'items_sold')),
+            sorted(DailyItemSalesRollup.objects.exclude(line_count=0).values_list(
+                'date', 'source', 'status', 'menu_item', 'line_count', 'quantity', 'revenue')),
+        )
+
+    def test_status_change_moves_order_between_buckets(self):
+        order = self.make_order('R0001', 3)
+        order.status = 'completed'
+        order.save()
+
+        completed = DailySalesRollup.objects.get(source='order', status='completed')
+        self.assertEqual(completed.order_count, 1)
+        self.assertEqual(completed.items_sold, 3)
+        self.assertEqual(completed.revenue, Decimal('6.00'))
+        in_progress = DailySalesRollup.objects.get(source='order', status='in_progress')
+        self.assertEqual((in_progress.order_count, in_progress.items_sold), (0, 0))
+        self.assertEqual(
+            list(DailyItemSalesRollup.objects.order_by('status').values_list(
+                'status', 'line_count', 'quantity', 'revenue')),
+            [('completed', 1, 3, Decimal('6.00')), ('in_progress', 0, 0, Decimal('0.00'))],
+        )
+
+    def test_incremental_matches_rebuild(self):
+        self.make_order('R0001', 2, status='completed')
+        order = self.make_order('R0002', 4)
+        order.items.first().delete()
+        cancelled = self.make_order('R0004', 2)
+        cancelled.status = 'cancelled'
+        cancelled.save()
+        self.make_order('R0003', 1).delete()
+        CustomerOrder.objects.create(
+            order_number='C0001', customer_name='Ana', customer_email='ana@example.com',
+            customer_phone='123', total_amount=Decimal('4.00'), status='completed',
+        )
+        incremental = self.rollup_state()
+
+        call_command('rebuild_sales_rollups', stdout=StringIO())
+        self.assertEqual(self.rollup_state(), incremental)
+
+    def test_reports_read_from_rollups(self):
+        self.make_order('R0001', 2, status='completed')
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('dashboard:reports'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_orders'], 1)
+        self.assertEqual(response.context['total_revenue'], Decimal('4.00'))
+        self.assertEqual(list(response.context['top_items']), [
+            {'menu_item__name': 'Soda', 'total_orders': 1},
+        ])
+
+        response = self.client.get(reverse('dashboard:sales-data'))
+        self.assertEqual(sum(response.json()['hourly_orders']), 1)
+
+
+class OrderLineFactTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('manager', password='secret')
+        category = Category.objects.create(name='Drinks')
+        cls.soda = MenuItem.objects.create(
+            name='Soda', category=category, price=Decimal('2.00'), stock_quantity=100,
+        )
+        cls.juice = MenuItem.objects.create(
+            name='Juice', category=category, price=Decimal('3.50'), stock_quantity=100,
+        )
+        cls.table = Table.objects.create(number=7, capacity=4)
+
+    def make_customer_order(self, number, quantity, status='confirmed'):
+        order = CustomerOrder.objects.create(
+            order_number=number, customer_name='Ana', customer_email='ana@example.com',
+            customer_phone='123', order_type='takeaway', status=status,
+            total_amount=self.juice.price * quantity,
+        )
+        CustomerOrderItem.objects.create(
+            order=order, menu_item=self.juice, quantity=quantity, price_at_time=self.juice.price,
+        )
+        return order
+
+    def fact_state(self):
+        return sorted(OrderLineFact.objects.values_list(
+            'source', 'order_id', 'line_id', 'order_number', 'order_type', 'table_number',
+            'status', 'menu_item', 'menu_item_name', 'category_name', 'quantity',
+            'unit_price', 'line_total', 'ordered_at',
+        ))
+
+    def test_bulk_order_path_records_facts(self):
+        order = create_order(self.table, [(self.soda.pk, 2), (self.juice.pk, 1)])
+        facts = OrderLineFact.objects.filter(source='order', order_id=order.pk).order_by('line_id')
+        self.assertEqual(
+            [(f.order_number, f.table_number, f.category_name, f.menu_item_name, f.quantity, f.line_total)
+             for f in facts],
+            [(order.order_number, 7, 'Drinks', 'Soda', 2, Decimal('4.00')),
+             (order.order_number, 7, 'Drinks', 'Juice', 1, Decimal('3.50'))],
+        )
+
+    def test_status_change_is_one_update(self):
+        order = self.make_customer_order('C0001', 2)
+        order.status = 'completed'
+        with CaptureQueriesContext(connection) as queries:
+            order.save()
+        fact_queries = [q['sql'] for q in queries if 'dashboard_orderlinefact' in q['sql']]
+        self.assertEqual(len(fact_queries), 1)
+        self.assertEqual(
+            list(OrderLineFact.objects.values_list('source', 'order_type', 'status', 'line_total')),
+            [('customer_order', 'takeaway', 'completed', Decimal('7.00'))],
+        )
+
+    def test_deleting_lines_and_orders_removes_facts(self):
+        order = create_order(self.table, [(self.soda.pk, 1), (self.juice.pk, 1)])
+        order.items.get(menu_item=self.soda).delete()
+        self.assertEqual(OrderLineFact.objects.filter(order_id=order.pk).count(), 1)
+        self.make_customer_order('C0001', 1).delete()
+        order.delete()
+        self.assertFalse(OrderLineFact.objects.exists())
+
+    def test_incremental_matches_rebuild(self):
+        create_order(self.table, [(self.soda.pk, 2)], status='completed')
+        self.make_customer_order('C0001', 3)
+        line = OrderItem.objects.create(
+            order=create_order(self.table, [(self.juice.pk, 1)]),
+            menu_item=self.soda, quantity=1, price_at_time=self.soda.price,
+        )
+        line.quantity = 4
+        line.save()
+        incremental = self.fact_state()
+        self.assertEqual(len(incremental), 4)
+
+        self.assertEqual(rebuild_order_facts(), 4)
+        self.assertEqual(self.fact_state(), incremental)
+
+    def test_reports_cover_both_sources(self):
+        create_order(self.table, [(self.soda.pk, 1)], status='completed')
+        self.make_customer_order('C0001', 2, status='completed')
+        call_command('rebuild_sales_rollups', '--with-facts', stdout=StringIO())
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('dashboard:reports'))
+        self.assertEqual(response.context['total_orders'], 2)
+        self.assertEqual(response.context['total_revenue'], Decimal('9.00'))
+        self.assertEqual(
+            sorted((row['menu_item__name'], row['total_orders']) for row in response.context['top_items']),
+            [('Juice', 1), ('Soda', 1)],
+        )
+
+
+class LiveSalesFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('manager', password='secret')
+        cls.table = Table.objects.create(number=1, capacity=2)
+
+    def test_stream_declines_without_asgi(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('dashboard:sales-stream'))
+        self.assertEqual(response.status_code, 204)
+
+    async def test_stream_sends_snapshot_then_deltas(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('dashboard:sales-stream'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = aiter(response.streaming_content)
+        first = (await anext(events)).decode()
+        self.assertTrue(first.startswith('event: snapshot\n'))
+
+        sales_feed.publish({'type': 'delta', 'date': timezone.localdate().isoformat(),
+                            'hour': 9, 'revenue': 12.5, 'orders': 1})
+        second = (await anext(events)).decode()
+        self.assertEqual(
+            second,
+            'event: delta\ndata: ' + json.dumps({'type': 'delta', 'date': timezone.localdate().isoformat(),
+                                                 'hour': 9, 'revenue': 12.5, 'orders': 1}) + '\n\n',
+        )
+        await events.aclose()
+
+    def test_order_changes_publish_once_per_commit(self):
+        received = []
+        listening = mock.patch.object(
+            SalesFeed, 'subscriber_count', new_callable=mock.PropertyMock, return_value=1
+        )
+        with listening, mock.patch.object(sales_feed, 'publish', received.append):
+            with self.captureOnCommitCallbacks(execute=True):
+                Order.objects.create(order_number='L0001', table=self.table,
+                                     total_amount=Decimal('9.00'))
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0]['orders'], 1)
+        self.assertEqual(received[0]['revenue'], 9.0)
+
+
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+
+class SalesExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('finance', password='secret')
+        category = Category.objects.create(name='Drinks')
+        cls.soda = MenuItem.objects.create(name='Soda', category=category, price=Decimal('2.00'), stock_quantity=100)
+        table = Table.objects.create(number=3, capacity=4)
+        cls.staff = create_order(table, [(cls.soda.pk, 2)])
+        cls.online = CustomerOrder.objects.create(
+            order_number='W0001', customer_name='Ana', customer_email='ana@example.com', customer_phone='1',
+            order_type='takeaway', payment_status='paid', total_amount=Decimal('2.00'),
+        )
+        CustomerOrderItem.objects.create(order=cls.online, menu_item=cls.soda, quantity=1, price_at_time=Decimal('2.00'))
+        cls.old = create_order(table, [(cls.soda.pk, 5)])
+        Order.objects.filter(pk=cls.old.pk).update(created_at=timezone.now() - timedelta(days=3))
+        rebuild_order_facts()
+        cls.today = timezone.localdate()
+
+    def read_csv(self, response):
+        self.assertTrue(response.streaming)
+        return list(csv.DictReader(StringIO(b''.join(response.streaming_content).decode())))
+
+    def test_line_export_covers_both_sources_for_the_range(self):
+        self.client.force_login(self.user)
+        rows = self.read_csv(self.client.get(reverse('dashboard:sales-export')))
+        self.assertEqual(
+            [(row['source'], row['order_number'], row['quantity'], row['line_total']) for row in rows],
+            [('order', self.staff.order_number, '2', '4.00'), ('customer_order', 'W0001', '1', '2.00')],
+        )
+        self.assertEqual(rows[0]['table_number'], '3')
+
+        rows = self.read_csv(self.client.get(reverse('dashboard:sales-export'), {
+            'start': (self.today - timedelta(days=3)).isoformat(), 'end': self.today.isoformat(),
+        }))
+        self.assertEqual(rows[0]['order_number'], self.old.order_number)
+        self.assertEqual(len(rows), 3)
+
+    def test_order_export_merges_sources_in_time_order(self):
+        rows = list(sales_rows('orders', *export_range(self.today - timedelta(days=7), self.today), chunk_size=1))
+        self.assertEqual(
+            [(row[0], row[1], row[5]) for row in rows],
+            [('order', self.old.order_number, ''), ('order', self.staff.order_number, ''),
+             ('customer_order', 'W0001', 'paid')],
+        )
+        self.assertEqual([row[6] for row in rows], sorted(row[6] for row in rows))
+
+    def test_bad_parameters(self):
+        self.client.force_login(self.user)
+        url = reverse('dashboard:sales-export')
+        for params in ({'dataset': 'menu'}, {'start': '2025-02-30'}, {'start': '2025-02-02', 'end': '2025-02-01'}):
+            self.assertEqual(self.client.get(url, params).status_code, 400)
+
+    async def test_streams_incrementally_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('dashboard:sales-export'), {'dataset': 'orders'})
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertEqual(len(body.splitlines()), 3)
+        self.assertIn('W0001', body)
+
+    def test_command_writes_csv(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'sales.csv'
+            call_command('export_sales', output=str(path), dataset='orders', stderr=StringIO())
+            rows = list(csv.DictReader(path.open()))
+        self.assertEqual([row['order_number'] for row in rows], [self.staff.order_number, 'W0001'])
+        self.assertEqual(rows[1]['total_amount'], '2.00')
+
+    @skipIf(HAS_PYARROW, 'pyarrow is installed')
+    def test_parquet_needs_pyarrow(self):
+        with self.assertRaisesMessage(CommandError, 'pip install pyarrow'):
+            call_command('export_sales', format='parquet', output='unused.parquet')
+
+    @skipUnless(HAS_PYARROW, 'pyarrow is not installed')
+    def test_parquet_row_groups(self):
+        import pyarrow.parquet as pq
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'sales.parquet'
+            count = write_parquet(path, 'lines', *export_range(self.today - timedelta(days=7), self.today), chunk_size=2)
+            parquet = pq.ParquetFile(path)
+            self.assertEqual((count, parquet.metadata.num_row_groups), (3, 2))
+            self.assertEqual(parquet.read().column('line_total').to_pylist()[0], Decimal('10.00'))
+
+            # Constant columns, a null table and both sources' timestamps
+            write_parquet(path, 'orders', *export_range(self.today - timedelta(days=7), self.today), chunk_size=2)
+            rows = pq.read_table(path).to_pylist()
+        self.assertEqual(
+            [(row['source'], row['order_type'], row['table_number'], row['payment_status'], row['total_amount'])
+             for row in rows],
+            [('order', 'dine_in', 3, '', Decimal('10.00')), ('order', 'dine_in', 3, '', Decimal('4.00')),
+             ('customer_order', 'takeaway', None, 'paid', Decimal('2.00'))],
+        )
+        self.assertEqual(
+            [row['created_at'] for row in rows],
+            [order.created_at for order in (Order.objects.get(pk=self.old.pk), self.staff, self.online)],
+        )
 
-# Create your tests here.
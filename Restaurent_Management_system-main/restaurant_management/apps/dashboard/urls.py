@@ -7,5 +7,7 @@ urlpatterns = [
     path('', views.dashboard, name='dashboard'),
     path('reports/', views.reports_page, name='reports'),
     path('reports/sales-data/', views.sales_data, name='sales-data'),
+    path('reports/export/', views.sales_export, name='sales-export'),
+    path('reports/sales-stream/', views.sales_stream, name='sales-stream'),
     path('logout/', views.custom_logout, name='logout'),
 ]
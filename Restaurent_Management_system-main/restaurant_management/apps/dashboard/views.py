@@ -1,20 +1,37 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from apps.orders.models import Order, OrderItem
-from apps.inventory.models import MenuItem
+from apps.tables.floor import floor_counts
 from apps.tables.models import Table
-from customer.models import CustomerOrder
-from django.db.models import Count, Sum, F, Avg
-from django.db.models.functions import ExtractHour
 from django.utils import timezone
 from datetime import timedelta
-from django.http import JsonResponse
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_date
 from django.contrib.auth import logout
 from django.shortcuts import redirect
 from django.contrib.auth.forms import UserCreationForm
 from django.views.generic.edit import CreateView
 from django.urls import reverse_lazy
 from django.contrib import messages
+from core.streaming import download_response
+from .exports import DATASETS, export_range, sales_csv_lines
+from .live import sales_feed
+from .services import (
+    get_dashboard_snapshot,
+    recent_active_orders,
+    recent_active_customer_orders,
+    daily_sales,
+    hourly_sales,
+    top_selling_items,
+    revenue_by_category,
+    lifetime_sales,
+)
+
+SSE_HEARTBEAT_SECONDS = 15
 
 class RegisterView(CreateView):
     form_class = UserCreationForm
@@ -23,119 +40,24 @@ class RegisterView(CreateView):
 
 @login_required
 def dashboard(request):
-    today = timezone.now().date()
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-
-    # Get counts for dashboard widgets
-    active_orders = Order.objects.filter(
-        status__in=['in_progress', 'preparing', 'ready']
-    ).order_by('-created_at')
-    active_orders_count = active_orders.count()
-    
-    # Get customer orders
-    active_customer_orders = CustomerOrder.objects.filter(
-        status__in=['pending', 'confirmed', 'preparing', 'ready']
-    ).order_by('-created_at')
-    active_customer_orders_count = active_customer_orders.count()
-    
-    # Get available tables count
-    available_tables = Table.objects.filter(status='available').count()
-    
-    # Get low stock items count
-    low_stock_count = MenuItem.objects.filter(
-        stock_quantity__lte=F('low_stock_threshold')
-    ).count()
-    
-    # Get today's sales (including customer orders)
-    today_sales = Order.objects.filter(
-        created_at__date=today,
-        status='completed'
-    ).aggregate(
-        count=Count('id'),
-        total=Sum('total_amount')
-    )
-    
-    today_customer_sales = CustomerOrder.objects.filter(
-        created_at__date=today,
-        status='completed'
-    ).aggregate(
-        count=Count('id'),
-        total=Sum('total_amount')
-    )
-    
-    # Combine admin and customer sales
-    total_today_sales_count = (today_sales['count'] or 0) + (today_customer_sales['count'] or 0)
-    total_today_sales_amount = (today_sales['total'] or 0) + (today_customer_sales['total'] or 0)
-
-    # Get all tables with their current status
-    tables = Table.objects.all().order_by('number')
-
-    # Get sales data for the chart
-    sales_data = []
-    orders_data = []
-    
-    for i in range(7):
-        day = timezone.now().date() - timedelta(days=6-i)
-        day_orders = Order.objects.filter(
-            created_at__date=day,
-            status='completed'
-        ).aggregate(
-            total=Sum('total_amount'),
-            count=Count('id')
-        )
-        sales_data.append(float(day_orders['total'] or 0))
-        orders_data.append(day_orders['count'] or 0)
+    snapshot = get_dashboard_snapshot()
 
     context = {
-        'active_orders': active_orders[:5],  # Limit to 5 most recent
-        'active_orders_count': active_orders_count,
-        'active_customer_orders': active_customer_orders[:5],  # Limit to 5 most recent
-        'active_customer_orders_count': active_customer_orders_count,
-        'available_tables': available_tables,
-        'low_stock_count': low_stock_count,
-        'today_sales_count': total_today_sales_count,
-        'today_sales_amount': total_today_sales_amount,
-        'tables': tables,
-        'revenue_data': sales_data,
-        'orders_data': orders_data,
+        'active_orders': recent_active_orders(),
+        'active_orders_count': snapshot.active_orders_count,
+        'active_customer_orders': recent_active_customer_orders(),
+        'active_customer_orders_count': snapshot.active_customer_orders_count,
+        'available_tables': snapshot.available_tables,
+        'low_stock_count': snapshot.low_stock_count,
+        'today_sales_count': snapshot.today_sales_count,
+        'today_sales_amount': snapshot.today_sales_amount,
+        'tables': snapshot.tables,
+        'revenue_data': snapshot.revenue_data,
+        'orders_data': snapshot.orders_data,
     }
     
     return render(request, 'dashboard/dashboard.html', context)
 
-@login_required
-def reports_page(request):
-    # Get date range for reports
-    end_date = timezone.now()
-    start_date = end_date - timedelta(days=30)
-    
-    # Get order statistics
-    orders = Order.objects.filter(created_at__range=[start_date, end_date])
-    total_sales = orders.aggregate(total=Sum('total_amount'))['total'] or 0
-    orders_by_status = orders.values('status').annotate(count=Count('id'))
-    
-    context = {
-        'total_sales': total_sales,
-        'orders_by_status': orders_by_status,
-        'start_date': start_date,
-        'end_date': end_date,
-    }
-    return render(request, 'dashboard/reports.html', context)
-
-@login_required
-def sales_data(request):
-    # Get sales data for charts
-    end_date = timezone.now()
-    start_date = end_date - timedelta(days=30)
-    
-    daily_sales = Order.objects.filter(
-        created_at__range=[start_date, end_date],
-        status='completed'
-    ).values('created_at__date').annotate(
-        total=Sum('total_amount')
-    ).order_by('created_at__date')
-    
-    return JsonResponse(list(daily_sales), safe=False)
-
 @login_required
 def orders_page(request):
     # Redirect to the new orders view
@@ -143,14 +65,7 @@ def orders_page(request):
 
 @login_required
 def tables_page(request):
-    tables = Table.objects.all()
-    context = {
-        'tables': tables,
-        'total_tables': tables.count(),
-        'available_tables': tables.filter(status='available').count(),
-        'occupied_tables': tables.filter(status='occupied').count(),
-        'reserved_tables': tables.filter(status='reserved').count(),
-    }
+    context = {'tables': Table.objects.all(), **floor_counts()}
     return render(request, 'tables/table_list.html', context)
 
 @login_required
@@ -159,81 +74,31 @@ def inventory_page(request):
 
 @login_required
 def reports_page(request):
-    # Get date range
-    end_date = timezone.now()
-    start_date = end_date - timedelta(days=7)
-    
-    # Daily sales and orders for the past week
-    daily_stats = Order.objects.filter(
-        created_at__range=(start_date, end_date)
-    ).values('created_at__date').annotate(
-        revenue=Sum('total_amount'),
-        orders=Count('id')
-    ).order_by('created_at__date')
-
-    # Get today's hourly data for real-time chart
-    today = timezone.now().date()
-    hourly_stats = Order.objects.filter(
-        created_at__date=today
-    ).annotate(
-        hour=ExtractHour('created_at')
-    ).values('hour').annotate(
-        revenue=Sum('total_amount'),
-        orders=Count('id')
-    ).order_by('hour')
+    now = timezone.localtime()
+    today = now.date()
 
-    # Format hourly data
-    hours = []
-    hourly_revenue = []
-    hourly_orders = []
-    current_hour = timezone.now().hour
-    
-    for hour in range(current_hour + 1):
-        hour_data = next((x for x in hourly_stats if x['hour'] == hour), None)
-        hours.append(f'{hour:02d}:00')
-        hourly_revenue.append(float(hour_data['revenue'] if hour_data else 0))
-        hourly_orders.append(hour_data['orders'] if hour_data else 0)
-
-    # Format weekly data for chart
+    # Daily sales and orders for the past week
     dates = []
     revenue_data = []
     orders_data = []
-    for stat in daily_stats:
-        dates.append(stat['created_at__date'].strftime('%a'))
+    for stat in daily_sales(today - timedelta(days=7), today):
+        dates.append(stat['date'].strftime('%a'))
         revenue_data.append(float(stat['revenue'] or 0))
         orders_data.append(stat['orders'])
 
-    # Top selling items
-    top_items = OrderItem.objects.values(
-        'menu_item__name'
-    ).annotate(
-        total_orders=Count('id')
-    ).order_by('-total_orders')[:5]
-
-    # Revenue by category
-    category_revenue = OrderItem.objects.values(
-        'menu_item__category__name'
-    ).annotate(
-        total_revenue=Sum(F('price_at_time') * F('quantity'))
-    ).order_by('-total_revenue')[:5]
-
-    # Performance metrics
-    avg_order_value = Order.objects.aggregate(
-        avg_value=Avg('total_amount')
-    )['avg_value'] or 0
+    # Today's hourly data for real-time chart
+    hours, hourly_revenue, hourly_orders = hourly_sales(today, now.hour)
 
     # Table metrics
+    floor = floor_counts()
     table_metrics = {
-        'total_tables': Table.objects.count(),
-        'occupied_tables': Table.objects.filter(status='occupied').count(),
+        'total_tables': floor['total_tables'],
+        'occupied_tables': floor['occupied_tables'],
         'reservations_today': 0  # TODO: Implement actual reservation system
     }
 
     # Overall statistics
-    total_orders = Order.objects.count()
-    total_revenue = Order.objects.aggregate(
-        total=Sum('total_amount')
-    )['total'] or 0
+    totals = lifetime_sales()
     avg_rating = 4.8  # TODO: Implement actual rating system
 
     context = {
@@ -243,47 +108,89 @@ def reports_page(request):
         'hours': hours,
         'hourly_revenue': hourly_revenue,
         'hourly_orders': hourly_orders,
-        'top_items': top_items,
-        'category_revenue': category_revenue,
-        'avg_order_value': avg_order_value,
+        'top_items': top_selling_items(),
+        'category_revenue': revenue_by_category(),
+        'avg_order_value': totals['avg_order_value'],
         'table_metrics': table_metrics,
-        'total_orders': total_orders,
-        'total_revenue': total_revenue,
+        'total_orders': totals['total_orders'],
+        'total_revenue': totals['total_revenue'],
         'avg_rating': avg_rating,
     }
     
     return render(request, 'dashboard/reports.html', context)
 
+def _hourly_sales_payload():
+    now = timezone.localtime()
+    hours, hourly_revenue, hourly_orders = hourly_sales(now.date(), now.hour)
+    return {
+        'date': now.date().isoformat(),
+        'hours': hours,
+        'hourly_revenue': hourly_revenue,
+        'hourly_orders': hourly_orders
+    }
+
 @login_required
 def sales_data(request):
     """API endpoint for real-time sales data"""
-    today = timezone.now().date()
-    hourly_stats = Order.objects.filter(
-        created_at__date=today
-    ).annotate(
-        hour=ExtractHour('created_at')
-    ).values('hour').annotate(
-        revenue=Sum('total_amount'),
-        orders=Count('id')
-    ).order_by('hour')
+    return JsonResponse(_hourly_sales_payload())
 
-    # Format hourly data
-    hours = []
-    hourly_revenue = []
-    hourly_orders = []
-    current_hour = timezone.now().hour
-    
-    for hour in range(current_hour + 1):
-        hour_data = next((x for x in hourly_stats if x['hour'] == hour), None)
-        hours.append(f'{hour:02d}:00')
-        hourly_revenue.append(float(hour_data['revenue'] if hour_data else 0))
-        hourly_orders.append(hour_data['orders'] if hour_data else 0)
+@login_required
+def sales_export(request):
+    """Order lines or orders for ``?start=``..``?end=`` (inclusive, default today) as streamed CSV."""
+    dataset = request.GET.get('dataset', 'lines')
+    if dataset not in DATASETS:
+        return HttpResponseBadRequest('dataset must be lines or orders')
+    today = timezone.localdate()
+    try:
+        start_day = parse_date(request.GET.get('start') or '') or today
+        end_day = parse_date(request.GET.get('end') or '') or today
+    except ValueError:
+        return HttpResponseBadRequest('start and end must be dates in YYYY-MM-DD format')
+    if end_day < start_day:
+        return HttpResponseBadRequest('end must not be before start')
+    start, end = export_range(start_day, end_day)
+    return download_response(
+        request, sales_csv_lines(dataset, start, end), 'text/csv',
+        f'sales-{dataset}-{start_day.isoformat()}-{end_day.isoformat()}.csv',
+    )
 
-    return JsonResponse({
-        'hours': hours,
-        'hourly_revenue': hourly_revenue,
-        'hourly_orders': hourly_orders
-    })
+def _sse(event, data):
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+async def _sales_events():
+    queue = sales_feed.subscribe()
+    try:
+        snapshot = await sync_to_async(_hourly_sales_payload)()
+        yield _sse('snapshot', snapshot)
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                event = None
+
+            # Start a fresh chart at midnight, or after the client fell behind
+            if event is None and timezone.localdate().isoformat() == snapshot['date']:
+                yield ': keep-alive\n\n'
+            elif event is None or event['type'] == 'resync' or event['date'] != snapshot['date']:
+                snapshot = await sync_to_async(_hourly_sales_payload)()
+                yield _sse('snapshot', snapshot)
+            else:
+                yield _sse('delta', event)
+    finally:
+        sales_feed.unsubscribe(queue)
+
+@login_required
+async def sales_stream(request):
+    """Server-Sent Events feed of today's hourly sales, pushed as orders change"""
+    if not isinstance(request, ASGIRequest):
+        # Streaming needs an ASGI server; 204 tells EventSource not to reconnect
+        # and the reports page falls back to polling sales-data.
+        return HttpResponse(status=204)
+
+    response = StreamingHttpResponse(_sales_events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 @login_required
 def custom_logout(request):
@@ -1,5 +1,35 @@
 from django.contrib import admin
-from .models import Category, MenuItem
+from django.utils import timezone
+from .models import Category, Ingredient, MenuItem, RecipeLine, StockAlert
 
 admin.site.register(Category)
-admin.site.register(MenuItem)
+
+
+class RecipeLineInline(admin.TabularInline):
+    model = RecipeLine
+    autocomplete_fields = ['ingredient']
+    extra = 0
+
+
+@admin.register(MenuItem)
+class MenuItemAdmin(admin.ModelAdmin):
+    list_display = ('name', 'category', 'price', 'stock_quantity', 'stock_state', 'is_available')
+    inlines = [RecipeLineInline]
+
+
+@admin.register(Ingredient)
+class IngredientAdmin(admin.ModelAdmin):
+    list_display = ('name', 'unit', 'stock_quantity', 'low_stock_threshold')
+    search_fields = ('name',)
+
+
+@admin.register(StockAlert)
+class StockAlertAdmin(admin.ModelAdmin):
+    list_display = ('menu_item', 'kind', 'stock_quantity', 'low_stock_threshold', 'created_at', 'acknowledged_at')
+    list_filter = ('kind',)
+    list_select_related = ('menu_item',)
+    actions = ['acknowledge']
+
+    @admin.action(description='Acknowledge selected alerts')
+    def acknowledge(self, request, queryset):
+        queryset.filter(acknowledged_at__isnull=True).update(acknowledged_at=timezone.now())
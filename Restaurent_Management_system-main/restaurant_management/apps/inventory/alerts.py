@@ -0,0 +1,87 @@
+# apps/inventory/alerts.py
+"""Low-stock alerts raised by the writes that change stock.
+
+Every stock write calls ``check_stock_levels`` for the items it touched.
+This includes the bulk UPDATEs in apps.inventory.stock and
+apps.inventory.recipes, and model saves. The check is one SELECT that
+returns only items whose stored ``stock_state`` no longer matches their
+stock, so it is usually empty. For the items that crossed a threshold it
+records StockAlert rows and moves ``stock_state``. An item that runs out
+is taken off the menu (``is_available``), and it comes back when it is
+restocked. Nothing ever scans the catalogue to find low stock.
+"""
+from django.db import models, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import MenuItem, StockAlert
+
+LOW_STOCK_STATES = ('low', 'out')
+
+# Sent with ``menu_item_ids`` after a stock change switches items on or off the menu
+availability_changed = Signal()
+
+
+def stock_level():
+    """SQL for the level an item's current stock puts it at."""
+    return Case(
+        When(stock_quantity=0, then=Value('out')),
+        When(stock_quantity__lte=F('low_stock_threshold'), then=Value('low')),
+        default=Value('in_stock'),
+        output_field=models.CharField(),
+    )
+
+
+def reset_stock_states(queryset=None):
+    """Set ``stock_state`` from current stock without raising alerts, e.g. after bulk_create."""
+    queryset = MenuItem.objects.all() if queryset is None else queryset
+    return queryset.update(stock_state=stock_level())
+
+
+def _per_item(values, output_field, default=None):
+    return Case(
+        *[When(pk=pk, then=Value(value)) for pk, value in values.items()],
+        default=default, output_field=output_field,
+    )
+
+
+def check_stock_levels(menu_item_ids):
+    """Alert on and apply any threshold crossings among ``menu_item_ids``.
+
+    ``menu_item_ids`` may be a list or a values() subquery. Returns the new
+    StockAlert rows.
+    """
+    crossed = list(
+        MenuItem.objects.filter(pk__in=menu_item_ids).annotate(level=stock_level()).filter(
+            ~Q(stock_state=F('level')),
+        ).values_list('pk', 'level', 'stock_quantity', 'low_stock_threshold', 'is_available', 'auto_disabled')
+    )
+    if not crossed:
+        return []
+
+    states, available, auto_disabled = {}, {}, {}
+    alerts = []
+    for pk, level, stock, threshold, is_available, was_auto_disabled in crossed:
+        states[pk] = level
+        alerts.append(StockAlert(
+            menu_item_id=pk, kind='restocked' if level == 'in_stock' else level,
+            stock_quantity=stock, low_stock_threshold=threshold,
+        ))
+        if level == 'out' and is_available:
+            available[pk], auto_disabled[pk] = False, True
+        elif level != 'out' and was_auto_disabled:
+            available[pk], auto_disabled[pk] = True, False
+
+    changes = {'stock_state': _per_item(states, models.CharField())}
+    if available:
+        changes['is_available'] = _per_item(available, models.BooleanField(), F('is_available'))
+        changes['auto_disabled'] = _per_item(auto_disabled, models.BooleanField(), F('auto_disabled'))
+    with transaction.atomic(savepoint=False):
+        MenuItem.objects.filter(pk__in=list(states)).update(**changes, updated_at=timezone.now())
+        alerts = StockAlert.objects.bulk_create(alerts)
+    if available:
+        transaction.on_commit(lambda: availability_changed.send(
+            sender=MenuItem, menu_item_ids=list(available),
+        ))
+    return alerts
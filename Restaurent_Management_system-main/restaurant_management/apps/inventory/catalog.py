@@ -0,0 +1,251 @@
+# apps/inventory/catalog.py
+"""Bulk menu import and export.
+
+Exports read the menu off a server-side cursor (``.iterator()``) and yield
+CSV or JSON text one row at a time. Memory use stays flat however large
+the catalogue is. Imports read CSV, or a JSON array of objects, as a
+stream. Each chunk of rows is validated with the model fields' own
+cleaning and then upserted by (item name, category name): one SELECT, one
+bulk_create and one bulk_update per chunk. The whole import runs in one
+transaction. A file with any invalid row writes nothing, and the error
+lists every bad row up to MAX_ERRORS. Bulk writes skip model signals, so
+each chunk re-derives stock levels itself (apps.inventory.alerts), and
+``menu_imported`` is sent once after commit.
+"""
+import csv
+import json
+from decimal import Decimal
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from core.streaming import csv_lines
+from .alerts import check_stock_levels
+from .models import Category, MenuItem
+from .recipes import refresh_servings
+
+# Columns of an export, and what an import reads; only name and category are required
+FIELDS = ('name', 'category', 'description', 'price', 'stock_quantity', 'low_stock_threshold', 'is_available')
+ITEM_FIELDS = FIELDS[2:]
+FORMATS = ('csv', 'json')
+STOCK_FIELDS = {'stock_quantity', 'low_stock_threshold'}
+MAX_ERRORS = 100
+
+# Sent after an import commits, with ``menu_item_ids`` (every item created
+# or changed) and ``repriced_ids`` (items whose price changed)
+menu_imported = Signal()
+
+
+class MenuImportError(ValidationError):
+    def __init__(self, errors):
+        # errors: list of (row number, message); row 0 is the file itself
+        self.errors = errors
+        shown = '; '.join(f'row {row}: {message}' if row else message for row, message in errors[:20])
+        if len(errors) > 20:
+            shown += f'; and {len(errors) - 20} more'
+        super().__init__(f'Menu import failed: {shown}')
+
+
+class _DryRun(Exception):
+    pass
+
+
+# Export
+
+def export_rows(queryset=None, chunk_size=2000):
+    """Yield one ``{field: value}`` dict per menu item, streamed from the database."""
+    queryset = MenuItem.objects.all() if queryset is None else queryset
+    rows = queryset.order_by('category__name', 'name', 'pk').values_list(
+        'name', 'category__name', *ITEM_FIELDS,
+    )
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield dict(zip(FIELDS, row))
+
+
+def json_lines(rows):
+    """A JSON array, one object per line, produced without holding the rows."""
+    separator = '[\n'
+    for row in rows:
+        yield separator + json.dumps(row, cls=DjangoJSONEncoder)
+        separator = ',\n'
+    yield '[]\n' if separator == '[\n' else '\n]\n'
+
+
+def export_lines(fmt, queryset=None):
+    rows = export_rows(queryset)
+    if fmt == 'csv':
+        return csv_lines(FIELDS, ([row[field] for field in FIELDS] for row in rows))
+    return json_lines(rows)
+
+
+# Import
+
+def read_csv(stream):
+    try:
+        yield from csv.DictReader(stream)
+    except csv.Error as e:
+        raise MenuImportError([(0, f'Invalid CSV: {e}')])
+
+
+def read_json(stream, read_size=64 * 1024):
+    """Yield the objects of a top-level JSON array, decoding as the stream is read."""
+    decoder = json.JSONDecoder(parse_float=Decimal)
+    buffer, opened, eof = '', False, False
+    while True:
+        buffer = buffer.lstrip()
+        if buffer and not opened:
+            if buffer[0] != '[':
+                raise MenuImportError([(0, 'JSON input must be an array of objects')])
+            buffer, opened = buffer[1:], True
+            continue
+        if buffer.startswith(']'):
+            return
+        if buffer.startswith(','):
+            buffer = buffer[1:]
+            continue
+        if buffer:
+            try:
+                value, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                # Most likely an object cut off by the read size; fetch more
+                if eof:
+                    raise MenuImportError([(0, 'Invalid JSON')])
+            else:
+                yield value
+                buffer = buffer[end:]
+                continue
+        if eof:
+            raise MenuImportError([(0, 'Unexpected end of JSON input')])
+        chunk = stream.read(read_size)
+        eof = not chunk
+        buffer += chunk
+
+
+def read_rows(stream, fmt):
+    return read_csv(stream) if fmt == 'csv' else read_json(stream)
+
+
+def _clean(row):
+    """``(category name, item name, {field: value})`` for one input row.
+
+    Values go through the model fields' own to_python and validators. Blank
+    or missing columns are left out, so an import only changes what it names.
+    """
+    if not isinstance(row, dict):
+        raise ValidationError('expected an object')
+    errors, values = [], {}
+    for field, model_field in (
+        ('name', MenuItem._meta.get_field('name')),
+        ('category', Category._meta.get_field('name')),
+        *((field, MenuItem._meta.get_field(field)) for field in ITEM_FIELDS),
+    ):
+        value = row.get(field)
+        if isinstance(value, str):
+            value = value.strip()
+        if value is None or value == '':
+            if field in ('name', 'category'):
+                errors.append(f'{field} is required')
+            continue
+        try:
+            values[field] = model_field.clean(value, None)
+        except ValidationError as e:
+            errors.append(f'{field}: {" ".join(e.messages)}')
+    if errors:
+        raise ValidationError(errors)
+    return values.pop('category'), values.pop('name'), values
+
+
+def _apply(chunk, totals, touched, repriced):
+    """Upsert one chunk of ``{(category name, item name): values}``."""
+    categories = dict(Category.objects.filter(name__in={c for c, _ in chunk}).values_list('name', 'pk'))
+    missing = [Category(name=name) for name in {c for c, _ in chunk} - categories.keys()]
+    for category in Category.objects.bulk_create(missing):
+        categories[category.name] = category.pk
+    totals['categories_created'] += len(missing)
+
+    existing = {}
+    # Highest pk first so that, for duplicate names already in the table, the oldest row wins
+    for item in MenuItem.objects.filter(
+        category_id__in=list(categories.values()), name__in={name for _, name in chunk},
+    ).order_by('-pk'):
+        existing[item.category_id, item.name] = item
+
+    created, updated, fields = [], [], set()
+    now = timezone.now()
+    for (category, name), values in chunk.items():
+        item = existing.get((categories[category], name))
+        if item is None:
+            item = MenuItem(name=name, category_id=categories[category], **values)
+            # bulk_create skips save(); start the item at its level, as save() would
+            item.stock_state = item.stock_level()
+            created.append(item)
+            continue
+        changed = {field: value for field, value in values.items() if getattr(item, field) != value}
+        if not changed:
+            totals['unchanged'] += 1
+            continue
+        for field, value in changed.items():
+            setattr(item, field, value)
+        item.updated_at = now
+        fields.update(changed)
+        updated.append(item)
+        if 'price' in changed:
+            repriced.append(item.pk)
+
+    MenuItem.objects.bulk_create(created)
+    if updated:
+        MenuItem.objects.bulk_update(updated, [*sorted(fields), 'updated_at'])
+    if fields & STOCK_FIELDS:
+        ids = [item.pk for item in updated]
+        # Dishes with a recipe keep the servings their ingredients allow
+        refresh_servings(menu_item_ids=ids)
+        check_stock_levels(ids)
+    totals['created'] += len(created)
+    totals['updated'] += len(updated)
+    touched.extend(item.pk for item in created + updated)
+
+
+def import_menu(rows, chunk_size=500, dry_run=False):
+    """Upsert menu items from an iterable of dicts; all rows or none.
+
+    Rows are keyed by ``name`` and ``category`` (a category name; missing
+    categories are created). Returns counts of what was created, updated
+    and left unchanged. Raises MenuImportError listing the invalid rows.
+    With ``dry_run`` everything is validated and applied, then rolled back.
+    """
+    totals = dict.fromkeys(('created', 'updated', 'unchanged', 'categories_created'), 0)
+    errors, touched, repriced = [], [], []
+    rows = enumerate(rows, start=1)
+    try:
+        with transaction.atomic():
+            while len(errors) < MAX_ERRORS:
+                batch = list(islice(rows, chunk_size))
+                if not batch:
+                    break
+                chunk = {}
+                for number, row in batch:
+                    try:
+                        category, name, values = _clean(row)
+                    except ValidationError as e:
+                        errors.append((number, '; '.join(e.messages)))
+                        continue
+                    # A later row for the same item adds to (and overrides) an earlier one
+                    chunk.setdefault((category, name), {}).update(values)
+                # Once a row has failed nothing will be kept; just validate the rest
+                if chunk and not errors:
+                    _apply(chunk, totals, touched, repriced)
+            if errors:
+                raise MenuImportError(errors[:MAX_ERRORS])
+            if dry_run:
+                raise _DryRun
+            if touched:
+                transaction.on_commit(lambda: menu_imported.send(
+                    sender=MenuItem, menu_item_ids=touched, repriced_ids=repriced,
+                ))
+    except _DryRun:
+        pass
+    return totals
@@ -0,0 +1,22 @@
+# apps/inventory/management/commands/export_menu.py
+from django.core.management.base import BaseCommand
+
+from apps.inventory.catalog import FORMATS, export_lines
+
+
+class Command(BaseCommand):
+    help = 'Write the menu as CSV or JSON, streamed from the database, to a file or stdout'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--output', help='File to write (default: stdout).')
+
+    def handle(self, *args, **options):
+        lines = export_lines(options['format'])
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8', newline='') as fh:
+            fh.writelines(lines)
+        self.stderr.write(self.style.SUCCESS(f'Wrote the menu to {options["output"]}'))
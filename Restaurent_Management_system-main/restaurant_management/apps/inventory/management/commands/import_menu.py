@@ -0,0 +1,41 @@
+# apps/inventory/management/commands/import_menu.py
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inventory.catalog import FORMATS, MenuImportError, import_menu, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Create or update menu items from a CSV or JSON file, matched by name and category'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension.')
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help='Validate and report without saving anything.')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or options['path'].rpartition('.')[2].lower()
+        if fmt not in FORMATS:
+            raise CommandError('Pass --format csv or --format json for this file')
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as fh:
+                result = import_menu(
+                    read_rows(fh, fmt), chunk_size=options['chunk_size'], dry_run=options['dry_run'],
+                )
+        except OSError as e:
+            raise CommandError(str(e))
+        except UnicodeDecodeError:
+            raise CommandError('The file must be UTF-8 encoded')
+        except MenuImportError as e:
+            raise CommandError('\n'.join(
+                f'row {row}: {message}' if row else message for row, message in e.errors
+            ))
+
+        summary = (
+            f'{result["created"]} created, {result["updated"]} updated, {result["unchanged"]} unchanged, '
+            f'{result["categories_created"]} new categories'
+        )
+        if options['dry_run']:
+            self.stdout.write(f'Dry run, nothing saved: {summary}')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Imported the menu: {summary}'))
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Case, F, Value, When
+
+
+def set_stock_states(apps, schema_editor):
+    # Start every item at its current level; only later crossings raise alerts
+    MenuItem = apps.get_model('inventory', 'MenuItem')
+    MenuItem.objects.update(stock_state=Case(
+        When(stock_quantity=0, then=Value('out')),
+        When(stock_quantity__lte=F('low_stock_threshold'), then=Value('low')),
+        default=Value('in_stock'),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_ingredients_and_recipes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('low', 'Low stock'), ('out', 'Out of stock'), ('restocked', 'Restocked')], max_length=10)),
+                ('stock_quantity', models.PositiveIntegerField()),
+                ('low_stock_threshold', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('acknowledged_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='menuitem',
+            name='menuitem_low_stock_idx',
+        ),
+        migrations.AddField(
+            model_name='menuitem',
+            name='auto_disabled',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='menuitem',
+            name='stock_state',
+            field=models.CharField(choices=[('in_stock', 'In stock'), ('low', 'Low stock'), ('out', 'Out of stock')], default='in_stock', editable=False, max_length=10),
+        ),
+        migrations.RunPython(set_stock_states, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(fields=['stock_state', 'name'], name='menuitem_low_stock_idx'),
+        ),
+        migrations.AddField(
+            model_name='stockalert',
+            name='menu_item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_alerts', to='inventory.menuitem'),
+        ),
+        migrations.AddIndex(
+            model_name='stockalert',
+            index=models.Index(condition=models.Q(('acknowledged_at__isnull', True)), fields=['-created_at'], name='stockalert_open_idx'),
+        ),
+    ]
@@ -1,4 +1,6 @@
 # apps/inventory/models.py
+from decimal import Decimal
+
 from django.db import models
 from django.core.validators import MinValueValidator
 
@@ -27,6 +29,12 @@ class Category(models.Model):
         ordering = ['display_order', 'name']
 
 class MenuItem(models.Model):
+    STOCK_STATES = [
+        ('in_stock', 'In stock'),
+        ('low', 'Low stock'),
+        ('out', 'Out of stock'),
+    ]
+
     name = models.CharField(max_length=100)
     category = models.ForeignKey(
         Category, 
@@ -47,12 +55,107 @@ class MenuItem(models.Model):
     is_available = models.BooleanField(default=True)
     stock_quantity = models.PositiveIntegerField(default=0)
     low_stock_threshold = models.PositiveIntegerField(default=10)
+    # Last stock level seen by apps.inventory.alerts; moves only when a
+    # threshold is crossed, so low-stock lists filter on it instead of
+    # comparing every row's stock with its threshold
+    stock_state = models.CharField(max_length=10, choices=STOCK_STATES, default='in_stock', editable=False)
+    # Set when running out switched is_available off, so a restock can switch it back
+    auto_disabled = models.BooleanField(default=False, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            # Low-stock lists and counts only ever read this handful of rows
+            models.Index(fields=['stock_state', 'name'], name='menuitem_low_stock_idx'),
+        ]
+
+    def stock_level(self):
+        if self.stock_quantity == 0:
+            return 'out'
+        if self.stock_quantity <= self.low_stock_threshold:
+            return 'low'
+        return 'in_stock'
+
+    def save(self, *args, **kwargs):
+        # New items start at their level; only later changes raise alerts
+        if self._state.adding:
+            self.stock_state = self.stock_level()
+        super().save(*args, **kwargs)
+
     @property
     def is_low_stock(self):
-        return self.stock_quantity <= self.low_stock_threshold
\ No newline at end of file
+        return self.stock_quantity <= self.low_stock_threshold
+
+
+class Ingredient(models.Model):
+    UNITS = [
+        ('g', 'Grams'),
+        ('ml', 'Millilitres'),
+        ('unit', 'Units'),
+    ]
+
+    name = models.CharField(max_length=100, unique=True)
+    unit = models.CharField(max_length=10, choices=UNITS, default='g')
+    stock_quantity = models.DecimalField(
+        max_digits=12, decimal_places=3, default=0, validators=[MinValueValidator(0)]
+    )
+    low_stock_threshold = models.DecimalField(max_digits=12, decimal_places=3, default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return f"{self.name} ({self.unit})"
+
+
+class RecipeLine(models.Model):
+    """How much of one ingredient a single serving of a menu item uses.
+
+    A menu item with recipe lines has its ``stock_quantity`` kept equal to
+    the servings its ingredients allow (apps.inventory.recipes).
+    """
+    menu_item = models.ForeignKey(MenuItem, related_name='recipe_lines', on_delete=models.CASCADE)
+    ingredient = models.ForeignKey(Ingredient, related_name='recipe_lines', on_delete=models.PROTECT)
+    quantity = models.DecimalField(
+        max_digits=10, decimal_places=3, validators=[MinValueValidator(Decimal('0.001'))]
+    )
+
+    class Meta:
+        unique_together = ('menu_item', 'ingredient')
+
+    def __str__(self):
+        return f"{self.quantity} {self.ingredient.unit} {self.ingredient.name} in {self.menu_item.name}"
+
+
+class StockAlert(models.Model):
+    """A menu item's stock crossing into (or back out of) low / out of stock."""
+    KINDS = [
+        ('low', 'Low stock'),
+        ('out', 'Out of stock'),
+        ('restocked', 'Restocked'),
+    ]
+
+    menu_item = models.ForeignKey(MenuItem, related_name='stock_alerts', on_delete=models.CASCADE)
+    kind = models.CharField(max_length=10, choices=KINDS)
+    stock_quantity = models.PositiveIntegerField()
+    low_stock_threshold = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    acknowledged_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['-created_at'], name='stockalert_open_idx',
+                condition=models.Q(acknowledged_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.menu_item.name}: {self.get_kind_display()} ({self.stock_quantity} left)"
@@ -0,0 +1,123 @@
+# apps/inventory/recipes.py
+"""Ingredient stock driven by menu item recipes.
+
+Taking stock for a batch of menu items reads their recipe lines once,
+explodes the batch into per-ingredient amounts in memory and subtracts them
+all in one conditional UPDATE. Every menu item that has a recipe keeps its
+``stock_quantity`` equal to the servings its ingredients still allow. The
+figure is recomputed only for the dishes that use an ingredient that just
+changed: their recipes are read in one query, divided in Decimal and
+written back in one UPDATE. Menu availability, low-stock lists and the
+dish-level stock checks therefore read a stored number and never walk a
+recipe.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .alerts import check_stock_levels
+from .models import Ingredient, MenuItem, RecipeLine
+
+
+def explode(quantities):
+    """``{ingredient_id: amount}`` needed for ``{menu_item_id: servings}``, in one query."""
+    needed = defaultdict(Decimal)
+    lines = RecipeLine.objects.filter(menu_item_id__in=list(quantities)).values_list(
+        'menu_item_id', 'ingredient_id', 'quantity',
+    )
+    for menu_item_id, ingredient_id, quantity in lines:
+        needed[ingredient_id] += quantity * quantities[menu_item_id]
+    return dict(needed)
+
+
+def _per_ingredient(amounts):
+    return Case(
+        *[When(pk=ingredient_id, then=Value(amount)) for ingredient_id, amount in amounts.items()],
+        output_field=models.DecimalField(max_digits=12, decimal_places=3),
+    )
+
+
+def consume_ingredients(quantities):
+    """Take the ingredients for ``{menu_item_id: servings}``, all or nothing.
+
+    Raises InsufficientStock naming the short ingredients. Menu items
+    without a recipe are ignored.
+    """
+    from .stock import InsufficientStock, _Shortfall
+
+    amounts = explode({pk: qty for pk, qty in quantities.items() if qty > 0})
+    if not amounts:
+        return
+    requested = _per_ingredient(amounts)
+    try:
+        with transaction.atomic():
+            updated = Ingredient.objects.filter(
+                pk__in=list(amounts), stock_quantity__gte=requested,
+            ).update(
+                stock_quantity=F('stock_quantity') - requested,
+                updated_at=timezone.now(),
+            )
+            if updated != len(amounts):
+                raise _Shortfall
+            refresh_servings(ingredient_ids=amounts)
+    except _Shortfall:
+        current = Ingredient.objects.filter(pk__in=list(amounts)).values_list('pk', 'name', 'stock_quantity')
+        raise InsufficientStock([
+            (name, stock, amounts[pk]) for pk, name, stock in current if stock < amounts[pk]
+        ])
+
+
+def return_ingredients(quantities):
+    """Give back the ingredients for ``{menu_item_id: servings}`` in one UPDATE."""
+    amounts = explode({pk: qty for pk, qty in quantities.items() if qty > 0})
+    if not amounts:
+        return
+    Ingredient.objects.filter(pk__in=list(amounts)).update(
+        stock_quantity=F('stock_quantity') + _per_ingredient(amounts),
+        updated_at=timezone.now(),
+    )
+    refresh_servings(ingredient_ids=amounts)
+
+
+def servings(menu_item_ids):
+    """``{menu_item_id: whole servings}`` the current ingredient stock allows, in one query.
+
+    Divided in Decimal here rather than in SQL: SQLite divides in floating
+    point, where 0.7 / 0.1 floors to 6.
+    """
+    allowed = {}
+    lines = RecipeLine.objects.filter(menu_item_id__in=menu_item_ids).values_list(
+        'menu_item_id', 'ingredient__stock_quantity', 'quantity',
+    )
+    for menu_item_id, stock, quantity in lines:
+        count = int(stock // quantity)
+        allowed[menu_item_id] = min(allowed.get(menu_item_id, count), count)
+    return allowed
+
+
+def refresh_servings(ingredient_ids=None, menu_item_ids=None):
+    """Recompute stored servings for dishes using these ingredients (or these dishes).
+
+    One read of their recipes and one UPDATE; dishes without a recipe keep
+    the stock they were given.
+    """
+    lines = RecipeLine.objects.all()
+    if ingredient_ids is not None:
+        lines = lines.filter(ingredient_id__in=list(ingredient_ids))
+    if menu_item_ids is not None:
+        lines = lines.filter(menu_item_id__in=list(menu_item_ids))
+    allowed = servings(lines.values('menu_item_id'))
+    if not allowed:
+        return 0
+    updated = MenuItem.objects.filter(pk__in=list(allowed)).update(
+        stock_quantity=Case(
+            *[When(pk=pk, then=Value(count)) for pk, count in allowed.items()],
+            output_field=models.IntegerField(),
+        ),
+        updated_at=timezone.now(),
+    )
+    check_stock_levels(list(allowed))
+    return updated
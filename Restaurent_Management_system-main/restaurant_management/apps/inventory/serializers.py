@@ -1,5 +1,8 @@
 # apps/inventory/serializers.py
+from django.utils.encoding import filepath_to_uri
 from rest_framework import serializers
+
+from core.api import api_datetime, api_decimal
 from .models import MenuItem, Category
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -10,6 +13,9 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description', 'menu_items_count']
     
     def get_menu_items_count(self, obj):
+        # CategoryViewSet annotates the count; other callers fall back to a query
+        if hasattr(obj, 'menu_items_total'):
+            return obj.menu_items_total
         return obj.menu_items.count()
 
 class MenuItemSerializer(serializers.ModelSerializer):
@@ -29,4 +35,37 @@ class MenuItemSerializer(serializers.ModelSerializer):
             request = self.context.get('request')
             if request is not None:
                 representation['image'] = request.build_absolute_uri(instance.image.url)
-        return representation
\ No newline at end of file
+        return representation
+
+
+# Read-only fast path for MenuItemSerializer lists (see core.api.ValuesListMixin)
+MENU_ITEM_VALUES = (
+    'id', 'name', 'category', 'category__name', 'description', 'price', 'image',
+    'is_available', 'stock_quantity', 'low_stock_threshold', 'created_at', 'updated_at',
+)
+
+
+def menu_item_rows(rows, request=None):
+    """MenuItemSerializer output for ``.values(*MENU_ITEM_VALUES)`` rows."""
+    # The storage URL prefix is resolved once instead of per image
+    media_url = MenuItem._meta.get_field('image').storage.url('')
+    if request is not None:
+        media_url = request.build_absolute_uri(media_url)
+    return [
+        {
+            'id': row['id'],
+            'name': row['name'],
+            'category': row['category'],
+            'category_name': row['category__name'],
+            'description': row['description'],
+            'price': api_decimal(row['price']),
+            'image': media_url + filepath_to_uri(row['image']).lstrip('/') if row['image'] else None,
+            'is_available': row['is_available'],
+            'stock_quantity': row['stock_quantity'],
+            'low_stock_threshold': row['low_stock_threshold'],
+            'is_low_stock': row['stock_quantity'] <= row['low_stock_threshold'],
+            'created_at': api_datetime(row['created_at']),
+            'updated_at': api_datetime(row['updated_at']),
+        }
+        for row in rows
+    ]
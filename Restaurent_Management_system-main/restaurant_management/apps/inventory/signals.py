@@ -0,0 +1,29 @@
+# apps/inventory/signals.py
+from django.db.models.signals import post_delete, post_save
+
+from .alerts import check_stock_levels
+from .models import Ingredient, MenuItem, RecipeLine
+from .recipes import refresh_servings
+
+
+def menu_item_saved(sender, instance, created, **kwargs):
+    # Stock edited through a form, the admin or the update_stock API action
+    if not created:
+        check_stock_levels([instance.pk])
+
+
+def ingredient_saved(sender, instance, created, **kwargs):
+    # A stock count or correction changes what every dish using it can serve
+    if not created:
+        refresh_servings(ingredient_ids=[instance.pk])
+
+
+def recipe_changed(sender, instance, **kwargs):
+    refresh_servings(menu_item_ids=[instance.menu_item_id])
+
+
+def connect():
+    post_save.connect(menu_item_saved, sender=MenuItem, dispatch_uid='stock_alerts_menu_item_saved')
+    post_save.connect(ingredient_saved, sender=Ingredient, dispatch_uid='servings_ingredient_saved')
+    post_save.connect(recipe_changed, sender=RecipeLine, dispatch_uid='servings_recipe_saved')
+    post_delete.connect(recipe_changed, sender=RecipeLine, dispatch_uid='servings_recipe_deleted')
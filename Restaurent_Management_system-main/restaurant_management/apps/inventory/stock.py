@@ -0,0 +1,114 @@
+# apps/inventory/stock.py
+from collections import Counter
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .alerts import check_stock_levels
+from .models import MenuItem
+from .recipes import consume_ingredients, return_ingredients
+
+
+class InsufficientStock(ValidationError):
+    def __init__(self, shortages):
+        # shortages: list of (menu item name, available, requested)
+        self.shortages = shortages
+        super().__init__(
+            'Not enough stock for: %s' % ', '.join(
+                f'{name} ({available} left, {requested} requested)'
+                for name, available, requested in shortages
+            )
+        )
+
+
+class _Shortfall(Exception):
+    pass
+
+
+def merge_quantities(lines):
+    """Sum (menu_item_id, quantity) pairs into {menu_item_id: quantity}."""
+    totals = Counter()
+    for menu_item_id, quantity in lines:
+        totals[menu_item_id] += quantity
+    return {menu_item_id: quantity for menu_item_id, quantity in totals.items() if quantity}
+
+
+def _per_item(quantities):
+    return Case(
+        *[When(pk=menu_item_id, then=Value(quantity)) for menu_item_id, quantity in quantities.items()],
+        output_field=models.IntegerField(),
+    )
+
+
+def decrement_stock(quantities):
+    """Take stock for every item in ``{menu_item_id: quantity}`` or for none.
+
+    A single conditional UPDATE subtracts all quantities where enough stock is
+    left; if any row misses the condition the whole decrement is rolled back
+    and InsufficientStock lists the offending items. No rows are read first,
+    so concurrent orders cannot lose updates. Items with a recipe also take
+    their ingredients, in the same transaction (see apps.inventory.recipes).
+    """
+    quantities = {pk: qty for pk, qty in quantities.items() if qty > 0}
+    if not quantities:
+        return
+
+    requested = _per_item(quantities)
+    try:
+        with transaction.atomic():
+            updated = MenuItem.objects.filter(
+                pk__in=list(quantities),
+                stock_quantity__gte=requested,
+            ).update(
+                stock_quantity=F('stock_quantity') - requested,
+                updated_at=timezone.now(),
+            )
+            if updated != len(quantities):
+                raise _Shortfall
+            consume_ingredients(quantities)
+            check_stock_levels(list(quantities))
+    except _Shortfall:
+        current = {
+            pk: (name, stock)
+            for pk, name, stock in MenuItem.objects.filter(
+                pk__in=list(quantities)
+            ).values_list('pk', 'name', 'stock_quantity')
+        }
+        raise InsufficientStock([
+            (*current.get(pk, (f'#{pk}', 0)), qty)
+            for pk, qty in quantities.items()
+            if current.get(pk, (None, 0))[1] < qty
+        ])
+
+
+def restore_stock(quantities):
+    """Give stock back for ``{menu_item_id: quantity}`` in one UPDATE, plus any ingredients."""
+    quantities = {pk: qty for pk, qty in quantities.items() if qty > 0}
+    if not quantities:
+        return
+    with transaction.atomic():
+        MenuItem.objects.filter(pk__in=list(quantities)).update(
+            stock_quantity=F('stock_quantity') + _per_item(quantities),
+            updated_at=timezone.now(),
+        )
+        return_ingredients(quantities)
+        check_stock_levels(list(quantities))
+
+
+def stock_summary(queryset=None):
+    """Item, stock and stock value totals plus low/in/out-of-stock counts in one query."""
+    queryset = MenuItem.objects.all() if queryset is None else queryset
+    return queryset.aggregate(
+        total_items=Count('pk'),
+        total_stock=Coalesce(Sum('stock_quantity'), 0),
+        total_stock_value=Coalesce(
+            Sum(F('stock_quantity') * F('price')), Value(0),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        ),
+        low_stock_count=Count('pk', filter=Q(stock_quantity__lte=F('low_stock_threshold'))),
+        available_items=Count('pk', filter=Q(stock_quantity__gt=0)),
+        unavailable_items=Count('pk', filter=Q(stock_quantity=0)),
+    )
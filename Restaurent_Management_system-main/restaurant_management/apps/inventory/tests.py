@@ -1,3 +1,403 @@
+import io
+import json
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import F
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.dashboard.models import DailyItemSalesRollup
+from .alerts import LOW_STOCK_STATES
+from .catalog import MenuImportError, export_lines, import_menu, read_csv, read_json
+from customer.menu_cache import get_menu_version
+from customer.models import Cart, CartItem
+from .models import Category, Ingredient, MenuItem, RecipeLine, StockAlert
+from .stock import InsufficientStock, decrement_stock, restore_stock
+
+
+class StockTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Mains')
+        cls.pasta = MenuItem.objects.create(
+            name='Pasta', category=category, price=Decimal('9.00'), stock_quantity=5,
+        )
+        cls.salad = MenuItem.objects.create(
+            name='Salad', category=category, price=Decimal('6.00'), stock_quantity=1,
+        )
+
+    def stock(self):
+        return dict(MenuItem.objects.values_list('name', 'stock_quantity'))
+
+    def test_decrement_in_one_update(self):
+        # savepoint, UPDATE, recipe lookup, level check, release, plus the
+        # state UPDATE and alert INSERT for Salad running out
+        with self.assertNumQueries(7):
+            decrement_stock({self.pasta.id: 2, self.salad.id: 1})
+        self.assertEqual(self.stock(), {'Pasta': 3, 'Salad': 0})
+
+    def test_shortage_rolls_back_every_line(self):
+        with self.assertRaises(InsufficientStock) as ctx:
+            decrement_stock({self.pasta.id: 2, self.salad.id: 3})
+        self.assertEqual(ctx.exception.shortages, [('Salad', 1, 3)])
+        self.assertEqual(self.stock(), {'Pasta': 5, 'Salad': 1})
+
+    def test_restore(self):
+        restore_stock({self.pasta.id: 4, self.salad.id: 0})
+        self.assertEqual(self.stock(), {'Pasta': 9, 'Salad': 1})
+
+
+class StockAlertTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('stock', password='secret')
+        cls.soup = MenuItem.objects.create(
+            name='Soup', category=Category.objects.create(name='Soups'), price=Decimal('5.00'),
+            stock_quantity=12, low_stock_threshold=5,
+        )
+
+    def alerts(self):
+        return list(StockAlert.objects.order_by('pk').values_list('kind', 'stock_quantity'))
+
+    def test_crossings_raise_alerts_and_move_availability(self):
+        decrement_stock({self.soup.id: 3})
+        self.assertEqual(self.alerts(), [])
+
+        decrement_stock({self.soup.id: 5})
+        self.assertEqual(self.alerts(), [('low', 4)])
+        decrement_stock({self.soup.id: 1})
+        self.assertEqual(self.alerts(), [('low', 4)])
+
+        version = get_menu_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            decrement_stock({self.soup.id: 3})
+        self.soup.refresh_from_db()
+        self.assertEqual((self.soup.stock_state, self.soup.is_available, self.soup.auto_disabled), ('out', False, True))
+        self.assertEqual(self.alerts(), [('low', 4), ('out', 0)])
+        self.assertGreater(get_menu_version(), version)
+
+        restore_stock({self.soup.id: 20})
+        self.soup.refresh_from_db()
+        self.assertEqual((self.soup.stock_state, self.soup.is_available, self.soup.auto_disabled), ('in_stock', True, False))
+        self.assertEqual(self.alerts()[-1], ('restocked', 20))
+
+    def test_restock_leaves_items_switched_off_by_hand(self):
+        self.soup.is_available = False
+        self.soup.save()
+        decrement_stock({self.soup.id: 12})
+        restore_stock({self.soup.id: 12})
+        self.soup.refresh_from_db()
+        self.assertFalse(self.soup.is_available)
+        self.assertEqual([kind for kind, _ in self.alerts()], ['out', 'restocked'])
+
+    def test_update_stock_action_is_checked(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse('api:menuitem-update-stock', args=[self.soup.pk]), {'stock_quantity': 0},
+        )
+        self.assertEqual(response.json()['is_available'], False)
+        self.assertEqual(self.alerts(), [('out', 0)])
+        response = self.client.get(reverse('api:menuitem-low-stock'))
+        self.assertEqual([item['name'] for item in response.json()], ['Soup'])
+
+
+class RecipeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Mains')
+        cls.flour = Ingredient.objects.create(name='Flour', stock_quantity=Decimal('1000'))
+        cls.cheese = Ingredient.objects.create(name='Cheese', stock_quantity=Decimal('250'))
+        cls.pizza = MenuItem.objects.create(name='Pizza', category=category, price=Decimal('10.00'))
+        cls.bread = MenuItem.objects.create(name='Bread', category=category, price=Decimal('3.00'))
+        cls.water = MenuItem.objects.create(name='Water', category=category, price=Decimal('1.00'), stock_quantity=9)
+        RecipeLine.objects.create(menu_item=cls.pizza, ingredient=cls.flour, quantity=Decimal('250'))
+        RecipeLine.objects.create(menu_item=cls.pizza, ingredient=cls.cheese, quantity=Decimal('100'))
+        RecipeLine.objects.create(menu_item=cls.bread, ingredient=cls.flour, quantity=Decimal('300'))
+
+    def servings(self):
+        return dict(MenuItem.objects.values_list('name', 'stock_quantity'))
+
+    def ingredients(self):
+        return dict(Ingredient.objects.values_list('name', 'stock_quantity'))
+
+    def test_servings_follow_the_scarcest_ingredient(self):
+        self.assertEqual(self.servings(), {'Pizza': 2, 'Bread': 3, 'Water': 9})
+
+    def test_order_explodes_into_one_ingredient_update(self):
+        # dishes, recipes, ingredients, servings read and write and two level checks, inside two savepoints
+        with self.assertNumQueries(11):
+            decrement_stock({self.pizza.id: 1, self.bread.id: 1, self.water.id: 2})
+        self.assertEqual(self.ingredients(), {'Flour': Decimal('450'), 'Cheese': Decimal('150')})
+        self.assertEqual(self.servings(), {'Pizza': 1, 'Bread': 1, 'Water': 7})
+
+        restore_stock({self.pizza.id: 1, self.bread.id: 1})
+        self.assertEqual(self.ingredients(), {'Flour': Decimal('1000'), 'Cheese': Decimal('250')})
+        self.assertEqual(self.servings(), {'Pizza': 2, 'Bread': 3, 'Water': 7})
+
+    def test_shared_ingredient_shortage_rolls_back_everything(self):
+        # Each dish fits on its own; together they need 1100g of flour
+        with self.assertRaises(InsufficientStock) as ctx:
+            decrement_stock({self.pizza.id: 2, self.bread.id: 2, self.water.id: 1})
+        self.assertEqual(ctx.exception.shortages, [('Flour', Decimal('1000'), Decimal('1100'))])
+        self.assertEqual(self.ingredients(), {'Flour': Decimal('1000'), 'Cheese': Decimal('250')})
+        self.assertEqual(self.servings(), {'Pizza': 2, 'Bread': 3, 'Water': 9})
+
+    def test_servings_are_divided_exactly(self):
+        # 0.7 / 0.1 is 6.999... in floating point
+        oil = Ingredient.objects.create(name='Oil', unit='ml', stock_quantity=Decimal('0.7'))
+        RecipeLine.objects.create(menu_item=self.water, ingredient=oil, quantity=Decimal('0.1'))
+        self.assertEqual(self.servings()['Water'], 7)
+        decrement_stock({self.water.id: 6})
+        self.assertEqual(self.ingredients()['Oil'], Decimal('0.1'))
+        self.water.refresh_from_db()
+        self.assertEqual((self.water.stock_quantity, self.water.is_available), (1, True))
+
+    def test_restocking_an_ingredient_updates_its_dishes(self):
+        self.cheese.stock_quantity = Decimal('1000')
+        self.cheese.save()
+        self.assertEqual(self.servings(), {'Pizza': 4, 'Bread': 3, 'Water': 9})
+        RecipeLine.objects.filter(menu_item=self.bread).delete()
+        RecipeLine.objects.create(menu_item=self.bread, ingredient=self.cheese, quantity=Decimal('50'))
+        self.assertEqual(self.servings()['Bread'], 20)
+
+
+class CategoryApiTests(TestCase):
+    def test_menu_item_counts_are_annotated(self):
+        user = User.objects.create_user('manager', password='secret')
+        for n in range(4):
+            category = Category.objects.create(name=f'Category {n}', display_order=n)
+            for m in range(n):
+                MenuItem.objects.create(name=f'Item {n}-{m}', category=category, price=Decimal('1.00'))
+
+        self.client.force_login(user)
+        # session, user, count, one annotated page
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('api:category-list'))
+        self.assertEqual(
+            [row['menu_items_count'] for row in response.json()['results']], [0, 1, 2, 3],
+        )
+
+
+class InventoryListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('stock', password='secret')
+        cls.mains = Category.objects.create(name='Mains')
+        cls.drinks = Category.objects.create(name='Drinks')
+        cls.items = [
+            MenuItem.objects.create(
+                name=f'Dish {n:02d}', category=cls.mains, price=Decimal('4.00'),
+                stock_quantity=n % 4, low_stock_threshold=1,
+            )
+            for n in range(70)
+        ]
+        MenuItem.objects.create(name='Water', category=cls.drinks, price=Decimal('1.00'), stock_quantity=50)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_stats_come_from_one_aggregate(self):
+        today = timezone.localdate()
+        rollups = [
+            # Only completed staff orders from the last 30 days count
+            ('order', 'completed', self.items[3], today, 2),
+            ('order', 'completed', self.items[4], today - timedelta(days=29), 1),
+            ('order', 'cancelled', self.items[4], today, 3), ('order', 'in_progress', self.items[4], today, 3),
+            ('order', 'completed', self.items[6], today, 0),
+            ('customer_order', 'completed', self.items[4], today, 3),
+            ('order', 'completed', self.items[5], today - timedelta(days=30), 4),
+        ]
+        DailyItemSalesRollup.objects.bulk_create([
+            DailyItemSalesRollup(
+                date=day, source=source, status=status, menu_item=item,
+                line_count=lines, quantity=lines, revenue=item.price * lines,
+            )
+            for source, status, item, day, lines in rollups
+        ])
+
+        response = self.client.get(reverse('inventory:inventory_list'))
+        context = response.context
+        self.assertEqual(
+            [context[key] for key in ('total_items', 'total_stock', 'low_stock_count', 'available_items', 'unavailable_items')],
+            [71, 153, 36, 53, 18],
+        )
+        self.assertEqual(context['total_stock_value'], Decimal('462.00'))
+        self.assertEqual(
+            [(row['menu_item__name'], row['total_orders']) for row in context['most_ordered_items']],
+            [('Dish 03', 2), ('Dish 04', 1)],
+        )
+        self.assertEqual(
+            [(row['name'], row['item_count']) for row in context['categories']],
+            [('Drinks', 1), ('Mains', 70)],
+        )
+
+        # session, user, stats, popularity, page count, page rows; categories are cached
+        with self.assertNumQueries(6):
+            self.client.get(reverse('inventory:inventory_list'))
+
+    def test_list_is_paginated_and_filtered_by_category(self):
+        response = self.client.get(reverse('inventory:inventory_list'))
+        self.assertEqual(len(response.context['menu_items']), 60)
+        response = self.client.get(reverse('inventory:inventory_list'), {'category': self.mains.pk, 'page': 2})
+        self.assertEqual([item.name for item in response.context['menu_items']], [f'Dish {n}' for n in range(60, 70)])
+        self.assertContains(response, f'category={self.mains.pk}&page=1')
+
+
+class LowStockIndexTests(TestCase):
+    def test_low_stock_filter_uses_state_index(self):
+        index = next(index for index in MenuItem._meta.indexes if index.name == 'menuitem_low_stock_idx')
+        self.assertEqual((index.fields, index.condition), (['stock_state', 'name'], None))
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN output checked on SQLite only')
+        low_stock = MenuItem.objects.filter(stock_state__in=LOW_STOCK_STATES).order_by('name')
+        self.assertIn('menuitem_low_stock_idx (stock_state=?)', low_stock.explain())
+        out_of_stock = MenuItem.objects.filter(stock_state='out').order_by('name')
+        plan = out_of_stock.explain()
+        # Equality on the leading column also reads the rows in name order
+        self.assertIn('menuitem_low_stock_idx (stock_state=?)', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+class MenuCatalogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('stock', password='secret')
+        cls.soups = Category.objects.create(name='Soups')
+        cls.soup = MenuItem.objects.create(
+            name='Soup', category=cls.soups, price=Decimal('5.00'), stock_quantity=12, low_stock_threshold=5,
+        )
+        cls.stew = MenuItem.objects.create(
+            name='Stew', category=cls.soups, price=Decimal('9.50'), stock_quantity=30, description='Slow cooked',
+        )
+
+    def import_csv(self, text, **kwargs):
+        return import_menu(read_csv(io.StringIO(text)), **kwargs)
+
+    def test_export_round_trips_unchanged(self):
+        for fmt, read in (('csv', read_csv), ('json', read_json)):
+            exported = ''.join(export_lines(fmt))
+            self.assertEqual(
+                import_menu(read(io.StringIO(exported))),
+                {'created': 0, 'updated': 0, 'unchanged': 2, 'categories_created': 0},
+            )
+        self.assertEqual(
+            json.loads(''.join(export_lines('json')))[1],
+            {'name': 'Stew', 'category': 'Soups', 'description': 'Slow cooked', 'price': '9.50',
+             'stock_quantity': 30, 'low_stock_threshold': 10, 'is_available': True},
+        )
+
+    def test_import_upserts_by_name_and_category(self):
+        result = self.import_csv(
+            'name,category,price,stock_quantity\n'
+            'Soup,Soups,5.50,\n'
+            'Stew,Soups,9.50,30\n'
+            'Lemonade,Drinks,3,40\n'
+            'Soup,Drinks,2,5\n'
+        )
+        self.assertEqual(result, {'created': 2, 'updated': 1, 'unchanged': 1, 'categories_created': 1})
+        self.soup.refresh_from_db()
+        # Blank cells leave the stored value alone
+        self.assertEqual((self.soup.price, self.soup.stock_quantity), (Decimal('5.50'), 12))
+        self.assertEqual(
+            list(MenuItem.objects.filter(category__name='Drinks').order_by('name').values_list('name', 'price', 'stock_state')),
+            [('Lemonade', Decimal('3.00'), 'in_stock'), ('Soup', Decimal('2.00'), 'low')],
+        )
+
+    def test_each_chunk_is_a_handful_of_queries(self):
+        rows = [{'name': f'Dish {n}', 'category': 'Mains', 'price': '4.00'} for n in range(40)]
+        rows += [{'name': 'Soup', 'category': 'Soups', 'stock_quantity': 0}]
+        # Savepoint, then per chunk: categories, category insert, items, item insert;
+        # the second chunk also updates Soup and re-checks its stock (servings, level, alert)
+        with self.assertNumQueries(14):
+            result = import_menu(rows, chunk_size=25)
+        self.assertEqual(result['created'], 40)
+        self.soup.refresh_from_db()
+        self.assertEqual((self.soup.stock_state, self.soup.is_available), ('out', False))
+        self.assertEqual(list(StockAlert.objects.values_list('kind', flat=True)), ['out'])
+
+    def test_invalid_rows_write_nothing(self):
+        with self.assertRaises(MenuImportError) as raised:
+            self.import_csv(
+                'name,category,price,stock_quantity\n'
+                'Soup,Soups,4.00,\n'
+                ',Soups,1,1\n'
+                'Salad,Salads,-1,many\n'
+            )
+        self.assertEqual(raised.exception.errors, [
+            (2, 'name is required'),
+            (3, 'price: Ensure this value is greater than or equal to 0.; stock_quantity: “many” value must be an integer.'),
+        ])
+        self.soup.refresh_from_db()
+        self.assertEqual(self.soup.price, Decimal('5.00'))
+        self.assertFalse(Category.objects.filter(name='Salads').exists())
+
+    def test_dry_run_reports_without_saving(self):
+        result = self.import_csv('name,category,price\nSoup,Soups,6\nBread,Sides,2\n', dry_run=True)
+        self.assertEqual(result, {'created': 1, 'updated': 1, 'unchanged': 0, 'categories_created': 1})
+        self.assertFalse(MenuItem.objects.filter(name='Bread').exists())
+        self.assertEqual(MenuItem.objects.get(pk=self.soup.pk).price, Decimal('5.00'))
+
+    def test_json_is_read_incrementally(self):
+        text = json.dumps([{'name': f'Dish {n}', 'category': 'Mains', 'price': 1.25} for n in range(20)])
+        rows = list(read_json(io.StringIO(text), read_size=7))
+        self.assertEqual(len(rows), 20)
+        self.assertEqual(rows[3]['price'], Decimal('1.25'))
+        for bad in ('{"name": "Soup"}', '[{"name": "Soup"}', '[{"name": }]'):
+            with self.assertRaises(MenuImportError):
+                list(read_json(io.StringIO(bad), read_size=4))
+
+    def test_import_reprices_carts_and_bumps_menu_version(self):
+        cart = Cart.objects.create(session_key='guest', item_count=2, subtotal=Decimal('10.00'))
+        CartItem.objects.create(cart=cart, menu_item=self.soup, quantity=2)
+        version = get_menu_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            import_menu([{'name': 'Soup', 'category': 'Soups', 'price': '6.00'}])
+        cart.refresh_from_db()
+        self.assertEqual(cart.subtotal, Decimal('12.00'))
+        self.assertGreater(get_menu_version(), version)
+
+    def test_views(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('inventory:export_menu'), {'format': 'csv'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            b''.join(response.streaming_content).decode().splitlines()[:2],
+            ['name,category,description,price,stock_quantity,low_stock_threshold,is_available',
+             'Soup,Soups,,5.00,12,5,True'],
+        )
+
+        upload = SimpleUploadedFile('menu.csv', b'\xef\xbb\xbfname,category,price\nSoup,Soups,7\n')
+        response = self.client.post(reverse('inventory:import_menu'), {'file': upload})
+        self.assertEqual(response.json()['result']['updated'], 1)
+        upload = SimpleUploadedFile('menu.json', b'[{"name": "Soup", "category": "Soups", "price": "x"}]')
+        response = self.client.post(reverse('inventory:import_menu'), {'file': upload})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'][0]['row'], 1)
+
+    def test_commands(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'menu.json'
+            call_command('export_menu', format='json', output=str(path), stderr=io.StringIO())
+            data = json.loads(path.read_text())
+            data[0]['price'] = '5.25'
+            path.write_text(json.dumps(data))
+            out = io.StringIO()
+            call_command('import_menu', str(path), stdout=out)
+            self.assertIn('0 created, 1 updated, 1 unchanged', out.getvalue())
+            path.write_text('[{"name": "Soup"}]')
+            with self.assertRaisesMessage(CommandError, 'row 1: category is required'):
+                call_command('import_menu', str(path))
+        self.soup.refresh_from_db()
+        self.assertEqual(self.soup.price, Decimal('5.25'))
 
-# Create your tests here.
@@ -9,5 +9,7 @@ urlpatterns = [
     path('menu-items/add/', views.AddMenuItemView.as_view(), name='add_menu_item'),
     path('menu-items/<int:pk>/edit/', views.EditMenuItemView.as_view(), name='edit_menu_item'),
     path('menu-items/<int:pk>/delete/', views.DeleteMenuItemView.as_view(), name='delete_menu_item'),
+    path('menu-items/export/', views.export_menu, name='export_menu'),
+    path('menu-items/import/', views.import_menu, name='import_menu'),
     path('categories/create/', views.create_category, name='create_category'),
 ]
\ No newline at end of file
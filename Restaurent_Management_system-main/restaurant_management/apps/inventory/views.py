@@ -1,33 +1,51 @@
 # apps/inventory/views.py
+from datetime import timedelta
+
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
-from django.db.models import Count, Sum, Q, F
+from django.db.models import Count
 from django.contrib import messages
 from django.utils import timezone
 from .models import MenuItem, Category
-from apps.orders.models import Order, OrderItem
+from .alerts import LOW_STOCK_STATES
+from . import catalog
+from .stock import stock_summary
+from apps.dashboard.services import most_ordered_items
+from customer.menu_cache import get_category_counts
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .serializers import MenuItemSerializer, CategorySerializer
-from django.http import JsonResponse
+from .serializers import MENU_ITEM_VALUES, MenuItemSerializer, CategorySerializer, menu_item_rows
+from core.api import CatalogPagination, FieldSelectionMixin, ValuesListMixin
+from core.streaming import download_response
+from django.http import HttpResponseBadRequest, JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_protect
+import io
 import json
 
 # API Views
-class MenuItemViewSet(viewsets.ModelViewSet):
-    queryset = MenuItem.objects.all()
+class MenuItemViewSet(ValuesListMixin, viewsets.ModelViewSet):
+    queryset = MenuItem.objects.order_by('name', 'pk')
     serializer_class = MenuItemSerializer
+    pagination_class = CatalogPagination
+    list_values = MENU_ITEM_VALUES
+
+    def list_rows(self, rows):
+        return menu_item_rows(rows, self.request)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.wants('category_name'):
+            queryset = queryset.select_related('category')
+        return queryset
 
     @action(detail=False, methods=['get'])
     def low_stock(self, request):
-        low_stock_items = self.get_queryset().filter(
-            stock_quantity__lte=F('low_stock_threshold')
-        )
+        low_stock_items = self.get_queryset().filter(stock_state__in=LOW_STOCK_STATES)
         serializer = self.get_serializer(low_stock_items, many=True)
         return Response(serializer.data)
 
@@ -38,6 +56,8 @@ class MenuItemViewSet(viewsets.ModelViewSet):
         if stock_quantity is not None:
             menu_item.stock_quantity = stock_quantity
             menu_item.save()
+            # Crossing a threshold may have switched the item off the menu
+            menu_item.refresh_from_db(fields=['stock_quantity', 'is_available', 'stock_state'])
             return Response(self.get_serializer(menu_item).data)
         return Response(
             {'error': 'Stock quantity is required'},
@@ -45,9 +65,16 @@ class MenuItemViewSet(viewsets.ModelViewSet):
         )
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
-    queryset = Category.objects.all()
+class CategoryViewSet(FieldSelectionMixin, viewsets.ModelViewSet):
+    queryset = Category.objects.order_by('display_order', 'name', 'pk')
     serializer_class = CategorySerializer
+    pagination_class = CatalogPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.wants('menu_items_count'):
+            queryset = queryset.annotate(menu_items_total=Count('menu_items'))
+        return queryset
 
 
 # Template Views
@@ -55,50 +82,30 @@ class InventoryListView(LoginRequiredMixin, ListView):
     model = MenuItem
     template_name = 'inventory/inventory_list.html'
     context_object_name = 'menu_items'
+    paginate_by = 60
 
     def get_queryset(self):
-        return MenuItem.objects.select_related('category').all()
+        # Only the columns the cards show
+        queryset = MenuItem.objects.select_related('category').only(
+            'name', 'price', 'stock_quantity', 'low_stock_threshold', 'category__name',
+        ).order_by('name', 'pk')
+        category = self.request.GET.get('category', '')
+        if category.isdigit():
+            queryset = queryset.filter(category_id=category)
+        return queryset
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        
-        # Get total items and their value
-        total_items = MenuItem.objects.count()
-        total_stock = MenuItem.objects.aggregate(
-            total_stock=Sum('stock_quantity'),
-            total_value=Sum(F('stock_quantity') * F('price'))
-        )
-        
-        # Get low stock items
-        low_stock_items = MenuItem.objects.filter(
-            stock_quantity__lte=F('low_stock_threshold')
-        ).count()
-        
-        # Get most ordered items in the last 30 days
-        thirty_days_ago = timezone.now() - timezone.timedelta(days=30)
-        most_ordered = OrderItem.objects.filter(
-            order__created_at__gte=thirty_days_ago,
-            order__status='completed'
-        ).values('menu_item__name').annotate(
-            total_orders=Count('id')
-        ).order_by('-total_orders')[:5]
-
-        # Get available and unavailable items count
-        available_items = MenuItem.objects.filter(stock_quantity__gt=0).count()
-        unavailable_items = MenuItem.objects.filter(stock_quantity=0).count()
-
-        # Add statistics to context
+        filters = self.request.GET.copy()
+        filters.pop('page', None)
+        context.update(stock_summary())
         context.update({
-            'total_items': total_items,
-            'total_stock': total_stock['total_stock'] or 0,
-            'total_stock_value': total_stock['total_value'] or 0,
-            'low_stock_count': low_stock_items,
-            'most_ordered_items': most_ordered,
-            'available_items': available_items,
-            'unavailable_items': unavailable_items,
-            'categories': Category.objects.annotate(item_count=Count('menu_items')),
+            # Completed staff orders over the last 30 days, summed from the daily item rollup
+            'most_ordered_items': most_ordered_items(since=timezone.localdate() - timedelta(days=29)),
+            'categories': get_category_counts(),
+            'current_category': self.request.GET.get('category', ''),
+            'filter_query': filters.urlencode(),
         })
-        
         return context
 
 class AddMenuItemView(LoginRequiredMixin, CreateView):
@@ -162,4 +169,46 @@ def create_category(request):
             }
         })
     except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)}, status=500)
\ No newline at end of file
+        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+
+
+@login_required
+def export_menu(request):
+    """The menu as a CSV or JSON download (``?format=``), streamed row by row."""
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in catalog.FORMATS:
+        return HttpResponseBadRequest('format must be csv or json')
+    queryset = MenuItem.objects.all()
+    category = request.GET.get('category', '')
+    if category.isdigit():
+        queryset = queryset.filter(category_id=category)
+    return download_response(
+        request, catalog.export_lines(fmt, queryset),
+        'text/csv' if fmt == 'csv' else 'application/json', f'menu.{fmt}',
+    )
+
+
+@csrf_protect
+@require_http_methods(["POST"])
+@login_required
+def import_menu(request):
+    """Upsert menu items from an uploaded CSV or JSON ``file``; ``dry_run=1`` only validates."""
+    upload = request.FILES.get('file')
+    if upload is None:
+        return JsonResponse({'success': False, 'error': 'A CSV or JSON file is required'}, status=400)
+    fmt = request.POST.get('format') or upload.name.rpartition('.')[2].lower()
+    if fmt not in catalog.FORMATS:
+        return JsonResponse({'success': False, 'error': 'format must be csv or json'}, status=400)
+    stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+    try:
+        result = catalog.import_menu(
+            catalog.read_rows(stream, fmt), dry_run=request.POST.get('dry_run') in ('1', 'true'),
+        )
+    except catalog.MenuImportError as e:
+        return JsonResponse({
+            'success': False,
+            'errors': [{'row': row, 'error': message} for row, message in e.errors],
+        }, status=400)
+    except UnicodeDecodeError:
+        return JsonResponse({'success': False, 'error': 'The file must be UTF-8 encoded'}, status=400)
+    return JsonResponse({'success': True, 'result': result})
@@ -2,4 +2,8 @@ from django.apps import AppConfig
 
 class OrdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.orders'
\ No newline at end of file
+    name = 'apps.orders'
+
+    def ready(self):
+        from . import signals
+        signals.connect()
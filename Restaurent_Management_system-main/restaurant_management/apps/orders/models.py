@@ -28,6 +28,14 @@ class Order(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Status counts and today's totals: status = x AND created_at in [day, day + 1)
+            models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+            # Newest-first lists and cursor pages
+            models.Index(fields=['-created_at', '-id'], name='order_created_idx'),
+            # Kitchen change-since polling
+            models.Index(fields=['updated_at'], name='order_updated_idx'),
+        ]
 
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, related_name='items', on_delete=models.CASCADE)
@@ -36,4 +44,17 @@ class OrderItem(models.Model):
     price_at_time = models.DecimalField(max_digits=10, decimal_places=2)
     
     def __str__(self):
-        return f"{self.quantity}x {self.menu_item.name} in Order #{self.order.order_number}"
\ No newline at end of file
+        return f"{self.quantity}x {self.menu_item.name} in Order #{self.order.order_number}"
+
+
+class OrderNumberSequence(models.Model):
+    """Counter behind the order numbers of both staff and customer orders.
+
+    ``apps.orders.numbering`` reserves values from it in blocks and encodes
+    them into short codes, so allocating a number never probes the order tables.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    next_value = models.PositiveBigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.name} (next {self.next_value})"
@@ -0,0 +1,107 @@
+# apps/orders/numbering.py
+"""Order number allocation shared by staff orders and customer checkouts.
+
+Numbers come from a database counter (OrderNumberSequence). Each value is
+pushed through a fixed bijection on 35 bits and written as 7 Crockford
+base32 characters, so distinct counter values always give distinct codes
+and consecutive orders don't get guessable, consecutive codes. Legacy
+numbers are 6 characters long and can never clash with these.
+
+To keep the counter row cool, each process reserves a block of values at
+once. The spare values only become usable after the reserving transaction
+commits; if it rolls back, the counter rolls back with it and nothing has
+been handed out twice.
+"""
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import OrderNumberSequence
+
+ORDER_SEQUENCE = 'order'
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'  # Crockford base32, no I/L/O/U
+CODE_LENGTH = 7
+_BITS = CODE_LENGTH * 5
+_MASK = (1 << _BITS) - 1
+_MULTIPLIERS = (0x5DEECE66D, 0x3C6EF372F)
+
+_lock = threading.Lock()
+_pool = {}  # sequence name -> list of committed, unused values
+
+
+def _scramble(value):
+    # Odd multipliers and xor-shifts are both invertible mod 2**_BITS
+    for multiplier in _MULTIPLIERS:
+        value = (value * multiplier) & _MASK
+        value ^= value >> 17
+    return value
+
+
+def encode_order_number(value):
+    if not 0 <= value <= _MASK:
+        raise ValueError('Order number sequence exhausted.')
+    value = _scramble(value)
+    chars = []
+    for _ in range(CODE_LENGTH):
+        value, digit = divmod(value, 32)
+        chars.append(ALPHABET[digit])
+    return ''.join(reversed(chars))
+
+
+def normalize_order_number(code):
+    """Upper-case a typed order number and fix the look-alikes base32 leaves out.
+
+    Only 7-character codes are base32; legacy 6-character numbers may really
+    contain O, I and L, so they are only upper-cased.
+    """
+    code = code.strip().upper()
+    if len(code) != CODE_LENGTH:
+        return code
+    return code.translate(str.maketrans('OIL', '011'))
+
+
+def _reserve_block(name, size):
+    """Advance the counter by ``size``; returns the first value of the block."""
+    with transaction.atomic():
+        updated = OrderNumberSequence.objects.filter(name=name).update(
+            next_value=F('next_value') + size
+        )
+        if not updated:
+            try:
+                with transaction.atomic():
+                    OrderNumberSequence.objects.create(name=name, next_value=1 + size)
+                return 1
+            except IntegrityError:
+                # Another process created the row first
+                return _reserve_block(name, size)
+        return OrderNumberSequence.objects.values_list('next_value', flat=True).get(name=name) - size
+
+
+def _release_to_pool(name, values):
+    with _lock:
+        _pool.setdefault(name, []).extend(values)
+
+
+def allocate_order_number(name=ORDER_SEQUENCE):
+    """Return a new order number, unique across every order table."""
+    with _lock:
+        pool = _pool.get(name)
+        if pool:
+            return encode_order_number(pool.pop(0))
+
+    size = max(1, getattr(settings, 'ORDER_NUMBER_BLOCK_SIZE', 20))
+    start = _reserve_block(name, size)
+    spare = list(range(start + 1, start + size))
+    if spare:
+        transaction.on_commit(lambda: _release_to_pool(name, spare))
+    return encode_order_number(start)
+
+
+def allocate_order_numbers(count, name=ORDER_SEQUENCE):
+    """Reserve ``count`` order numbers with one counter update, for bulk imports."""
+    if count <= 0:
+        return []
+    start = _reserve_block(name, count)
+    return [encode_order_number(value) for value in range(start, start + count)]
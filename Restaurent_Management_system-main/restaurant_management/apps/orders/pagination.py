@@ -0,0 +1,174 @@
+# apps/orders/pagination.py
+"""Keyset (cursor) pagination for the order lists and the order API.
+
+Pages are cut on ``(created_at, id)`` instead of an OFFSET, so every page is
+one index range scan of ``per_page + 1`` rows, and no COUNT(*) runs. Lists show
+an estimated total from the planner statistics instead. Cursors are opaque
+``?after=`` / ``?before=`` tokens naming the last / first row of a page.
+"""
+import base64
+import binascii
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.db import DatabaseError, connections
+from django.db.models import Q
+from rest_framework.pagination import CursorPagination
+
+
+def encode_cursor(obj):
+    raw = f'{obj.created_at.isoformat()}|{obj.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return ``(created_at, pk)`` for a cursor token, or None if it is missing or bad."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        stamp, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(stamp), int(pk)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        return None
+
+
+@dataclass
+class KeysetPage:
+    object_list: list
+    has_next: bool
+    has_previous: bool
+    next_cursor: str = None
+    previous_cursor: str = None
+    estimated_count: int = None
+    # Query strings for the Older / Newer links, other parameters kept
+    next_query: str = ''
+    previous_query: str = ''
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+def keyset_paginate(queryset, per_page, after=None, before=None):
+    """Return the ``per_page`` rows newest-first after / before a decoded cursor."""
+    if before:
+        created_at, pk = before
+        rows = list(
+            queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk))
+            .order_by('created_at', 'pk')[:per_page + 1]
+        )
+        has_previous = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        has_next = True
+    else:
+        queryset = queryset.order_by('-created_at', '-pk')
+        if after:
+            created_at, pk = after
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+        rows = list(queryset[:per_page + 1])
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_previous = after is not None
+
+    return KeysetPage(
+        object_list=rows,
+        has_next=has_next and bool(rows),
+        has_previous=has_previous and bool(rows),
+        next_cursor=encode_cursor(rows[-1]) if has_next and rows else None,
+        previous_cursor=encode_cursor(rows[0]) if has_previous and rows else None,
+    )
+
+
+def estimate_row_count(model, using='default'):
+    """Planner's row estimate for a whole table, or None when there isn't one.
+
+    SQLite only has numbers once ``ANALYZE`` has been run.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+            elif connection.vendor == 'sqlite':
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+                if cursor.fetchone() is None:
+                    return None
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+            else:
+                return None
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None or row[0] is None:
+        return None
+    estimate = int(str(row[0]).split()[0])
+    return estimate if estimate >= 0 else None
+
+
+class KeysetPaginationMixin:
+    """ListView pagination with ``?after=`` / ``?before=`` cursors instead of ``?page=``.
+
+    ``page_obj`` is a KeysetPage; templates link to ``?{{ page_obj.next_query }}``.
+    """
+    cursor_params = ('after', 'before')
+    estimate_count = True
+
+    def has_filters(self):
+        return any(value for key, value in self.request.GET.items() if key not in self.cursor_params)
+
+    def cursor_query(self, param, cursor):
+        params = self.request.GET.copy()
+        for key in self.cursor_params:
+            params.pop(key, None)
+        params[param] = cursor
+        return params.urlencode()
+
+    def paginate_queryset(self, queryset, page_size):
+        page = keyset_paginate(
+            queryset,
+            page_size,
+            after=decode_cursor(self.request.GET.get('after')),
+            before=decode_cursor(self.request.GET.get('before')),
+        )
+        if self.estimate_count and not self.has_filters():
+            page.estimated_count = estimate_row_count(queryset.model, queryset.db)
+        if page.next_cursor:
+            page.next_query = self.cursor_query('after', page.next_cursor)
+        if page.previous_cursor:
+            page.previous_query = self.cursor_query('before', page.previous_cursor)
+        return None, page, page.object_list, page.has_other_pages
+
+
+class EstimatedCursorPagination(CursorPagination):
+    """API cursor pagination; ``?count=estimate`` adds a planner row estimate."""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.model = queryset.model
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.request.query_params.get('count') == 'estimate':
+            response.data['estimated_count'] = estimate_row_count(self.model)
+        return response
+
+
+class OrderCursorPagination(EstimatedCursorPagination):
+    """Orders newest first, cut on (-created_at, -id)."""
+
+
+class OrderItemCursorPagination(EstimatedCursorPagination):
+    """Order lines have no timestamp of their own; newest id first."""
+    ordering = ('-id',)
@@ -1,5 +1,10 @@
 # apps/orders/serializers.py
+from collections import defaultdict
+
 from rest_framework import serializers
+
+from core.api import api_datetime, api_decimal
+from apps.tables.models import Table
 from .models import Order, OrderItem
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -9,6 +14,20 @@ class OrderItemSerializer(serializers.ModelSerializer):
         model = OrderItem
         fields = ['id', 'order', 'menu_item', 'menu_item_name', 
                  'quantity', 'price_at_time']
+        # Lines are only written through apps.orders.services, priced from the menu
+        read_only_fields = ['order', 'price_at_time']
+
+
+class OrderLineInputSerializer(serializers.Serializer):
+    """One ``{menu_item, quantity}`` line for create or add_item."""
+    menu_item = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class OrderCreateSerializer(serializers.Serializer):
+    table = serializers.PrimaryKeyRelatedField(queryset=Table.objects.all())
+    notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    items = OrderLineInputSerializer(many=True, allow_empty=False)
 
 class OrderSerializer(serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
@@ -20,4 +39,59 @@ class OrderSerializer(serializers.ModelSerializer):
         fields = ['id', 'order_number', 'table', 'table_number', 
                  'status', 'status_display', 'total_amount', 'notes', 
                  'created_at', 'updated_at', 'items']
-        read_only_fields = ['order_number', 'created_at', 'updated_at']
\ No newline at end of file
+        # The total is always the sum of the lines, and the table is fixed at creation
+        read_only_fields = ['order_number', 'table', 'total_amount', 'created_at', 'updated_at']
+
+
+# Read-only fast path for OrderSerializer lists (see core.api.ValuesListMixin)
+ORDER_VALUES = (
+    'id', 'order_number', 'table', 'table__number', 'status', 'total_amount',
+    'notes', 'created_at', 'updated_at',
+)
+ORDER_ITEM_VALUES = ('id', 'order', 'menu_item', 'menu_item__name', 'quantity', 'price_at_time')
+
+
+def order_item_rows(rows):
+    """OrderItemSerializer output for ``.values(*ORDER_ITEM_VALUES)`` rows."""
+    return [
+        {
+            'id': row['id'],
+            'order': row['order'],
+            'menu_item': row['menu_item'],
+            'menu_item_name': row['menu_item__name'],
+            'quantity': row['quantity'],
+            'price_at_time': api_decimal(row['price_at_time']),
+        }
+        for row in rows
+    ]
+
+
+def order_rows(rows, with_items=True):
+    """OrderSerializer output for ``.values(*ORDER_VALUES)`` rows.
+
+    All the page's lines are read with one more ``.values()`` query.
+    """
+    items = defaultdict(list)
+    if with_items and rows:
+        lines = OrderItem.objects.filter(
+            order__in=[row['id'] for row in rows]
+        ).order_by('pk').values(*ORDER_ITEM_VALUES)
+        for line in order_item_rows(lines):
+            items[line['order']].append(line)
+    status_labels = dict(Order.ORDER_STATUS)
+    return [
+        {
+            'id': row['id'],
+            'order_number': row['order_number'],
+            'table': row['table'],
+            'table_number': row['table__number'],
+            'status': row['status'],
+            'status_display': status_labels.get(row['status'], row['status']),
+            'total_amount': api_decimal(row['total_amount']),
+            'notes': row['notes'],
+            'created_at': api_datetime(row['created_at']),
+            'updated_at': api_datetime(row['updated_at']),
+            'items': items[row['id']],
+        }
+        for row in rows
+    ]
@@ -0,0 +1,93 @@
+# apps/orders/services.py
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from apps.dashboard.rollups import record_order_lines
+from apps.inventory.models import MenuItem
+from apps.inventory.stock import decrement_stock, merge_quantities
+from .models import Order, OrderItem
+from .numbering import allocate_order_number
+
+
+def parse_order_lines(menu_item_ids, quantities):
+    """Turn the parallel menu_items[] / quantities[] form lists into (id, qty) pairs."""
+    lines = []
+    for item_id, quantity in zip(menu_item_ids, quantities):
+        try:
+            item_id, quantity = int(item_id), int(quantity)
+        except (TypeError, ValueError):
+            raise ValidationError('Invalid menu item or quantity.')
+        if quantity < 1:
+            raise ValidationError('Quantities must be at least 1.')
+        lines.append((item_id, quantity))
+    return lines
+
+
+def _take_lines(lines):
+    """Price ``(menu_item_id, quantity)`` lines and take their stock.
+
+    Returns unsaved OrderItems and their total. Call inside a transaction.
+    """
+    menu_items = MenuItem.objects.in_bulk({item_id for item_id, _ in lines})
+    missing = {item_id for item_id, _ in lines if item_id not in menu_items}
+    if missing:
+        raise ValidationError(
+            'Unknown menu item(s): %s' % ', '.join(str(item_id) for item_id in sorted(missing))
+        )
+
+    decrement_stock(merge_quantities(lines))
+
+    order_items = []
+    total_amount = 0
+    for item_id, quantity in lines:
+        price = menu_items[item_id].price
+        order_items.append(OrderItem(menu_item_id=item_id, quantity=quantity, price_at_time=price))
+        total_amount += price * quantity
+    return order_items, total_amount
+
+
+@transaction.atomic
+def create_order(table, lines, notes=None, status='in_progress'):
+    """Create an order and all of its lines in a fixed number of queries.
+
+    ``lines`` is a list of ``(menu_item_id, quantity)`` pairs. Menu items are
+    fetched with one ``in_bulk``, stock for every line is taken in one
+    conditional UPDATE, the lines are inserted with one ``bulk_create`` and
+    the order row is written once with its final total.
+    """
+    order_items, total_amount = _take_lines(lines)
+    order = Order.objects.create(
+        order_number=allocate_order_number(),
+        table=table,
+        status=status,
+        total_amount=total_amount,
+        notes=notes,
+    )
+    for order_item in order_items:
+        order_item.order = order
+    OrderItem.objects.bulk_create(order_items)
+
+    # bulk_create skips the OrderItem signals that keep the sales rollups current
+    record_order_lines('order', order, order_items)
+    return order
+
+
+@transaction.atomic
+def add_order_lines(order, lines):
+    """Add ``(menu_item_id, quantity)`` lines to an existing order.
+
+    Stock is taken the same way as in ``create_order``. The order row is
+    locked while its total grows by the new lines at current prices, so
+    concurrent additions cannot lose an update. Returns the new OrderItems.
+    """
+    order = Order.objects.select_for_update().get(pk=order.pk)
+    order_items, added = _take_lines(lines)
+    for order_item in order_items:
+        order_item.order = order
+    OrderItem.objects.bulk_create(order_items)
+    order.total_amount += added
+    order.save(update_fields=['total_amount', 'updated_at'])
+
+    record_order_lines('order', order, order_items)
+    return order_items
+
@@ -0,0 +1,16 @@
+# apps/orders/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .models import Order, OrderItem
+
+
+def order_item_changed(sender, instance, **kwargs):
+    # Line edits move the parent's updated_at so kitchen screens polling with
+    # ?since= pick them up
+    Order.objects.filter(pk=instance.order_id).update(updated_at=timezone.now())
+
+
+def connect():
+    post_save.connect(order_item_changed, sender=OrderItem, dispatch_uid='kitchen_order_item_saved')
+    post_delete.connect(order_item_changed, sender=OrderItem, dispatch_uid='kitchen_order_item_deleted')
@@ -1,3 +1,425 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.dashboard.models import DailyItemSalesRollup, DailySalesRollup
+from apps.inventory.models import Category, MenuItem
+from apps.inventory.stock import InsufficientStock
+from apps.tables.models import Table
+from . import numbering
+from customer.models import CustomerOrder, CustomerOrderItem
+from .models import Order, OrderItem, OrderNumberSequence
+from core.dates import local_day_range
+from .numbering import allocate_order_number, encode_order_number, normalize_order_number
+from .services import create_order
+from .views import OrderViewSet
+
+
+class CreateOrderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('waiter', password='secret')
+        cls.table = Table.objects.create(number=1, capacity=8)
+        category = Category.objects.create(name='Mains')
+        cls.menu = [
+            MenuItem.objects.create(
+                name=f'Dish {n}', category=category, price=Decimal('3.50') + n,
+                stock_quantity=1000,
+            )
+            for n in range(30)
+        ]
+
+    def queries_for(self, line_count):
+        lines = [(item.id, 2) for item in self.menu[:line_count]]
+        with CaptureQueriesContext(connection) as ctx:
+            create_order(table=self.table, lines=lines)
+        return len(ctx.captured_queries)
+
+    def test_query_count_is_constant_in_line_count(self):
+        # Warm the rollup rows so both runs take the same update paths
+        self.queries_for(30)
+        single = self.queries_for(1)
+        party = self.queries_for(30)
+        self.assertEqual(single, party)
+
+    def test_total_and_lines(self):
+        order = create_order(
+            table=self.table,
+            lines=[(self.menu[0].id, 2), (self.menu[1].id, 1)],
+            notes='No onions',
+        )
+        order.refresh_from_db()
+        self.assertEqual(order.total_amount, Decimal('11.50'))
+        self.assertEqual(order.items.count(), 2)
+        self.assertEqual(order.notes, 'No onions')
+
+        rollup = DailySalesRollup.objects.get(source='order', status='in_progress')
+        self.assertEqual((rollup.order_count, rollup.items_sold), (1, 3))
+        self.assertEqual(rollup.revenue, Decimal('11.50'))
+        self.assertEqual(DailyItemSalesRollup.objects.get(menu_item=self.menu[0]).quantity, 2)
+
+    def test_unknown_item_writes_nothing(self):
+        with self.assertRaises(ValidationError):
+            create_order(table=self.table, lines=[(self.menu[0].id, 1), (999999, 1)])
+        self.assertFalse(Order.objects.exists())
+
+    def test_create_view(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('orders:order-create'), {
+            'table': self.table.id,
+            'notes': '',
+            'menu_items[]': [self.menu[0].id, self.menu[2].id],
+            'quantities[]': ['1', '3'],
+        })
+        self.assertRedirects(response, reverse('orders:order-list'))
+        order = Order.objects.get()
+        self.assertEqual(order.total_amount, Decimal('20.00'))
+
+        response = self.client.post(reverse('orders:order-create'), {
+            'table': self.table.id,
+            'menu_items[]': [self.menu[0].id],
+            'quantities[]': ['0'],
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_stock_is_taken_for_all_lines_or_none(self):
+        create_order(table=self.table, lines=[(self.menu[0].id, 2), (self.menu[0].id, 3)])
+        self.menu[0].refresh_from_db()
+        self.assertEqual(self.menu[0].stock_quantity, 995)
+
+        MenuItem.objects.filter(pk=self.menu[1].pk).update(stock_quantity=1)
+        with self.assertRaises(InsufficientStock):
+            create_order(table=self.table, lines=[(self.menu[0].id, 1), (self.menu[1].id, 2)])
+        self.menu[0].refresh_from_db()
+        self.assertEqual(self.menu[0].stock_quantity, 995)
+        self.assertEqual(Order.objects.count(), 1)
+
+
+@override_settings(ORDER_NUMBER_BLOCK_SIZE=5)
+class OrderNumberTests(TestCase):
+    def tearDown(self):
+        numbering._pool.clear()
+
+    def test_codes_are_distinct_short_and_unambiguous(self):
+        codes = {encode_order_number(value) for value in range(1, 20001)}
+        self.assertEqual(len(codes), 20000)
+        for code in codes:
+            self.assertEqual(len(code), 7)
+            self.assertFalse(set(code) & set('ILOU'))
+        self.assertEqual(normalize_order_number(' ab0l1oz\n'), 'AB0110Z')
+        # Legacy 6-character numbers used the full alphabet
+        self.assertEqual(normalize_order_number(' hotel1 '), 'HOTEL1')
+
+    def test_blocks_are_reserved_once_and_only_shared_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as ctx:
+                first = allocate_order_number()
+        counter_queries = [q for q in ctx.captured_queries if 'ordernumbersequence' in q['sql']]
+        self.assertEqual(len(counter_queries), 2)
+        with self.assertNumQueries(0):
+            rest = [allocate_order_number() for _ in range(4)]
+        self.assertEqual(OrderNumberSequence.objects.get().next_value, 6)
+        self.assertEqual(len({first, *rest}), 5)
+
+        # A rolled-back reservation never reaches the shared pool
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            allocate_order_number()
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(numbering._pool['order'], [])
+
+    def test_staff_and_customer_orders_share_the_sequence(self):
+        table = Table.objects.create(number=9, capacity=2)
+        item = MenuItem.objects.create(
+            name='Soup', category=Category.objects.create(name='Soups'),
+            price=Decimal('4.00'), stock_quantity=10,
+        )
+        order = create_order(table=table, lines=[(item.id, 1)])
+        self.assertEqual(len(order.order_number), 7)
+        self.assertNotEqual(allocate_order_number(), order.order_number)
+        self.assertEqual(OrderNumberSequence.objects.get().next_value, 11)
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('manager', password='secret')
+        table = Table.objects.create(number=3, capacity=4)
+        cls.orders = Order.objects.bulk_create([
+            Order(order_number=f'K{n:03d}', table=table, total_amount=Decimal('5.00'))
+            for n in range(25)
+        ])
+        # Pairs of orders share a timestamp, so the id tie-breaker matters
+        start = timezone.now()
+        for n, order in enumerate(cls.orders):
+            Order.objects.filter(pk=order.pk).update(created_at=start - timedelta(minutes=n // 2))
+        cls.newest_first = list(Order.objects.order_by('-created_at', '-pk').values_list('pk', flat=True))
+
+    def page(self, **params):
+        return self.client.get(reverse('orders:order-list'), params).context['page_obj']
+
+    def test_walks_every_order_once_in_both_directions(self):
+        self.client.force_login(self.user)
+        seen, pages, page = [], [], self.page()
+        while True:
+            pages.append(page)
+            seen.extend(order.pk for order in page)
+            if not page.has_next:
+                break
+            page = self.page(after=page.next_cursor)
+        self.assertEqual(seen, self.newest_first)
+        self.assertEqual([len(p) for p in pages], [10, 10, 5])
+
+        newer = self.page(before=pages[-1].previous_cursor)
+        self.assertEqual([order.pk for order in newer], [order.pk for order in pages[1]])
+        self.assertTrue(newer.has_previous and newer.has_next)
+
+    def test_deep_pages_cost_the_same_as_the_first(self):
+        self.client.force_login(self.user)
+        third_cursor = self.page(after=self.page().next_cursor).next_cursor
+        with CaptureQueriesContext(connection) as page_one:
+            self.page()
+        with CaptureQueriesContext(connection) as page_three:
+            self.page(after=third_cursor)
+        self.assertEqual(len(page_one.captured_queries), len(page_three.captured_queries))
+        self.assertFalse(any('OFFSET' in q['sql'] for q in page_three.captured_queries))
+
+    def test_bad_cursor_starts_over(self):
+        self.client.force_login(self.user)
+        page = self.page(after='not-a-cursor', status='in_progress')
+        self.assertEqual(page.object_list[0].pk, self.newest_first[0])
+        self.assertIn('status=in_progress', page.next_query)
+        self.assertIsNone(page.estimated_count)
+
+    def test_api_uses_cursor_pagination(self):
+        view = OrderViewSet.as_view({'get': 'list'})
+        request = APIRequestFactory().get('/api/orders/', {'count': 'estimate'})
+        force_authenticate(request, self.user)
+        response = view(request)
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertIn('cursor=', response.data['next'])
+        self.assertIn('estimated_count', response.data)
+
+
+class KitchenDisplayTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('chef', password='secret')
+        cls.table = Table.objects.create(number=4, capacity=4)
+        cls.menu = [
+            MenuItem.objects.create(
+                name=f'Dish {n}', category=Category.objects.create(name=f'Cat {n}'),
+                price=Decimal('6.00'), stock_quantity=500,
+            )
+            for n in range(3)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def place_orders(self, count):
+        for _ in range(count):
+            create_order(table=self.table, lines=[(item.id, 2) for item in self.menu])
+            order = CustomerOrder.objects.create(
+                order_number=allocate_order_number(), customer_name='Ana',
+                customer_email='ana@example.com', customer_phone='1',
+                total_amount=Decimal('6.00'), status='confirmed', order_type='takeaway',
+            )
+            CustomerOrderItem.objects.create(
+                order=order, menu_item=self.menu[0], quantity=1, price_at_time=Decimal('6.00'),
+            )
+
+    def feed(self, headers=None, **params):
+        return self.client.get(reverse('orders:kitchen-tickets'), params, headers=headers)
+
+    def test_board_merges_both_order_sources_in_constant_queries(self):
+        self.place_orders(1)
+        with CaptureQueriesContext(connection) as small:
+            self.feed()
+        self.place_orders(6)
+        with CaptureQueriesContext(connection) as large:
+            data = self.feed().json()
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        self.assertEqual(len(data['tickets']), 14)
+        self.assertEqual({t['source'] for t in data['tickets']}, {'order', 'customer'})
+        self.assertEqual(len(data['tickets'][0]['items']), 3)
+        self.assertEqual(data['tickets'][1]['label'], 'Online · Takeaway')
+
+    def test_since_returns_only_changed_tickets(self):
+        self.place_orders(2)
+        data = self.feed().json()
+        order = Order.objects.order_by('pk').first()
+        Order.objects.filter(pk__in=[t['id'] for t in data['tickets'] if t['source'] == 'order']).update(
+            updated_at=timezone.now() - timedelta(minutes=5)
+        )
+        CustomerOrder.objects.update(updated_at=timezone.now() - timedelta(minutes=5))
+        cursor = (timezone.now() - timedelta(minutes=1)).isoformat()
+
+        order.status = 'completed'
+        order.save()
+        changed = self.feed(since=cursor).json()
+        self.assertFalse(changed['full'])
+        self.assertEqual([(t['id'], t['active']) for t in changed['tickets']], [(order.id, False)])
+        self.assertEqual(self.feed(since='yesterday').status_code, 400)
+        self.assertEqual(self.feed(since='2024-13-45T00:00').status_code, 400)
+
+    def test_unchanged_board_is_not_modified(self):
+        self.place_orders(1)
+        response = self.feed()
+        etag = response['ETag']
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.feed(headers={'If-None-Match': etag}).status_code, 304)
+        self.assertFalse(any('orders_orderitem' in q['sql'] for q in ctx.captured_queries))
+
+        OrderItem.objects.filter(order__isnull=False).first().delete()
+        self.assertEqual(self.feed(headers={'If-None-Match': etag}).status_code, 200)
+
+
+class OrderApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('pos', password='secret')
+        cls.table = Table.objects.create(number=3, capacity=4)
+        category = Category.objects.create(name='Mains')
+        cls.dishes = [
+            MenuItem.objects.create(
+                name=f'Dish {n}', category=category, price=Decimal('5.00'), stock_quantity=1000,
+            )
+            for n in range(3)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def make_orders(self, count):
+        for _ in range(count):
+            create_order(self.table, [(dish.pk, 1) for dish in self.dishes])
+
+    def list_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.json()
+
+    def test_requires_authentication(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('api:order-list')).status_code, 403)
+
+    def test_order_list_query_count_is_flat(self):
+        self.make_orders(2)
+        small, _ = self.list_queries(reverse('api:order-list'))
+        self.make_orders(10)
+        large, data = self.list_queries(reverse('api:order-list'))
+        self.assertEqual(small, large)
+        self.assertEqual(len(data['results']), 12)
+        first = data['results'][0]
+        self.assertEqual(first['table_number'], 3)
+        self.assertEqual(sorted(item['menu_item_name'] for item in first['items']),
+                         ['Dish 0', 'Dish 1', 'Dish 2'])
+
+    def test_fields_trim_payload_and_joins(self):
+        self.make_orders(3)
+        full, _ = self.list_queries(reverse('api:order-list'))
+        trimmed, data = self.list_queries(reverse('api:order-list', query={'fields': 'id,order_number'}))
+        self.assertEqual(trimmed, full - 1)
+        self.assertEqual(set(data['results'][0]), {'id', 'order_number'})
+
+        response = self.client.get(reverse('api:order-list', query={'fields': 'id,nope'}))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('nope', response.json()['fields'])
+
+    def test_list_matches_serializer(self):
+        self.make_orders(3)
+        Order.objects.filter(pk=Order.objects.first().pk).update(notes='Window seat')
+        listed = self.client.get(reverse('api:order-list')).json()['results']
+        detailed = [
+            self.client.get(reverse('api:order-detail', args=[row['id']])).json() for row in listed
+        ]
+        self.assertEqual(listed, detailed)
+
+    def test_api_writes_take_stock_and_derive_the_total(self):
+        dish, other = self.dishes[0], self.dishes[1]
+        response = self.client.post(reverse('api:order-list'), {
+            'table': self.table.pk, 'total_amount': '1.00',
+            'items': [{'menu_item': dish.pk, 'quantity': 2}],
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get(pk=response.json()['id'])
+        self.assertEqual(order.total_amount, Decimal('10.00'))
+        dish.refresh_from_db()
+        self.assertEqual(dish.stock_quantity, 998)
+
+        response = self.client.post(
+            reverse('api:order-add-item', args=[order.pk]), {'menu_item': other.pk, 'quantity': 3, 'price_at_time': '0.01'},
+        )
+        self.assertEqual((response.status_code, response.json()['price_at_time']), (201, '5.00'))
+        order.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((order.total_amount, other.stock_quantity), (Decimal('25.00'), 997))
+        self.assertEqual(
+            DailySalesRollup.objects.filter(source='order').values_list('revenue', flat=True).get(),
+            Decimal('25.00'),
+        )
+
+        response = self.client.patch(
+            reverse('api:order-detail', args=[order.pk]), {'total_amount': '1.00', 'notes': 'Birthday'},
+            content_type='application/json',
+        )
+        self.assertEqual((response.json()['total_amount'], response.json()['notes']), ('25.00', 'Birthday'))
+
+    def test_api_writes_respect_stock(self):
+        response = self.client.post(
+            reverse('api:order-add-item', args=[create_order(self.table, [(self.dishes[0].pk, 1)]).pk]),
+            {'menu_item': self.dishes[2].pk, 'quantity': 1001},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Not enough stock', response.json()['error'][0])
+        response = self.client.post(reverse('api:order-list'), {
+            'table': self.table.pk, 'items': [{'menu_item': 9999, 'quantity': 1}],
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(self.client.post(reverse('api:orderitem-list'), {}).status_code, 405)
+
+    def test_order_items_are_cursor_paginated(self):
+        self.make_orders(4)
+        data = self.client.get(reverse('api:orderitem-list', query={'page_size': 5})).json()
+        self.assertEqual(len(data['results']), 5)
+        self.assertIsNotNone(data['next'])
+        rest = self.client.get(data['next']).json()
+        self.assertEqual(len(rest['results']), 5)
+        self.assertTrue({r['id'] for r in data['results']}.isdisjoint(r['id'] for r in rest['results']))
+
+
+class OrderIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.table = Table.objects.create(number=1, capacity=4)
+
+    def test_day_range_matches_date_lookup_and_uses_index(self):
+        day_start, day_end = local_day_range()
+        for n, created_at in enumerate([
+            day_start - timedelta(microseconds=1), day_start, day_end - timedelta(microseconds=1), day_end,
+        ]):
+            order = Order.objects.create(
+                order_number=f'D{n}', table=self.table, total_amount=10, status='completed',
+            )
+            Order.objects.filter(pk=order.pk).update(created_at=created_at)
+
+        today = Order.objects.filter(status='completed', created_at__gte=day_start, created_at__lt=day_end)
+        self.assertEqual(
+            set(today.values_list('order_number', flat=True)),
+            set(Order.objects.filter(status='completed', created_at__date=timezone.localdate())
+                .values_list('order_number', flat=True)),
+        )
+        self.assertEqual(today.count(), 2)
+        if connection.vendor == 'sqlite':
+            self.assertIn('order_status_created_idx', today.explain())
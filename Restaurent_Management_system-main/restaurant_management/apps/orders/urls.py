@@ -10,4 +10,6 @@ urlpatterns = [
     path('<int:pk>/', views.OrderDetailView.as_view(), name='order-detail'),
     path('create/', views.OrderCreateView.as_view(), name='order-create'),
     path('<int:pk>/update/', views.OrderUpdateView.as_view(), name='order-update'),
+    path('kitchen/', views.kitchen_display, name='kitchen'),
+    path('kitchen/tickets/', views.kitchen_feed, name='kitchen-tickets'),
 ]
\ No newline at end of file
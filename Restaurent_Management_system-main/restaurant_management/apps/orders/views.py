@@ -1,20 +1,62 @@
 from django.views.generic import ListView, DetailView, CreateView, UpdateView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
+from django.core.exceptions import ValidationError
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponseBadRequest, HttpResponseRedirect, JsonResponse
+from django.shortcuts import render
+from django.utils.cache import patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import condition
 from django.utils import timezone
-from django.db.models import Count, Q, Sum, Avg
+from django.db.models import Count, Prefetch, Q, Sum, Avg
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import Order, OrderItem
 from apps.inventory.models import MenuItem
-from .serializers import OrderSerializer, OrderItemSerializer
-import uuid
+from .kitchen import kitchen_etag, kitchen_tickets
+from core.api import FieldSelectionMixin, ValuesListMixin
+from core.dates import local_day_range
+from .pagination import KeysetPaginationMixin, OrderCursorPagination, OrderItemCursorPagination
+from .serializers import (
+    ORDER_VALUES, OrderCreateSerializer, OrderItemSerializer, OrderLineInputSerializer, OrderSerializer, order_rows,
+)
+from .services import add_order_lines, create_order, parse_order_lines
 
 # API Views
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(ValuesListMixin, viewsets.ModelViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
+    pagination_class = OrderCursorPagination
+    list_values = ORDER_VALUES
+
+    def list_rows(self, rows):
+        return order_rows(rows, with_items=self.wants('items'))
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.wants('table_number'):
+            queryset = queryset.select_related('table')
+        if self.wants('items'):
+            queryset = queryset.prefetch_related(
+                Prefetch('items', queryset=OrderItem.objects.select_related('menu_item').order_by('pk'))
+            )
+        return queryset
+
+    def create(self, request, *args, **kwargs):
+        # Same path as the order form: stock taken and total derived from the lines
+        data = OrderCreateSerializer(data=request.data)
+        data.is_valid(raise_exception=True)
+        try:
+            order = create_order(
+                table=data.validated_data['table'],
+                notes=data.validated_data.get('notes'),
+                lines=[(line['menu_item'], line['quantity']) for line in data.validated_data['items']],
+            )
+        except ValidationError as e:
+            return Response({'error': e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(order).data, status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=['post'])
     def update_status(self, request, pk=None):
@@ -32,27 +74,38 @@ class OrderViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def add_item(self, request, pk=None):
         order = self.get_object()
-        serializer = OrderItemSerializer(data=request.data)
-        if serializer.is_valid():
-            serializer.save(order=order)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-
-class OrderItemViewSet(viewsets.ModelViewSet):
+        line = OrderLineInputSerializer(data=request.data)
+        if not line.is_valid():
+            return Response(line.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            order_items = add_order_lines(order, [(line.validated_data['menu_item'], line.validated_data['quantity'])])
+        except ValidationError as e:
+            return Response({'error': e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(OrderItemSerializer(order_items[0]).data, status=status.HTTP_201_CREATED)
+
+
+class OrderItemViewSet(FieldSelectionMixin, viewsets.ReadOnlyModelViewSet):
+    # Lines change stock and order totals, so they are only added through OrderViewSet.add_item
     queryset = OrderItem.objects.all()
     serializer_class = OrderItemSerializer
+    pagination_class = OrderItemCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.wants('menu_item_name'):
+            queryset = queryset.select_related('menu_item')
+        return queryset
 
 
 # Template Views
-class OrderListView(LoginRequiredMixin, ListView):
+class OrderListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = Order
     template_name = 'orders/order_list.html'
     context_object_name = 'order_list'
     paginate_by = 10
 
     def get_queryset(self):
-        queryset = Order.objects.all()
+        queryset = Order.objects.select_related('table').prefetch_related('items__menu_item')
         status_filter = self.request.GET.get('status')
         if status_filter and status_filter != 'all':
             queryset = queryset.filter(status=status_filter)
@@ -60,7 +113,7 @@ class OrderListView(LoginRequiredMixin, ListView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        today = timezone.now().date()
+        day_start, day_end = local_day_range()
         
         # Get order statistics
         stats = {
@@ -70,14 +123,16 @@ class OrderListView(LoginRequiredMixin, ListView):
             ).count(),
             'completed_today': Order.objects.filter(
                 status='completed',
-                created_at__date=today
+                created_at__gte=day_start,
+                created_at__lt=day_end,
             ).count(),
             'cancelled_count': Order.objects.filter(
                 status='cancelled'
             ).count(),
             'total_revenue_today': Order.objects.filter(
                 status='completed',
-                created_at__date=today
+                created_at__gte=day_start,
+                created_at__lt=day_end,
             ).aggregate(total=Sum('total_amount'))['total'] or 0,
             'avg_order_value': Order.objects.filter(
                 status='completed'
@@ -94,6 +149,11 @@ class OrderDetailView(LoginRequiredMixin, DetailView):
     template_name = 'orders/order_detail.html'
     context_object_name = 'order'
 
+    def get_queryset(self):
+        return Order.objects.select_related('table').prefetch_related(
+            Prefetch('items', queryset=OrderItem.objects.select_related('menu_item'))
+        )
+
 
 class OrderCreateView(LoginRequiredMixin, CreateView):
     model = Order
@@ -107,41 +167,60 @@ class OrderCreateView(LoginRequiredMixin, CreateView):
         return context
 
     def form_valid(self, form):
-        # Generate a unique order number
-        form.instance.order_number = str(uuid.uuid4().hex[:6].upper())
-        form.instance.status = 'in_progress'
-        form.instance.total_amount = 0  # Will be updated after adding items
-        
-        # Save the order first
-        response = super().form_valid(form)
-        
-        # Process order items
-        menu_items = self.request.POST.getlist('menu_items[]')
-        quantities = self.request.POST.getlist('quantities[]')
-        
-        total_amount = 0
-        for item_id, quantity in zip(menu_items, quantities):
-            menu_item = MenuItem.objects.get(id=item_id)
-            quantity = int(quantity)
-            price = menu_item.price
-            
-            OrderItem.objects.create(
-                order=self.object,
-                menu_item=menu_item,
-                quantity=quantity,
-                price_at_time=price
+        try:
+            lines = parse_order_lines(
+                self.request.POST.getlist('menu_items[]'),
+                self.request.POST.getlist('quantities[]'),
             )
-            total_amount += price * quantity
-        
-        # Update order total
-        self.object.total_amount = total_amount
-        self.object.save()
-        
-        return response
+            self.object = create_order(
+                table=form.cleaned_data['table'],
+                notes=form.cleaned_data['notes'],
+                lines=lines,
+            )
+        except ValidationError as e:
+            form.add_error(None, e)
+            return self.form_invalid(form)
+        return HttpResponseRedirect(self.get_success_url())
 
 
 class OrderUpdateView(LoginRequiredMixin, UpdateView):
     model = Order
     template_name = 'orders/order_form.html'
     fields = ['status', 'notes']
-    success_url = reverse_lazy('orders:order-list')
\ No newline at end of file
+    success_url = reverse_lazy('orders:order-list')
+
+
+# Kitchen display
+def _kitchen_since(request):
+    since = request.GET.get('since')
+    try:
+        return parse_datetime(since) if since else None
+    except ValueError:
+        # Well formed but impossible, e.g. month 13; the caller answers 400
+        return None
+
+
+def _kitchen_feed_etag(request):
+    since = _kitchen_since(request)
+    if request.GET.get('since') and since is None:
+        return None
+    return kitchen_etag(since)
+
+
+@login_required
+def kitchen_display(request):
+    return render(request, 'orders/kitchen.html')
+
+
+@login_required
+@condition(etag_func=_kitchen_feed_etag)
+def kitchen_feed(request):
+    """Tickets for the kitchen screens; ``?since=`` returns only changed ones."""
+    since = _kitchen_since(request)
+    if request.GET.get('since') and since is None:
+        return HttpResponseBadRequest('since must be an ISO 8601 datetime')
+    tickets, cursor = kitchen_tickets(since)
+    response = JsonResponse({'full': since is None, 'cursor': cursor, 'tickets': tickets})
+    # Let browsers keep the body but revalidate every poll, so unchanged boards get a 304
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -8,5 +8,5 @@ class TableAdmin(admin.ModelAdmin):
 
 @admin.register(Reservation)
 class ReservationAdmin(admin.ModelAdmin):
-    list_display = ('table', 'customer_name', 'reservation_time')
+    list_display = ('table', 'customer_name', 'starts_at', 'ends_at', 'guest_count')
     search_fields = ('customer_name',)
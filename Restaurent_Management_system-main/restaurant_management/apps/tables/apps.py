@@ -3,3 +3,7 @@ from django.apps import AppConfig
 class TablesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.tables'
+
+    def ready(self):
+        from . import signals
+        signals.connect()
@@ -0,0 +1,115 @@
+# apps/tables/floor.py
+"""Table status derived from orders and reservations.
+
+An active table is ``occupied`` while it has an open staff order or an open
+dine-in online order, ``reserved`` from RESERVATION_HOLD_MINUTES before a
+booking starts until the booking ends, and ``available`` otherwise.
+
+``sync_table_statuses`` moves every table whose stored status disagrees
+with that rule in at most three UPDATEs, whatever the size of the floor.
+Order signals call it for the affected table when an order opens or closes.
+``manage.py run_table_scheduler`` calls it at each reservation boundary.
+
+Staff can only take a table ``out_of_service`` and put it back
+(``set_in_service``). The sync leaves out-of-service tables alone, so a
+manual status is never silently overwritten.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Exists, Min, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from apps.orders.models import Order
+from customer.models import CustomerOrder
+from .models import Reservation, Table
+from .reservations import overlapping
+
+OPEN_ORDER_STATUSES = ('in_progress', 'preparing', 'ready')
+OPEN_CUSTOMER_ORDER_STATUSES = ('pending', 'confirmed', 'preparing', 'ready')
+OUT_OF_SERVICE = 'out_of_service'
+# What staff may choose between; 'available' means "back in service"
+MANUAL_STATUS_CHOICES = [('available', 'In service'), (OUT_OF_SERVICE, 'Out of service')]
+
+
+def _hold():
+    return timedelta(minutes=settings.RESERVATION_HOLD_MINUTES)
+
+
+def _occupied():
+    return Exists(
+        Order.objects.filter(table=OuterRef('pk'), status__in=OPEN_ORDER_STATUSES)
+    ) | Exists(
+        CustomerOrder.objects.filter(
+            table_number=OuterRef('number'),
+            order_type='dine_in',
+            status__in=OPEN_CUSTOMER_ORDER_STATUSES,
+        )
+    )
+
+
+def _holding_reservations(now):
+    return Reservation.objects.filter(overlapping(now, now + _hold()), table=OuterRef('pk'))
+
+
+def sync_table_statuses(now=None, **lookup):
+    """Bring stored statuses in line with orders and reservations.
+
+    ``lookup`` narrows the tables considered, e.g. ``pk=3`` or
+    ``number=12``. Returns how many tables changed.
+    """
+    now = now or timezone.now()
+    tables = Table.objects.filter(is_active=True, **lookup).exclude(status=OUT_OF_SERVICE)
+    occupied = _occupied()
+    held = _holding_reservations(now)
+
+    changed = tables.filter(occupied).exclude(status='occupied').update(
+        status='occupied', updated_at=now,
+    )
+    changed += tables.filter(~occupied, Exists(held)).exclude(status='reserved').update(
+        status='reserved',
+        reservation_time=Subquery(held.order_by('starts_at').values('starts_at')[:1]),
+        updated_at=now,
+    )
+    changed += tables.filter(~occupied, ~Exists(held)).exclude(status='available').update(
+        status='available', reservation_time=None, updated_at=now,
+    )
+    return changed
+
+
+def set_in_service(table, in_service):
+    """Take ``table`` out of service, or return it to its derived status."""
+    if in_service:
+        Table.objects.filter(pk=table.pk, status=OUT_OF_SERVICE).update(
+            status='available', updated_at=timezone.now(),
+        )
+        sync_table_statuses(pk=table.pk)
+    else:
+        Table.objects.filter(pk=table.pk).update(
+            status=OUT_OF_SERVICE, reservation_time=None, updated_at=timezone.now(),
+        )
+    table.refresh_from_db(fields=['status', 'reservation_time', 'updated_at'])
+
+
+def next_transition(now=None):
+    """The next moment a reservation hold begins or ends, or None."""
+    now = now or timezone.now()
+    upcoming = Reservation.objects.aggregate(
+        start=Min('starts_at', filter=Q(starts_at__gt=now + _hold())),
+        end=Min('ends_at', filter=Q(ends_at__gt=now)),
+    )
+    moments = [moment for moment in (
+        upcoming['start'] - _hold() if upcoming['start'] else None,
+        upcoming['end'],
+    ) if moment is not None]
+    return min(moments, default=None)
+
+
+def floor_counts():
+    """Table totals by status in one aggregate query."""
+    return Table.objects.aggregate(
+        total_tables=Count('pk'),
+        available_tables=Count('pk', filter=Q(status='available')),
+        occupied_tables=Count('pk', filter=Q(status='occupied')),
+        reserved_tables=Count('pk', filter=Q(status='reserved')),
+    )
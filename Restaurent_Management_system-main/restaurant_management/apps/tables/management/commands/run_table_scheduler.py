@@ -0,0 +1,34 @@
+# apps/tables/management/commands/run_table_scheduler.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.tables.floor import next_transition, sync_table_statuses
+
+
+class Command(BaseCommand):
+    help = (
+        'Keep table statuses in step with reservations: wake at each reservation '
+        'hold start or end and move the affected tables in bulk'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Sync once and exit (for cron) instead of running continuously.')
+        parser.add_argument('--max-sleep', type=int, default=60,
+                            help='Longest wait between syncs in seconds, so missed events are caught up.')
+
+    def handle(self, *args, **options):
+        while True:
+            changed = sync_table_statuses()
+            if changed or options['verbosity'] > 1:
+                self.stdout.write(f'{timezone.localtime():%H:%M:%S} moved {changed} table(s)')
+            if options['once']:
+                return
+
+            wait = options['max_sleep']
+            upcoming = next_transition()
+            if upcoming is not None:
+                wait = min(wait, max(1, (upcoming - timezone.now()).total_seconds()))
+            time.sleep(wait)
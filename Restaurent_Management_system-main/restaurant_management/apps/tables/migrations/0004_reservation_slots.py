@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:40
+
+from datetime import datetime, timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+import apps.tables.models
+
+
+def fill_slots(apps, schema_editor):
+    Reservation = apps.get_model('tables', 'Reservation')
+    reservations = list(Reservation.objects.all())
+    for reservation in reservations:
+        reservation.starts_at = timezone.make_aware(
+            datetime.combine(reservation.reservation_date, reservation.reservation_time)
+        )
+        reservation.ends_at = reservation.starts_at + timedelta(minutes=reservation.duration_minutes)
+    Reservation.objects.bulk_update(reservations, ['starts_at', 'ends_at'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tables', '0003_alter_table_options_reservation_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='duration_minutes',
+            field=models.PositiveSmallIntegerField(default=apps.tables.models.default_reservation_minutes),
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='starts_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='ends_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_slots, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='reservation',
+            name='starts_at',
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AlterField(
+            model_name='reservation',
+            name='ends_at',
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['table', 'reservation_date', 'starts_at'], name='reservation_slot_idx'),
+        ),
+    ]
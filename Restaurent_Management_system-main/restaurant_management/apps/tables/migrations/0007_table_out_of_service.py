@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tables', '0006_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='table',
+            name='status',
+            field=models.CharField(choices=[('available', 'Available'), ('occupied', 'Occupied'), ('reserved', 'Reserved'), ('out_of_service', 'Out of service')], default='available', max_length=20),
+        ),
+    ]
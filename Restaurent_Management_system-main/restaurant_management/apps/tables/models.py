@@ -1,5 +1,14 @@
 # apps/tables/models.py
+from datetime import datetime, timedelta
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+
+def default_reservation_minutes():
+    return settings.RESERVATION_DEFAULT_MINUTES
+
 
 class Reservation(models.Model):
     table = models.ForeignKey('Table', on_delete=models.CASCADE)
@@ -8,9 +17,37 @@ class Reservation(models.Model):
     guest_count = models.PositiveIntegerField()
     reservation_date = models.DateField()
     reservation_time = models.TimeField()
+    duration_minutes = models.PositiveSmallIntegerField(default=default_reservation_minutes)
+    # The slot [starts_at, ends_at) as aware datetimes, derived on save
+    starts_at = models.DateTimeField(editable=False)
+    ends_at = models.DateTimeField(editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['table', 'reservation_date', 'starts_at'], name='reservation_slot_idx'),
+            # For the scheduler's next-boundary lookups
+            models.Index(fields=['starts_at'], name='reservation_start_idx'),
+            models.Index(fields=['ends_at'], name='reservation_end_idx'),
+            # Day sheets across all tables
+            models.Index(fields=['reservation_date', 'reservation_time'], name='reservation_day_idx'),
+        ]
+
+    def set_slot(self):
+        """Fill starts_at/ends_at from the date, time and duration; bulk_create callers must call this."""
+        day = self._meta.get_field('reservation_date').to_python(self.reservation_date)
+        start = self._meta.get_field('reservation_time').to_python(self.reservation_time)
+        self.starts_at = timezone.make_aware(datetime.combine(day, start))
+        self.ends_at = self.starts_at + timedelta(minutes=self.duration_minutes)
+
+    def save(self, *args, **kwargs):
+        self.set_slot()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'starts_at', 'ends_at'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Reservation for {self.customer_name} on {self.reservation_date} at {self.reservation_time}"
 
@@ -19,6 +56,8 @@ class Table(models.Model):
         ('available', 'Available'),
         ('occupied', 'Occupied'),
         ('reserved', 'Reserved'),
+        # The only status set by hand; the others follow orders and reservations
+        ('out_of_service', 'Out of service'),
     ]
     
     number = models.PositiveIntegerField(unique=True)
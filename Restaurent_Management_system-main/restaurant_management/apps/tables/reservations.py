@@ -0,0 +1,114 @@
+# apps/tables/reservations.py
+"""Reservation slots: conflict detection and free-table lookups.
+
+A reservation holds its table for ``[starts_at, ends_at)``. No booking is
+longer than ``RESERVATION_MAX_MINUTES``, so anything overlapping a slot starts
+less than that long before it. Every check is therefore a bounded range scan
+of ``reservation_slot_idx`` (table, date, start) rather than a walk over the
+table's whole booking history, and a whole-floor lookup is one query.
+"""
+from datetime import datetime, timedelta
+from functools import partial
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .models import Reservation, Table
+
+
+class ReservationConflict(ValidationError):
+    def __init__(self, table, conflict):
+        self.table = table
+        self.conflict = conflict
+        start = timezone.localtime(conflict.starts_at).strftime('%H:%M')
+        end = timezone.localtime(conflict.ends_at).strftime('%H:%M')
+        super().__init__(f'Table {table.number} is already booked from {start} to {end}.')
+
+
+def parse_booking(data):
+    """``(day, start_time, duration_minutes, guests)`` from form or API data."""
+    try:
+        day = datetime.strptime(data['reservation_date'], '%Y-%m-%d').date()
+        start_time = datetime.strptime(data['reservation_time'], '%H:%M').time()
+        duration = int(data.get('duration_minutes') or settings.RESERVATION_DEFAULT_MINUTES)
+        guests = int(data.get('guest_count') or 1)
+    except (KeyError, TypeError, ValueError):
+        raise ValidationError('Give a date (YYYY-MM-DD), a time (HH:MM) and whole numbers for guests and duration.')
+    if guests < 1:
+        raise ValidationError('Guest count must be at least 1.')
+    return day, start_time, duration, guests
+
+
+def slot_bounds(day, start_time, duration_minutes=None):
+    """Aware ``(starts_at, ends_at)`` for a booking starting at ``start_time`` on ``day``."""
+    starts_at = timezone.make_aware(datetime.combine(day, start_time))
+    return starts_at, starts_at + timedelta(minutes=duration_minutes or settings.RESERVATION_DEFAULT_MINUTES)
+
+
+def overlapping(starts_at, ends_at):
+    """Q for reservations whose slot intersects ``[starts_at, ends_at)``."""
+    earliest = starts_at - timedelta(minutes=settings.RESERVATION_MAX_MINUTES)
+    first_day, last_day = timezone.localdate(earliest), timezone.localdate(ends_at)
+    days = [first_day + timedelta(days=n) for n in range((last_day - first_day).days + 1)]
+    return Q(
+        reservation_date__in=days,
+        starts_at__gt=earliest,
+        starts_at__lt=ends_at,
+        ends_at__gt=starts_at,
+    )
+
+
+def conflicting_reservations(table, starts_at, ends_at, exclude_pk=None):
+    queryset = Reservation.objects.filter(overlapping(starts_at, ends_at), table=table)
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+    return queryset.order_by('starts_at')
+
+
+def free_tables(starts_at, ends_at, guests=1):
+    """Active tables seating ``guests`` with nothing booked in the slot, smallest first."""
+    booked = Reservation.objects.filter(overlapping(starts_at, ends_at), table=OuterRef('pk'))
+    return Table.objects.filter(
+        is_active=True, capacity__gte=guests,
+    ).exclude(status='out_of_service').exclude(Exists(booked)).order_by('capacity', 'number')
+
+
+def validate_reservation(reservation):
+    """Raise ValidationError unless ``reservation`` fits its table and slot."""
+    if not 1 <= reservation.duration_minutes <= settings.RESERVATION_MAX_MINUTES:
+        raise ValidationError(
+            f'Reservations last between 1 and {settings.RESERVATION_MAX_MINUTES} minutes.'
+        )
+    table = reservation.table
+    if table.status == 'out_of_service':
+        raise ValidationError(f'Table {table.number} is out of service.')
+    if int(reservation.guest_count) > table.capacity:
+        raise ValidationError(f'Table {table.number} seats {table.capacity}.')
+    reservation.set_slot()
+    conflict = conflicting_reservations(
+        table, reservation.starts_at, reservation.ends_at, exclude_pk=reservation.pk,
+    ).first()
+    if conflict is not None:
+        raise ReservationConflict(table, conflict)
+
+
+@transaction.atomic
+def book_table(table, **fields):
+    """Create a reservation on ``table`` if its slot is free.
+
+    The table row is locked first, so two hosts booking the same table at
+    once are checked one after the other.
+    """
+    table = Table.objects.select_for_update().get(pk=table.pk)
+    fields.setdefault('duration_minutes', settings.RESERVATION_DEFAULT_MINUTES)
+    reservation = Reservation(table=table, **fields)
+    validate_reservation(reservation)
+    reservation.save()
+
+    # A booking inside the hold window shows on the floor plan straight away
+    from .floor import sync_table_statuses
+    transaction.on_commit(partial(sync_table_statuses, pk=table.pk))
+    return reservation
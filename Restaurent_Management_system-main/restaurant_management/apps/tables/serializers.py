@@ -1,6 +1,10 @@
 # apps/tables/serializers.py
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
+
+from core.api import api_datetime, api_isoformat
 from .models import Table, Reservation
+from .reservations import validate_reservation
 
 class ReservationSerializer(serializers.ModelSerializer):
     table_number = serializers.IntegerField(source='table.number', read_only=True)
@@ -10,10 +14,24 @@ class ReservationSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'table', 'table_number', 'customer_name', 
             'customer_phone', 'guest_count', 'reservation_date', 
-            'reservation_time', 'created_at'
+            'reservation_time', 'duration_minutes', 'created_at'
         ]
         read_only_fields = ['created_at']
 
+    def validate(self, attrs):
+        # Check capacity and overlapping bookings against the merged result
+        reservation = Reservation(pk=self.instance.pk if self.instance else None)
+        if self.instance is not None:
+            for field in ('table', 'guest_count', 'reservation_date', 'reservation_time', 'duration_minutes'):
+                setattr(reservation, field, getattr(self.instance, field))
+        for field, value in attrs.items():
+            setattr(reservation, field, value)
+        try:
+            validate_reservation(reservation)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
+        return attrs
+
 class TableSerializer(serializers.ModelSerializer):
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     current_reservation = serializers.SerializerMethodField()
@@ -24,13 +42,76 @@ class TableSerializer(serializers.ModelSerializer):
             'id', 'number', 'capacity', 'status', 
             'status_display', 'is_active', 'current_reservation'
         ]
+        # Derived from orders and reservations; take a table out of service with update_status
+        read_only_fields = ['status']
     
     def get_current_reservation(self, obj):
-        from django.utils import timezone
-        now = timezone.now()
-        current_reservation = obj.reservation_set.filter(
-            reservation_date=now.date()
-        ).first()
+        # TableViewSet prefetches today's reservations; other callers query
+        if hasattr(obj, 'todays_reservations'):
+            current_reservation = next(iter(obj.todays_reservations), None)
+        else:
+            from django.utils import timezone
+            now = timezone.now()
+            current_reservation = obj.reservation_set.filter(
+                reservation_date=now.date()
+            ).first()
         if current_reservation:
             return ReservationSerializer(current_reservation).data
-        return None
\ No newline at end of file
+        return None
+
+
+# Read-only fast path for TableSerializer lists (see core.api.ValuesListMixin)
+TABLE_VALUES = ('id', 'number', 'capacity', 'status', 'is_active')
+RESERVATION_VALUES = (
+    'id', 'table', 'table__number', 'customer_name', 'customer_phone', 'guest_count',
+    'reservation_date', 'reservation_time', 'duration_minutes', 'created_at',
+)
+
+
+def reservation_rows(rows):
+    """ReservationSerializer output for ``.values(*RESERVATION_VALUES)`` rows."""
+    return [
+        {
+            'id': row['id'],
+            'table': row['table'],
+            'table_number': row['table__number'],
+            'customer_name': row['customer_name'],
+            'customer_phone': row['customer_phone'],
+            'guest_count': row['guest_count'],
+            'reservation_date': api_isoformat(row['reservation_date']),
+            'reservation_time': api_isoformat(row['reservation_time']),
+            'duration_minutes': row['duration_minutes'],
+            'created_at': api_datetime(row['created_at']),
+        }
+        for row in rows
+    ]
+
+
+def table_rows(rows, with_reservation=True):
+    """TableSerializer output for ``.values(*TABLE_VALUES)`` rows.
+
+    Today's reservations for the whole page are read with one more query.
+    """
+    from django.utils import timezone
+
+    current = {}
+    if with_reservation and rows:
+        reservations = Reservation.objects.filter(
+            table__in=[row['id'] for row in rows],
+            reservation_date=timezone.now().date(),
+        ).order_by('-pk').values(*RESERVATION_VALUES)
+        # Descending, so the lowest pk (what .first() would pick) wins
+        current = {reservation['table']: reservation for reservation in reservation_rows(reservations)}
+    status_labels = dict(Table.STATUS_CHOICES)
+    return [
+        {
+            'id': row['id'],
+            'number': row['number'],
+            'capacity': row['capacity'],
+            'status': row['status'],
+            'status_display': status_labels.get(row['status'], row['status']),
+            'is_active': row['is_active'],
+            'current_reservation': current.get(row['id']),
+        }
+        for row in rows
+    ]
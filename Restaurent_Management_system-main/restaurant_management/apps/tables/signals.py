@@ -0,0 +1,27 @@
+# apps/tables/signals.py
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from apps.orders.models import Order
+from customer.models import CustomerOrder
+from .floor import sync_table_statuses
+
+
+def order_changed(sender, instance, **kwargs):
+    # Opening or closing an order moves its table once the write commits
+    if instance.table_id:
+        transaction.on_commit(partial(sync_table_statuses, pk=instance.table_id))
+
+
+def customer_order_changed(sender, instance, **kwargs):
+    if instance.table_number:
+        transaction.on_commit(partial(sync_table_statuses, number=instance.table_number))
+
+
+def connect():
+    post_save.connect(order_changed, sender=Order, dispatch_uid='floor_order_saved')
+    post_delete.connect(order_changed, sender=Order, dispatch_uid='floor_order_deleted')
+    post_save.connect(customer_order_changed, sender=CustomerOrder, dispatch_uid='floor_customer_order_saved')
+    post_delete.connect(customer_order_changed, sender=CustomerOrder, dispatch_uid='floor_customer_order_deleted')
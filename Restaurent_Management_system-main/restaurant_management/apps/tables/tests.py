@@ -1,3 +1,269 @@
+from datetime import time, timedelta
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db import connection
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import viewsets
+
+from apps.orders.models import Order
+from core.api import ValuesListMixin
+from customer.models import CustomerOrder
+from .floor import floor_counts, next_transition, set_in_service, sync_table_statuses
+from .models import Reservation, Table
+from .reservations import (
+    ReservationConflict, book_table, conflicting_reservations, free_tables, slot_bounds, validate_reservation,
+)
+from .serializers import TABLE_VALUES, TableSerializer
+
+
+class TableApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('host', password='secret')
+        cls.tables = [Table.objects.create(number=n, capacity=4) for n in range(1, 4)]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def reserve(self, table, name):
+        return Reservation.objects.create(
+            table=table, customer_name=name, customer_phone='555', guest_count=2,
+            reservation_date=timezone.now().date(), reservation_time=time(19, 0),
+        )
+
+    def test_current_reservation_is_prefetched(self):
+        self.reserve(self.tables[0], 'Ana')
+        with self.assertNumQueries(5):
+            # session, user, count, tables, today's reservations
+            response = self.client.get(reverse('api:table-list'))
+        for table in self.tables[1:]:
+            self.reserve(table, 'Rui')
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('api:table-list'))
+        results = response.json()['results']
+        self.assertEqual([row['number'] for row in results], [1, 2, 3])
+        self.assertEqual(results[0]['current_reservation']['customer_name'], 'Ana')
+        self.assertEqual(results[0]['current_reservation']['table_number'], 1)
+
+    def test_fields_skip_the_reservation_prefetch(self):
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('api:table-list', query={'fields': 'number,status'}))
+        self.assertEqual(response.json()['results'][0], {'number': 1, 'status': 'available'})
+
+    def test_values_list_viewsets_must_define_list_rows(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, 'define list_rows(rows)'):
+            class Incomplete(ValuesListMixin, viewsets.ModelViewSet):
+                queryset = Table.objects.all()
+                serializer_class = TableSerializer
+                list_values = TABLE_VALUES
+
+
+class ReservationEngineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('host', password='secret')
+        cls.two = Table.objects.create(number=1, capacity=2)
+        cls.four = Table.objects.create(number=2, capacity=4)
+        cls.six = Table.objects.create(number=3, capacity=6)
+        cls.day = timezone.localdate() + timedelta(days=7)
+
+    def book(self, table, at, minutes=90, guests=2):
+        return book_table(
+            table, customer_name='Ana', customer_phone='555', guest_count=guests,
+            reservation_date=self.day, reservation_time=at, duration_minutes=minutes,
+        )
+
+    def test_slot_is_derived_on_save(self):
+        reservation = self.book(self.four, time(23, 0), minutes=120)
+        self.assertEqual(timezone.localtime(reservation.starts_at).time(), time(23, 0))
+        self.assertEqual(reservation.ends_at - reservation.starts_at, timedelta(hours=2))
+
+    def test_overlaps_are_rejected_and_back_to_back_allowed(self):
+        self.book(self.four, time(19, 0))
+        with self.assertRaises(ReservationConflict):
+            self.book(self.four, time(20, 0))
+        with self.assertRaises(ReservationConflict):
+            self.book(self.four, time(18, 0))
+        self.book(self.four, time(20, 30))
+        self.book(self.four, time(17, 30))
+        self.book(self.six, time(19, 0))
+        self.assertEqual(Reservation.objects.count(), 4)
+
+    def test_overlap_across_midnight(self):
+        self.book(self.four, time(23, 30), minutes=120)
+        starts_at, ends_at = slot_bounds(self.day + timedelta(days=1), time(0, 30), 60)
+        self.assertTrue(conflicting_reservations(self.four, starts_at, ends_at).exists())
+
+    def test_capacity_is_checked(self):
+        with self.assertRaisesMessage(ValidationError, 'Table 1 seats 2.'):
+            self.book(self.two, time(19, 0), guests=3)
+
+    def test_free_tables_is_one_query(self):
+        self.book(self.four, time(19, 0))
+        starts_at, ends_at = slot_bounds(self.day, time(19, 45), 90)
+        with self.assertNumQueries(1):
+            free = [table.number for table in free_tables(starts_at, ends_at, guests=3)]
+        self.assertEqual(free, [3])
+        with self.assertNumQueries(1):
+            free = [table.number for table in free_tables(starts_at, ends_at)]
+        self.assertEqual(free, [1, 3])
+        if connection.vendor == 'sqlite':
+            self.assertIn('reservation_slot_idx', free_tables(starts_at, ends_at).explain())
+
+    def test_api_conflict_offers_free_tables(self):
+        self.client.force_login(self.user)
+        self.book(self.four, time(19, 0))
+        response = self.client.post(reverse('tables:api_create_reservation'), {
+            'table': self.four.pk, 'customer_name': 'Rui', 'customer_phone': '556',
+            'guest_count': 4, 'reservation_date': self.day.isoformat(), 'reservation_time': '19:30',
+        })
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual([table['number'] for table in response.json()['free_tables']], [3])
+
+    def test_availability_endpoint(self):
+        self.client.force_login(self.user)
+        self.book(self.six, time(19, 0))
+        response = self.client.get(reverse('tables:availability', query={
+            'reservation_date': self.day.isoformat(), 'reservation_time': '20:00', 'guest_count': 2,
+        }))
+        self.assertEqual([table['number'] for table in response.json()['tables']], [1, 2])
+        response = self.client.get(reverse('tables:availability', query={'reservation_time': '20:00'}))
+        self.assertEqual(response.status_code, 400)
+
+    def test_viewset_rejects_overlaps(self):
+        self.client.force_login(self.user)
+        self.book(self.two, time(12, 0))
+        response = self.client.post(reverse('api:reservation-list'), {
+            'table': self.two.pk, 'customer_name': 'Rui', 'customer_phone': '556', 'guest_count': 2,
+            'reservation_date': self.day.isoformat(), 'reservation_time': '13:00',
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('already booked', response.json()['non_field_errors'][0])
+
+
+class TableStatusTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tables = [Table.objects.create(number=n, capacity=4) for n in range(1, 4)]
+
+    def statuses(self):
+        return list(Table.objects.order_by('number').values_list('status', flat=True))
+
+    def reserve(self, table, starts_at, minutes=90):
+        local = timezone.localtime(starts_at)
+        return Reservation.objects.create(
+            table=table, customer_name='Ana', customer_phone='555', guest_count=2,
+            reservation_date=local.date(), reservation_time=local.time(), duration_minutes=minutes,
+        )
+
+    def test_orders_open_and_close_their_table(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(order_number='T1', table=self.tables[0], total_amount=10)
+        self.assertEqual(self.statuses(), ['occupied', 'available', 'available'])
+        with self.captureOnCommitCallbacks(execute=True):
+            order.status = 'completed'
+            order.save()
+        self.assertEqual(self.statuses(), ['available', 'available', 'available'])
+
+    def test_online_dine_in_order_occupies_table_by_number(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            CustomerOrder.objects.create(
+                order_number='C1', customer_name='Rui', customer_email='rui@example.com',
+                customer_phone='555', total_amount=10, table_number=2,
+            )
+        self.assertEqual(self.statuses(), ['available', 'occupied', 'available'])
+
+    def test_reservation_holds_table_until_it_ends(self):
+        now = timezone.now().replace(microsecond=0)
+        reservation = self.reserve(self.tables[1], now + timedelta(minutes=20))
+        self.reserve(self.tables[2], now + timedelta(hours=3))
+        self.assertEqual(sync_table_statuses(now), 1)
+        self.assertEqual(self.statuses(), ['available', 'reserved', 'available'])
+        self.assertEqual(Table.objects.get(number=2).reservation_time, reservation.starts_at)
+
+        self.assertEqual(sync_table_statuses(reservation.ends_at), 1)
+        self.assertEqual(self.statuses(), ['available', 'available', 'available'])
+        self.assertIsNone(Table.objects.get(number=2).reservation_time)
+
+    def test_open_order_beats_reservation(self):
+        now = timezone.now()
+        self.reserve(self.tables[0], now + timedelta(minutes=10))
+        Order.objects.create(order_number='T2', table=self.tables[0], total_amount=10)
+        sync_table_statuses(now)
+        self.assertEqual(self.statuses(), ['occupied', 'available', 'available'])
+
+    def test_out_of_service_survives_orders_and_the_scheduler(self):
+        now = timezone.now()
+        user = User.objects.create_user('host', password='secret')
+        self.client.force_login(user)
+        self.client.post(reverse('tables:table-update', args=[self.tables[0].pk]), {'status': 'out_of_service'})
+        self.reserve(self.tables[0], now + timedelta(minutes=10))
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(order_number='T3', table=self.tables[0], total_amount=10)
+        self.assertEqual(sync_table_statuses(now), 0)
+        self.assertEqual(self.statuses(), ['out_of_service', 'available', 'available'])
+        self.assertNotIn(self.tables[0], free_tables(now, now + timedelta(hours=1)))
+
+        # Back in service it picks up whatever the floor says it should be
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('api:table-update-status', args=[self.tables[0].pk]), {'status': 'available'},
+            )
+        self.assertEqual(response.json()['status'], 'occupied')
+        order.status = 'completed'
+        order.save()
+        sync_table_statuses(now)
+        self.assertEqual(self.statuses(), ['reserved', 'available', 'available'])
+
+    def test_derived_statuses_cannot_be_set_by_hand(self):
+        user = User.objects.create_user('host', password='secret')
+        self.client.force_login(user)
+        response = self.client.post(
+            reverse('api:table-update-status', args=[self.tables[1].pk]), {'status': 'occupied'},
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(reverse('tables:table-update', args=[self.tables[1].pk]), {'status': 'occupied'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors)
+        response = self.client.patch(
+            reverse('api:table-detail', args=[self.tables[1].pk]), {'status': 'occupied', 'capacity': 6},
+            content_type='application/json',
+        )
+        self.assertEqual((response.json()['status'], response.json()['capacity']), ('available', 6))
+        self.assertEqual(self.statuses(), ['available', 'available', 'available'])
+
+        set_in_service(self.tables[1], False)
+        with self.assertRaisesMessage(ValidationError, 'out of service'):
+            validate_reservation(Reservation(
+                table=self.tables[1], guest_count=2, reservation_date=timezone.localdate() + timedelta(days=1),
+                reservation_time=time(19, 0), duration_minutes=90,
+            ))
+
+    def test_sync_is_three_queries_whatever_the_floor_size(self):
+        Table.objects.bulk_create([Table(number=n, capacity=2) for n in range(10, 60)])
+        now = timezone.now()
+        with self.assertNumQueries(3):
+            sync_table_statuses(now)
+        with self.assertNumQueries(1):
+            counts = floor_counts()
+        self.assertEqual(counts['total_tables'], 53)
+        self.assertEqual(counts['available_tables'], 53)
+
+    def test_next_transition_is_the_nearest_hold_or_release(self):
+        now = timezone.now().replace(microsecond=0)
+        self.assertIsNone(next_transition(now))
+        later = self.reserve(self.tables[0], now + timedelta(hours=2))
+        self.assertEqual(next_transition(now), later.starts_at - timedelta(minutes=30))
+        current = self.reserve(self.tables[1], now - timedelta(minutes=30), minutes=60)
+        self.assertEqual(next_transition(now), current.ends_at)
+
 
-# Create your tests here.
+class ReservationIndexTests(TestCase):
+    def test_day_sheet_uses_day_index(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN output checked on SQLite only')
+        day_sheet = Reservation.objects.filter(reservation_date=timezone.localdate()).order_by('reservation_time')
+        self.assertIn('reservation_day_idx', day_sheet.explain())
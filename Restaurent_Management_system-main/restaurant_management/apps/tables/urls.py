@@ -14,4 +14,5 @@ urlpatterns = [
     path('<int:pk>/update/', views.TableUpdateView.as_view(), name='table-update'),
     path('<int:pk>/delete/', views.TableDeleteView.as_view(), name='table-delete'),
     path('reservations/create/', views.reservation_form, name='reservation-create'),
+    path('availability/', views.table_availability, name='availability'),
 ]
\ No newline at end of file
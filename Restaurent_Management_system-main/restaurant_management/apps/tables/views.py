@@ -1,8 +1,12 @@
 # apps/tables/views.py
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
 from django.urls import reverse_lazy
-from django.db.models import Count
+from django.db.models import Count, Prefetch
+from django.utils import timezone
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -11,65 +15,107 @@ from rest_framework.decorators import api_view
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from .floor import MANUAL_STATUS_CHOICES, OUT_OF_SERVICE, floor_counts, set_in_service, sync_table_statuses
 from .models import Table, Reservation
-from .serializers import TableSerializer, ReservationSerializer
+from .reservations import ReservationConflict, book_table, free_tables, parse_booking, slot_bounds
+from .serializers import TABLE_VALUES, TableSerializer, ReservationSerializer, table_rows
+from apps.orders.pagination import EstimatedCursorPagination
+from core.api import CatalogPagination, FieldSelectionMixin, ValuesListMixin
 from datetime import datetime
 
 # API Views
-class TableViewSet(viewsets.ModelViewSet):
-    queryset = Table.objects.all()
+class TableViewSet(ValuesListMixin, viewsets.ModelViewSet):
+    queryset = Table.objects.order_by('number')
     serializer_class = TableSerializer
+    pagination_class = CatalogPagination
+    list_values = TABLE_VALUES
+
+    def list_rows(self, rows):
+        return table_rows(rows, with_reservation=self.wants('current_reservation'))
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.wants('current_reservation'):
+            # One query for every table's reservations today, read by the serializer
+            queryset = queryset.prefetch_related(Prefetch(
+                'reservation_set',
+                queryset=Reservation.objects.filter(
+                    reservation_date=timezone.now().date()
+                ).order_by('pk'),
+                to_attr='todays_reservations',
+            ))
+        return queryset
 
     @action(detail=True, methods=['post'])
     def update_status(self, request, pk=None):
         table = self.get_object()
         new_status = request.data.get('status')
-        if new_status in dict(Table.STATUS_CHOICES):
-            table.status = new_status
-            table.save()
+        if new_status in dict(MANUAL_STATUS_CHOICES):
+            set_in_service(table, new_status != OUT_OF_SERVICE)
             return Response(self.get_serializer(table).data)
         return Response(
-            {'error': 'Invalid status'},
+            {'error': 'Status can only be available (in service) or out_of_service; '
+                      'the rest follows orders and reservations'},
             status=status.HTTP_400_BAD_REQUEST
         )
 
 
-class ReservationViewSet(viewsets.ModelViewSet):
+class ReservationViewSet(FieldSelectionMixin, viewsets.ModelViewSet):
     queryset = Reservation.objects.all()
     serializer_class = ReservationSerializer
+    pagination_class = EstimatedCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.wants('table_number'):
+            queryset = queryset.select_related('table')
+        return queryset
 
 
 @api_view(['POST'])
 def create_reservation(request):
     try:
-        data = request.data
-        table = Table.objects.get(id=data['table'])
-        
-        # Convert string date and time to datetime
-        date_str = data['reservation_date']
-        time_str = data['reservation_time']
-        reservation_datetime = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
-
-        # Create the reservation
-        reservation = Reservation.objects.create(
-            table=table,
-            customer_name=data['customer_name'],
-            customer_phone=data['customer_phone'],
-            guest_count=data['guest_count'],
-            reservation_date=date_str,
-            reservation_time=time_str
+        table = Table.objects.get(id=request.data['table'])
+        day, start_time, duration, guests = parse_booking(request.data)
+        book_table(
+            table,
+            customer_name=request.data['customer_name'],
+            customer_phone=request.data['customer_phone'],
+            guest_count=guests,
+            reservation_date=day,
+            reservation_time=start_time,
+            duration_minutes=duration,
         )
-
-        # Update table status
-        table.status = 'reserved'
-        table.reservation_time = reservation_datetime
-        table.save()
-
         return Response({'message': 'Reservation created successfully'}, status=status.HTTP_201_CREATED)
-    except Table.DoesNotExist:
+    except (Table.DoesNotExist, ValueError):
         return Response({'error': 'Table not found'}, status=status.HTTP_404_NOT_FOUND)
-    except Exception as e:
-        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except KeyError as e:
+        return Response({'error': f'{e.args[0]} is required'}, status=status.HTTP_400_BAD_REQUEST)
+    except ReservationConflict as e:
+        # Offer the host the tables that are still free for the requested slot
+        alternatives = free_tables(*slot_bounds(day, start_time, duration), guests)
+        return Response({
+            'error': e.messages[0],
+            'free_tables': list(alternatives.values('id', 'number', 'capacity')),
+        }, status=status.HTTP_409_CONFLICT)
+    except ValidationError as e:
+        return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+
+
+@login_required
+def table_availability(request):
+    """Free tables for ``?reservation_date=&reservation_time=&guest_count=&duration_minutes=``."""
+    try:
+        day, start_time, duration, guests = parse_booking(request.GET)
+    except ValidationError as e:
+        return JsonResponse({'error': e.messages[0]}, status=400)
+    starts_at, ends_at = slot_bounds(day, start_time, duration)
+    tables = free_tables(starts_at, ends_at, guests).values('id', 'number', 'capacity')
+    return JsonResponse({
+        'starts_at': starts_at.isoformat(),
+        'ends_at': ends_at.isoformat(),
+        'tables': list(tables),
+    })
 
 
 # Template Views
@@ -89,26 +135,43 @@ class TableListView(LoginRequiredMixin, ListView):
         context = super().get_context_data(**kwargs)
         
         # Add table statistics
-        context['stats'] = {
-            'total_tables': Table.objects.count(),
-            'available_tables': Table.objects.filter(status='available').count(),
-            'occupied_tables': Table.objects.filter(status='occupied').count(),
-            'reserved_tables': Table.objects.filter(status='reserved').count(),
-        }
+        context['stats'] = floor_counts()
         
         # Add status choices for filter
         context['table_statuses'] = Table.STATUS_CHOICES
         return context
 
 
-class TableCreateView(LoginRequiredMixin, CreateView):
+class TableServiceMixin:
+    """Staff choose in or out of service; the scheduler derives everything else."""
+
+    def get_form(self, form_class=None):
+        form = super().get_form(form_class)
+        # Read before the bound form copies its choice onto the instance
+        self.stored_status = form.instance.status
+        form.fields['status'].choices = MANUAL_STATUS_CHOICES
+        form.fields['status'].label = 'Service'
+        if form.instance.status != OUT_OF_SERVICE:
+            form.initial['status'] = 'available'
+        return form
+
+    def form_valid(self, form):
+        in_service = form.cleaned_data['status'] != OUT_OF_SERVICE
+        # Save the other fields without touching the status; set_in_service moves it
+        form.instance.status = self.stored_status
+        response = super().form_valid(form)
+        set_in_service(self.object, in_service)
+        return response
+
+
+class TableCreateView(LoginRequiredMixin, TableServiceMixin, CreateView):
     model = Table
     template_name = 'tables/table_form.html'
     fields = ['number', 'capacity', 'status']
     success_url = reverse_lazy('tables:table-list')
 
 
-class TableUpdateView(LoginRequiredMixin, UpdateView):
+class TableUpdateView(LoginRequiredMixin, TableServiceMixin, UpdateView):
     model = Table
     template_name = 'tables/table_form.html'
     fields = ['status']
@@ -140,37 +203,29 @@ def reservation_form(request):
     if request.method == 'POST':
         try:
             table = Table.objects.get(id=request.POST.get('table'))
-            
-            # Convert string date and time to datetime
-            date_str = request.POST.get('reservation_date')
-            time_str = request.POST.get('reservation_time')
-            reservation_datetime = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
-
-            # Create the reservation
-            reservation = Reservation.objects.create(
-                table=table,
+            day, start_time, duration, guests = parse_booking(request.POST)
+            book_table(
+                table,
                 customer_name=request.POST.get('customer_name'),
                 customer_phone=request.POST.get('customer_phone'),
-                guest_count=request.POST.get('guest_count'),
-                reservation_date=date_str,
-                reservation_time=time_str
+                guest_count=guests,
+                reservation_date=day,
+                reservation_time=start_time,
+                duration_minutes=duration,
             )
-
-            # Update table status
-            table.status = 'reserved'
-            table.reservation_time = reservation_datetime
-            table.save()
-
             messages.success(request, 'Reservation created successfully!')
             return redirect('/')
-        except Exception as e:
-            messages.error(request, f'Error creating reservation: {str(e)}')
-    
-    # Get available tables for the form
-    available_tables = Table.objects.filter(status='available')
-    
+        except (Table.DoesNotExist, ValueError):
+            messages.error(request, 'Error creating reservation: choose a table.')
+        except ValidationError as e:
+            messages.error(request, f'Error creating reservation: {e.messages[0]}')
+
+    # Any active table can be booked; the form narrows the list by slot
+    # through tables:availability as the host fills it in
     context = {
-        'tables': available_tables,
-        'min_date': datetime.now().strftime('%Y-%m-%d')
+        'tables': Table.objects.filter(is_active=True),
+        'min_date': datetime.now().strftime('%Y-%m-%d'),
+        'duration_choices': [60, 90, 120, 150, 180],
+        'default_duration': settings.RESERVATION_DEFAULT_MINUTES,
     }
     return render(request, 'tables/reservation_form.html', context)
@@ -0,0 +1,8 @@
+# benchmarks/__init__.py
+"""Per-route query count, latency and response size benchmarks.
+
+``seed.py`` builds a realistic dataset, ``runner.py`` measures every named
+route against it and compares the results with ``budgets.json``. Run it with
+``python manage.py benchmark_routes``; ``benchmarks/tests.py`` checks the
+query budgets as part of the normal test suite.
+"""
@@ -0,0 +1,210 @@
+# benchmarks/runner.py
+import json
+import math
+from contextlib import contextmanager
+from pathlib import Path
+from time import perf_counter
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+
+from apps.inventory.models import Category, MenuItem
+from apps.orders.models import Order, OrderItem
+from apps.tables.models import Reservation, Table
+from customer.models import CustomerOrder
+
+BUDGETS_PATH = Path(__file__).with_name('budgets.json')
+METRICS = ('queries', 'p50_ms', 'p95_ms', 'bytes')
+
+# Routes that can't be measured with a plain GET, and why
+SKIPPED_ROUTES = {
+    'logout': 'ends the benchmark session',
+    'dashboard:logout': 'ends the benchmark session',
+    'dashboard:sales-stream': 'long-lived event stream',
+    'inventory:create_category': 'POST only',
+    'inventory:import_menu': 'POST only',
+    'tables:api_create_reservation': 'POST only',
+    'customer:update_order_status': 'POST only',
+    'customer:add_to_cart': 'POST only',
+    'customer:update_cart_item': 'POST only',
+    'customer:remove_from_cart': 'POST only',
+    'customer:cart_batch': 'POST only',
+    'inventory:delete_menu_item': 'POST only; the inventory list deletes without a confirmation page',
+    'api:order-add-item': 'POST only',
+    'api:order-update-status': 'POST only',
+    'api:menuitem-update-stock': 'POST only',
+    'api:table-update-status': 'POST only',
+}
+
+
+def _first_pk(model):
+    return lambda: {'pk': model.objects.values_list('pk', flat=True).first()}
+
+
+# URL kwargs for routes that need an existing object
+ROUTE_KWARGS = {
+    'orders:order-detail': lambda: {'pk': Order.objects.values_list('pk', flat=True).first()},
+    'orders:order-update': lambda: {'pk': Order.objects.values_list('pk', flat=True).first()},
+    'tables:table-update': lambda: {'pk': Table.objects.values_list('pk', flat=True).first()},
+    'tables:table-delete': lambda: {'pk': Table.objects.values_list('pk', flat=True).first()},
+    'inventory:edit_menu_item': lambda: {'pk': MenuItem.objects.values_list('pk', flat=True).first()},
+    'api:order-detail': _first_pk(Order),
+    'api:orderitem-detail': _first_pk(OrderItem),
+    'api:menuitem-detail': _first_pk(MenuItem),
+    'api:category-detail': _first_pk(Category),
+    'api:table-detail': _first_pk(Table),
+    'api:reservation-detail': _first_pk(Reservation),
+    'customer:order_confirmation': lambda: {
+        'order_number': CustomerOrder.objects.values_list('order_number', flat=True).first()
+    },
+}
+
+# Query strings for routes whose interesting path depends on one
+ROUTE_QUERY = {
+    'tables:availability': lambda: {
+        'reservation_date': timezone.localdate().isoformat(), 'reservation_time': '19:30', 'guest_count': 4,
+    },
+    'customer:track_order': lambda: {
+        'order_number': CustomerOrder.objects.values_list('order_number', flat=True).first()
+    },
+}
+
+
+def named_routes(resolver=None, namespace=None):
+    """Every named route reachable from the root URLconf, except the admin site."""
+    names = []
+    for pattern in (resolver or get_resolver()).url_patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.app_name == 'admin':
+                continue
+            inner = pattern.namespace or namespace
+            if namespace and pattern.namespace:
+                inner = f'{namespace}:{pattern.namespace}'
+            names.extend(named_routes(pattern, inner))
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            names.append(f'{namespace}:{pattern.name}' if namespace else pattern.name)
+    return names
+
+
+def benchmark_urls(routes=None):
+    """{route name: URL} for every route that is benchmarked with a GET."""
+    urls = {}
+    for name in routes or named_routes():
+        if name in SKIPPED_ROUTES or name in urls:
+            continue
+        kwargs = ROUTE_KWARGS[name]() if name in ROUTE_KWARGS else None
+        query = ROUTE_QUERY[name]() if name in ROUTE_QUERY else None
+        urls[name] = reverse(name, kwargs=kwargs, query=query)
+    return urls
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def measure(client, url, repeat=20, warmup=2):
+    for _ in range(warmup):
+        client.get(url)
+    timings, queries = [], 0
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as ctx:
+            start = perf_counter()
+            response = client.get(url)
+            # Streamed responses do their work as they are read
+            body = b''.join(response.streaming_content) if response.streaming else response.content
+            timings.append((perf_counter() - start) * 1000)
+        queries = max(queries, len(ctx.captured_queries))
+    return {
+        'status': response.status_code,
+        'queries': queries,
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'bytes': len(body),
+    }
+
+
+def benchmark_client(user):
+    """A logged-in client with a few dishes in its cart, so cart pages render fully."""
+    client = Client(raise_request_exception=False)
+    client.force_login(user)
+    menu_ids = MenuItem.objects.filter(is_available=True).values_list('pk', flat=True)[:5]
+    client.post(
+        reverse('customer:cart_batch'),
+        json.dumps({'operations': [{'action': 'add', 'menu_item_id': pk} for pk in menu_ids]}),
+        content_type='application/json',
+    )
+    return client
+
+
+def run_benchmarks(user, routes=None, repeat=20, warmup=2):
+    cache.clear()
+    client = benchmark_client(user)
+    return {
+        name: measure(client, url, repeat=repeat, warmup=warmup)
+        for name, url in benchmark_urls(routes).items()
+    }
+
+
+def load_budgets(path=BUDGETS_PATH):
+    with open(path) as fh:
+        return json.load(fh)['routes']
+
+
+def check_budgets(results, budgets, metrics=METRICS):
+    """Return a list of human-readable budget violations (empty when all pass)."""
+    violations = []
+    for name, result in results.items():
+        if result['status'] >= 400:
+            violations.append(f'{name}: returned HTTP {result["status"]}')
+        budget = budgets.get(name)
+        if budget is None:
+            violations.append(f'{name}: no budget in budgets.json')
+            continue
+        for metric in metrics:
+            if metric in budget and result[metric] > budget[metric]:
+                violations.append(f'{name}: {metric} {result[metric]} > budget {budget[metric]}')
+    return violations
+
+
+def _change(before, after):
+    if before is None:
+        return 'new'
+    if not before:
+        return '' if not after else '+inf'
+    return f'{(after - before) / before * 100:+.0f}%'
+
+
+def comparison_report(previous, current):
+    """A plain-text table of each metric before and after, one row per route."""
+    header = f'{"route":<34}' + ''.join(f'{metric:>24}' for metric in METRICS)
+    rows = [header, '-' * len(header)]
+    for name in sorted(set(previous) | set(current)):
+        before, after = previous.get(name), current.get(name)
+        if after is None:
+            rows.append(f'{name:<34}  (no longer benchmarked)')
+            continue
+        cells = []
+        for metric in METRICS:
+            old = before.get(metric) if before else None
+            cells.append(f'{old if old is not None else "-"} -> {after[metric]} {_change(old, after[metric])}'.rjust(24))
+        rows.append(f'{name:<34}' + ''.join(cells))
+    return '\n'.join(rows)
+
+
+@contextmanager
+def isolated_database():
+    """Run against a throwaway test database so seeding never touches real data."""
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
@@ -0,0 +1,160 @@
+# benchmarks/seed.py
+import random
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from apps.dashboard.facts import rebuild_order_facts
+from apps.dashboard.rollups import rebuild_sales_rollups
+from apps.inventory.alerts import reset_stock_states
+from apps.inventory.models import Category, MenuItem
+from apps.orders.models import Order, OrderItem
+from apps.orders.numbering import allocate_order_numbers
+from apps.tables.models import Reservation, Table
+from customer.models import CustomerOrder, CustomerOrderItem
+from customer.search import rebuild_order_search_index
+
+BENCHMARK_USERNAME = 'benchmark'
+
+
+@dataclass
+class SeedConfig:
+    tables: int = 20
+    menu_items: int = 60
+    months: int = 3
+    orders_per_day: int = 30
+    customer_orders_per_day: int = 15
+    reservations_per_day: int = 4
+    seed: int = 0
+
+
+@contextmanager
+def _backdating(*models):
+    # auto_now_add would stamp every seeded row with "now"; switch it off while seeding
+    fields = [model._meta.get_field('created_at') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _lines(rng, menu, count):
+    return [(rng.choice(menu), rng.randint(1, 3)) for _ in range(count)]
+
+
+@transaction.atomic
+def seed_dataset(config=None):
+    """Fill an empty database with ``config.months`` of restaurant history.
+
+    Everything is written with bulk_create, and the sales rollups are rebuilt
+    once at the end. Returns the staff user the benchmark client logs in as.
+    """
+    config = config or SeedConfig()
+    rng = random.Random(config.seed)
+    now = timezone.now()
+    days = max(1, config.months * 30)
+
+    user = User.objects.create_user(BENCHMARK_USERNAME, is_staff=True)
+
+    categories = Category.objects.bulk_create([
+        Category(name=label, category_type=value, display_order=n)
+        for n, (value, label) in enumerate(Category.CATEGORY_TYPES)
+    ])
+    menu = MenuItem.objects.bulk_create([
+        MenuItem(
+            name=f'Dish {n}',
+            category=categories[n % len(categories)],
+            price=Decimal(rng.randrange(250, 3000)) / 100,
+            stock_quantity=rng.randint(0, 200),
+            is_available=rng.random() > 0.05,
+        )
+        for n in range(config.menu_items)
+    ])
+    reset_stock_states()
+    tables = Table.objects.bulk_create([
+        Table(number=n + 1, capacity=rng.choice((2, 4, 4, 6, 8)),
+              status=rng.choice(('available', 'available', 'occupied', 'reserved')))
+        for n in range(config.tables)
+    ])
+
+    def placed_at(day):
+        opening = (now - timedelta(days=day)).replace(hour=11, minute=0, second=0, microsecond=0)
+        placed = opening + timedelta(minutes=rng.randrange(0, 11 * 60))
+        return min(placed, now)
+
+    order_count = days * config.orders_per_day
+    customer_order_count = days * config.customer_orders_per_day
+    numbers = iter(allocate_order_numbers(order_count + customer_order_count))
+
+    with _backdating(Order, CustomerOrder, Reservation):
+        orders, order_lines = [], []
+        for day in range(days):
+            for _ in range(config.orders_per_day):
+                lines = _lines(rng, menu, rng.randint(1, 5))
+                orders.append(Order(
+                    order_number=next(numbers),
+                    table=rng.choice(tables),
+                    status='completed' if day else rng.choice(('in_progress', 'preparing', 'ready', 'completed')),
+                    total_amount=sum(item.price * quantity for item, quantity in lines),
+                    created_at=placed_at(day),
+                ))
+                order_lines.append(lines)
+        Order.objects.bulk_create(orders, batch_size=500)
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, menu_item=item, quantity=quantity, price_at_time=item.price)
+            for order, lines in zip(orders, order_lines)
+            for item, quantity in lines
+        ], batch_size=1000)
+
+        customer_orders, customer_lines = [], []
+        for day in range(days):
+            for n in range(config.customer_orders_per_day):
+                lines = _lines(rng, menu, rng.randint(1, 4))
+                customer_orders.append(CustomerOrder(
+                    order_number=next(numbers),
+                    customer_name=f'Guest {day}-{n}',
+                    customer_email=f'guest{day}.{n}@example.com',
+                    customer_phone='555-0100',
+                    status='completed' if day else rng.choice(('pending', 'confirmed', 'preparing', 'ready')),
+                    order_type=rng.choice(('dine_in', 'takeaway')),
+                    total_amount=sum(item.price * quantity for item, quantity in lines),
+                    created_at=placed_at(day),
+                ))
+                customer_lines.append(lines)
+        CustomerOrder.objects.bulk_create(customer_orders, batch_size=500)
+        CustomerOrderItem.objects.bulk_create([
+            CustomerOrderItem(order=order, menu_item=item, quantity=quantity, price_at_time=item.price)
+            for order, lines in zip(customer_orders, customer_lines)
+            for item, quantity in lines
+        ], batch_size=1000)
+
+        reservations = [
+            Reservation(
+                table=rng.choice(tables),
+                customer_name=f'Party {day}-{n}',
+                customer_phone='555-0101',
+                guest_count=rng.randint(1, 8),
+                reservation_date=(now + timedelta(days=day - days // 2)).date(),
+                reservation_time=f'{rng.randint(12, 21)}:{rng.choice(("00", "30"))}',
+                created_at=now,
+            )
+            for day in range(days)
+            for n in range(config.reservations_per_day)
+        ]
+        for reservation in reservations:
+            reservation.set_slot()
+        Reservation.objects.bulk_create(reservations, batch_size=500)
+
+    # bulk_create skips the signals that maintain the facts, rollups and search index
+    rebuild_order_facts()
+    rebuild_sales_rollups()
+    rebuild_order_search_index()
+    return user
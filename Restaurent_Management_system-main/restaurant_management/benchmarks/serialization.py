@@ -0,0 +1,129 @@
+# benchmarks/serialization.py
+"""Throughput of the API list paths: ModelSerializer against the .values() rows.
+
+Both sides run their queries and render JSON, so the numbers are what a list
+endpoint would spend on one large page, minus the HTTP overhead.
+"""
+from dataclasses import dataclass
+from decimal import Decimal
+from time import perf_counter
+from typing import Callable
+
+from django.db.models import Prefetch
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from apps.inventory.models import Category, MenuItem
+from apps.inventory.serializers import MENU_ITEM_VALUES, MenuItemSerializer, menu_item_rows
+from apps.orders.models import Order, OrderItem
+from apps.orders.serializers import ORDER_VALUES, OrderSerializer, order_rows
+from apps.tables.models import Reservation, Table
+from apps.tables.serializers import TABLE_VALUES, TableSerializer, table_rows
+
+
+@dataclass
+class SerializerCase:
+    serializer_class: type
+    queryset: Callable
+    values: tuple
+    rows: Callable
+
+
+CASES = {
+    'menu-items': SerializerCase(
+        MenuItemSerializer,
+        lambda: MenuItem.objects.select_related('category').order_by('name', 'pk'),
+        MENU_ITEM_VALUES,
+        lambda rows, request: menu_item_rows(rows, request),
+    ),
+    'orders': SerializerCase(
+        OrderSerializer,
+        lambda: Order.objects.select_related('table').prefetch_related(
+            Prefetch('items', queryset=OrderItem.objects.select_related('menu_item').order_by('pk'))
+        ).order_by('-created_at', '-id'),
+        ORDER_VALUES,
+        lambda rows, request: order_rows(rows),
+    ),
+    'tables': SerializerCase(
+        TableSerializer,
+        lambda: Table.objects.prefetch_related(Prefetch(
+            'reservation_set',
+            queryset=Reservation.objects.filter(reservation_date=timezone.now().date()).order_by('pk'),
+            to_attr='todays_reservations',
+        )).order_by('number'),
+        TABLE_VALUES,
+        lambda rows, request: table_rows(rows),
+    ),
+}
+
+
+def seed_rows(count):
+    """``count`` menu items, tables and orders (two lines each) to serialize."""
+    category = Category.objects.create(name='Benchmark')
+    items = MenuItem.objects.bulk_create([
+        MenuItem(
+            name=f'Dish {n:05d}', category=category, price=Decimal(5 + n % 20) + Decimal('0.25'),
+            description='House special' if n % 3 else None,
+            image=f'menu_items/dish-{n}.jpg' if n % 2 else '',
+            stock_quantity=n % 50, low_stock_threshold=10,
+        )
+        for n in range(count)
+    ], batch_size=1000)
+    tables = Table.objects.bulk_create([
+        Table(number=n + 1, capacity=2 + n % 6) for n in range(count)
+    ], batch_size=1000)
+    reservations = [
+        Reservation(
+            table=table, customer_name='Guest', customer_phone='555-0100', guest_count=2,
+            reservation_date=timezone.now().date(), reservation_time='19:30',
+        )
+        for table in tables[::4]
+    ]
+    for reservation in reservations:
+        reservation.set_slot()
+    Reservation.objects.bulk_create(reservations, batch_size=1000)
+    orders = Order.objects.bulk_create([
+        Order(order_number=f'S{n:07d}', table=tables[n], total_amount=Decimal('12.50'),
+              notes='No onions' if n % 5 == 0 else None)
+        for n in range(count)
+    ], batch_size=1000)
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, menu_item=items[(n + line) % count], quantity=1 + line,
+                  price_at_time=items[(n + line) % count].price)
+        for n, order in enumerate(orders)
+        for line in range(2)
+    ], batch_size=1000)
+
+
+def _timed(render, repeat):
+    best, body = None, None
+    for _ in range(repeat):
+        start = perf_counter()
+        body = render()
+        elapsed = (perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, body
+
+
+def compare_serializers(cases=None, repeat=3):
+    """{case: rows, serializer_ms, values_ms, speedup, identical} over every row."""
+    request = RequestFactory().get('/api/')
+    renderer = JSONRenderer()
+    results = {}
+    for name in cases or CASES:
+        case = CASES[name]
+        serializer_ms, expected = _timed(lambda: renderer.render(
+            case.serializer_class(case.queryset(), many=True, context={'request': request}).data
+        ), repeat)
+        values_ms, actual = _timed(lambda: renderer.render(
+            case.rows(list(case.queryset().prefetch_related(None).values(*case.values)), request)
+        ), repeat)
+        results[name] = {
+            'rows': case.queryset().count(),
+            'serializer_ms': round(serializer_ms, 1),
+            'values_ms': round(values_ms, 1),
+            'speedup': round(serializer_ms / values_ms, 1) if values_ms else None,
+            'identical': expected == actual,
+        }
+    return results
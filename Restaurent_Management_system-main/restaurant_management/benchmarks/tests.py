@@ -0,0 +1,56 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from .runner import (
+    SKIPPED_ROUTES,
+    benchmark_urls,
+    check_budgets,
+    comparison_report,
+    load_budgets,
+    named_routes,
+    run_benchmarks,
+)
+from .seed import SeedConfig, seed_dataset
+from .serialization import CASES, compare_serializers, seed_rows
+
+
+class RouteBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Enough rows to fill the first page of every paginated list
+        cls.user = seed_dataset(SeedConfig(
+            tables=6, menu_items=15, months=1, orders_per_day=12,
+            customer_orders_per_day=2, reservations_per_day=1,
+        ))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_every_named_route_is_benchmarked_or_skipped(self):
+        budgets = load_budgets()
+        measured = benchmark_urls()
+        for name in named_routes():
+            self.assertTrue(name in measured or name in SKIPPED_ROUTES, name)
+        self.assertEqual(sorted(measured), sorted(budgets))
+
+    def test_query_budgets(self):
+        results = run_benchmarks(self.user, repeat=1, warmup=1)
+        self.assertEqual(check_budgets(results, load_budgets(), metrics=['queries']), [])
+
+    def test_budget_violations_and_report(self):
+        result = {'status': 200, 'queries': 5, 'p50_ms': 3.0, 'p95_ms': 4.0, 'bytes': 100}
+        violations = check_budgets({'a': result, 'b': result}, {'a': {'queries': 4}})
+        self.assertEqual(violations, ['a: queries 5 > budget 4', 'b: no budget in budgets.json'])
+
+        report = comparison_report({'a': dict(result, queries=10)}, {'a': result})
+        self.assertIn('10 -> 5 -50%', report)
+
+
+class SerializerParityTests(TestCase):
+    def test_values_rows_match_serializers(self):
+        seed_rows(40)
+        results = compare_serializers(repeat=1)
+        self.assertEqual(sorted(results), sorted(CASES))
+        for name, result in results.items():
+            self.assertEqual(result['rows'], 40, name)
+            self.assertTrue(result['identical'], name)
@@ -0,0 +1,99 @@
+# core/api.py
+"""Shared pieces for the REST API mounted under /api/."""
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.serializers import ListSerializer
+
+
+class CatalogPagination(PageNumberPagination):
+    """Numbered pages for the small catalog tables (menu, categories, tables)."""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class FieldSelectionMixin:
+    """Viewset mixin: ``?fields=id,name`` trims read responses to those fields.
+
+    ``wants(name)`` lets ``get_queryset`` skip joins and prefetches for fields
+    that will not be rendered.
+    """
+    fields_param = 'fields'
+
+    def requested_fields(self):
+        if getattr(self, '_requested_fields', False) is not False:
+            return self._requested_fields
+        raw = self.request.query_params.get(self.fields_param, '') if self.request else ''
+        names = {name.strip() for name in raw.split(',') if name.strip()}
+        self._requested_fields = names or None
+        return self._requested_fields
+
+    def wants(self, *names):
+        fields = self.requested_fields()
+        return fields is None or any(name in fields for name in names)
+
+    def unrequested_fields(self, available):
+        """Names in ``available`` to leave out; a 400 if ``?fields=`` names others."""
+        fields = self.requested_fields()
+        if not fields or self.request.method != 'GET':
+            return set()
+        unknown = fields - set(available)
+        if unknown:
+            raise ValidationError({self.fields_param: f"Unknown field(s): {', '.join(sorted(unknown))}"})
+        return set(available) - fields
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        target = serializer.child if isinstance(serializer, ListSerializer) else serializer
+        for name in self.unrequested_fields(target.fields):
+            target.fields.pop(name)
+        return serializer
+
+
+class ValuesListMixin(FieldSelectionMixin):
+    """Viewset mixin: GET lists skip model instances and ModelSerializer.
+
+    The queryset is read with ``.values(*list_values)`` and ``list_rows``
+    turns the page of dicts into exactly the JSON the serializer_class would
+    produce; the serializer still handles detail views and writes. Both
+    are required, and checked when the viewset class is defined.
+    """
+    list_values = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not cls.list_values or not callable(getattr(cls, 'list_rows', None)):
+            raise ImproperlyConfigured(
+                f'{cls.__name__} must set list_values and define list_rows(rows) to use ValuesListMixin'
+            )
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        queryset = queryset.values(*self.list_values)
+        page = self.paginate_queryset(queryset)
+        rows = self.list_rows(list(queryset if page is None else page))
+        dropped = self.unrequested_fields(self.get_serializer_class()().fields)
+        if dropped:
+            rows = [{k: v for k, v in row.items() if k not in dropped} for row in rows]
+        if page is None:
+            return Response(rows)
+        return self.get_paginated_response(rows)
+
+
+# DRF's default renderings, for building rows without a serializer
+def api_datetime(value):
+    if value is None:
+        return None
+    value = timezone.localtime(value).isoformat() if timezone.is_aware(value) else value.isoformat()
+    return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+
+def api_decimal(value):
+    return None if value is None else f'{value:f}'
+
+
+def api_isoformat(value):
+    return None if value is None else value.isoformat()
@@ -3,6 +3,10 @@ ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve through this entry point (e.g. ``uvicorn core.asgi:application``) to
+enable the live sales stream on the reports page; under WSGI the page falls
+back to polling.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
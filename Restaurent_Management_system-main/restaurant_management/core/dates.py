@@ -0,0 +1,17 @@
+# core/dates.py
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+
+def local_day_range(day=None):
+    """Aware ``[start, end)`` of a local calendar day, today by default.
+
+    Filter with ``created_at__gte=start, created_at__lt=end`` rather than
+    ``created_at__date=day``: the bare column comparison can use an index on
+    ``created_at``, the date cast cannot.
+    """
+    day = day or timezone.localdate()
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return start, end
@@ -82,6 +82,17 @@ DATABASES = {
     }
 }
 
+# Cache
+# The public menu is cached under a version number that catalogue changes bump.
+# LocMemCache is per process; use a shared backend (Redis, Memcached) when
+# running several workers so they all see the new version.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'rms-default',
+    }
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -117,5 +128,35 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# REST API (mounted under /api/). Every endpoint needs a signed-in user;
+# integrations can use HTTP basic auth.
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': [
+        'rest_framework.permissions.IsAuthenticated',
+    ],
+}
+
+# Inventory
+# When enabled, adding an item to a cart holds its stock until checkout, or
+# until the hold is released by `manage.py release_stock_holds`.
+STOCK_HOLD_ENABLED = False
+STOCK_HOLD_MINUTES = 30
+
+# Reservations hold their table for this long unless booked otherwise; no
+# booking may exceed the maximum, which bounds the overlap search.
+RESERVATION_DEFAULT_MINUTES = 90
+RESERVATION_MAX_MINUTES = 240
+# A table shows as reserved from this long before its booking starts
+# (see `manage.py run_table_scheduler`).
+RESERVATION_HOLD_MINUTES = 30
+
+# Order numbers are reserved from the database this many at a time per
+# process; a larger block means fewer counter updates under load.
+ORDER_NUMBER_BLOCK_SIZE = 20
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
@@ -0,0 +1,44 @@
+# core/streaming.py
+"""Helpers for responses and files produced row by row."""
+import csv
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+
+class _Echo:
+    # csv.writer target that hands each formatted line straight back
+    def write(self, value):
+        return value
+
+
+def csv_lines(header, rows):
+    """Yield CSV text a line at a time for a header and an iterable of row sequences."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+async def async_chunks(lines, size=500):
+    """Pull ``size`` lines at a time from a sync iterator on the sync thread.
+
+    Under ASGI a StreamingHttpResponse given a sync iterator reads it to the
+    end before sending anything. This wrapper keeps the stream incremental,
+    and it keeps database cursors on the thread that owns the connection.
+    """
+    lines = iter(lines)
+    next_chunk = sync_to_async(lambda: ''.join(islice(lines, size)), thread_sensitive=True)
+    while chunk := await next_chunk():
+        yield chunk
+
+
+def download_response(request, lines, content_type, filename):
+    """A streamed attachment of ``lines`` that stays incremental under WSGI and ASGI."""
+    if isinstance(request, ASGIRequest):
+        lines = async_chunks(lines)
+    response = StreamingHttpResponse(lines, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
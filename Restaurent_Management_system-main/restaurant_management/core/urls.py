@@ -20,11 +20,24 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib.auth import views as auth_views
+from rest_framework.routers import DefaultRouter
 from apps.dashboard.views import RegisterView
+from apps.inventory.views import CategoryViewSet, MenuItemViewSet
+from apps.orders.views import OrderItemViewSet, OrderViewSet
+from apps.tables.views import ReservationViewSet, TableViewSet
+
+router = DefaultRouter()
+router.register('orders', OrderViewSet)
+router.register('order-items', OrderItemViewSet)
+router.register('menu-items', MenuItemViewSet)
+router.register('categories', CategoryViewSet)
+router.register('tables', TableViewSet)
+router.register('reservations', ReservationViewSet)
 
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/', include((router.urls, 'api'))),
     path('', include('apps.dashboard.urls', namespace='dashboard')),
     path('orders/', include('apps.orders.urls', namespace='orders')),
     path('tables/', include('apps.tables.urls', namespace='tables')),
@@ -0,0 +1,24 @@
+# customer/management/commands/purge_guest_carts.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from customer.services import purge_guest_carts
+
+
+class Command(BaseCommand):
+    help = 'Delete abandoned guest carts (returning any held stock) and expired sessions in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=float, default=settings.SESSION_COOKIE_AGE / 86400,
+            help='Delete guest carts idle this long (default: SESSION_COOKIE_AGE, after which the cart is unreachable).',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        idle_since = timezone.now() - timedelta(days=options['days'])
+        carts, sessions = purge_guest_carts(idle_since, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {carts} guest carts and {sessions} expired sessions'))
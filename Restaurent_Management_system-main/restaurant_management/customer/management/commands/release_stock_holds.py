@@ -0,0 +1,19 @@
+# customer/management/commands/release_stock_holds.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from customer.services import release_expired_stock_holds
+
+
+class Command(BaseCommand):
+    help = 'Return stock held by cart items that have been idle longer than the hold window'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--minutes', type=int, default=None,
+            help=f'Hold window in minutes (default: STOCK_HOLD_MINUTES, currently {getattr(settings, "STOCK_HOLD_MINUTES", 30)})',
+        )
+
+    def handle(self, *args, **options):
+        released = release_expired_stock_holds(options['minutes'])
+        self.stdout.write(self.style.SUCCESS(f'Released {released} held units'))
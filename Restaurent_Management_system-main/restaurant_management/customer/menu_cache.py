@@ -0,0 +1,61 @@
+# customer/menu_cache.py
+from django.core.cache import cache
+from django.db.models import Count
+
+from apps.inventory.models import Category, MenuItem
+
+MENU_VERSION_KEY = 'menu:version'
+MENU_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def get_menu_version():
+    version = cache.get(MENU_VERSION_KEY)
+    if version is None:
+        # add() so concurrent first requests agree on the starting version
+        cache.add(MENU_VERSION_KEY, 1, timeout=None)
+        version = cache.get(MENU_VERSION_KEY, 1)
+    return version
+
+
+def bump_menu_version():
+    try:
+        cache.incr(MENU_VERSION_KEY)
+    except ValueError:
+        cache.set(MENU_VERSION_KEY, 1, timeout=None)
+
+
+def build_menu_snapshot():
+    """Active categories -> available items, loaded in a single query."""
+    items = MenuItem.objects.filter(
+        is_available=True,
+        category__is_active=True,
+    ).select_related('category').order_by(
+        'category__display_order', 'category__name', 'pk'
+    )
+    menu_data = {}
+    for item in items:
+        menu_data.setdefault(item.category, []).append(item)
+    return menu_data
+
+
+def get_menu_snapshot(version=None):
+    version = version or get_menu_version()
+    key = f'menu:snapshot:{version}'
+    menu_data = cache.get(key)
+    if menu_data is None:
+        menu_data = build_menu_snapshot()
+        cache.set(key, menu_data, MENU_CACHE_TIMEOUT)
+    return menu_data
+
+
+def get_category_counts(version=None):
+    """``[{'id', 'name', 'item_count'}]`` per category, cached until the menu changes."""
+    version = version or get_menu_version()
+    key = f'menu:category_counts:{version}'
+    counts = cache.get(key)
+    if counts is None:
+        counts = list(Category.objects.annotate(item_count=Count('menu_items')).order_by(
+            'display_order', 'name', 'pk',
+        ).values('id', 'name', 'item_count'))
+        cache.set(key, counts, MENU_CACHE_TIMEOUT)
+    return counts
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:40
+
+from django.db import migrations
+
+from customer.search import CREATE_SEARCH_TABLE, DROP_SEARCH_TABLE, SEARCH_FIELDS, SEARCH_TABLE
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    CustomerOrder = apps.get_model('customer', 'CustomerOrder')
+    columns = ', '.join(SEARCH_FIELDS)
+    schema_editor.execute(CREATE_SEARCH_TABLE)
+    schema_editor.execute(
+        f"INSERT INTO {SEARCH_TABLE} (rowid, {columns}) "
+        f"SELECT id, {columns} FROM {CustomerOrder._meta.db_table}"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(DROP_SEARCH_TABLE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer', '0003_cart_totals'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:45
+
+from django.db import migrations, models
+from django.db.models import Count, F
+
+
+def drop_duplicate_session_carts(apps, schema_editor):
+    # Racing get_or_create calls could leave several carts on one session;
+    # keep the most recently touched one and give back any stock the others held
+    Cart = apps.get_model('customer', 'Cart')
+    CartItem = apps.get_model('customer', 'CartItem')
+    MenuItem = apps.get_model('inventory', 'MenuItem')
+    duplicated = Cart.objects.filter(session_key__isnull=False).values('session_key').annotate(
+        carts=Count('pk'),
+    ).filter(carts__gt=1).values_list('session_key', flat=True)
+    for session_key in duplicated:
+        stale = list(Cart.objects.filter(session_key=session_key).order_by(
+            '-updated_at', '-pk',
+        ).values_list('pk', flat=True)[1:])
+        held = CartItem.objects.filter(cart_id__in=stale, held_quantity__gt=0)
+        for menu_item_id, quantity in held.values_list('menu_item_id', 'held_quantity'):
+            MenuItem.objects.filter(pk=menu_item_id).update(stock_quantity=F('stock_quantity') + quantity)
+        CartItem.objects.filter(cart_id__in=stale).delete()
+        Cart.objects.filter(pk__in=stale).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer', '0005_hot_path_indexes'),
+        ('inventory', '0003_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_session_carts, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='cart',
+            name='cart_session_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='cart',
+            constraint=models.UniqueConstraint(condition=models.Q(('session_key__isnull', False)), fields=('session_key',), name='cart_unique_session'),
+        ),
+    ]
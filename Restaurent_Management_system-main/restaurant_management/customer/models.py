@@ -19,9 +19,21 @@ class Customer(models.Model):
 class Cart(models.Model):
     customer = models.OneToOneField(Customer, on_delete=models.CASCADE, null=True, blank=True)
     session_key = models.CharField(max_length=50, null=True, blank=True)  # For guest users
+    # Kept current by customer.services on every cart mutation
+    item_count = models.PositiveIntegerField(default=0)
+    subtotal = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            # One cart per guest session; also the index for the per-request lookup
+            models.UniqueConstraint(
+                fields=['session_key'], name='cart_unique_session',
+                condition=models.Q(session_key__isnull=False),
+            ),
+        ]
+
     def __str__(self):
         if self.customer:
             return f"Cart for {self.customer.name}"
@@ -29,16 +41,17 @@ class Cart(models.Model):
 
     @property
     def total_amount(self):
-        return sum(item.subtotal for item in self.items.all())
+        return self.subtotal
 
     @property
     def total_items(self):
-        return sum(item.quantity for item in self.items.all())
+        return self.item_count
 
 class CartItem(models.Model):
     cart = models.ForeignKey(Cart, related_name='items', on_delete=models.CASCADE)
     menu_item = models.ForeignKey(MenuItem, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1, validators=[MinValueValidator(1)])
+    held_quantity = models.PositiveIntegerField(default=0)  # Stock taken while STOCK_HOLD_ENABLED
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -93,6 +106,15 @@ class CustomerOrder(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='custorder_status_created_idx'),
+            models.Index(fields=['updated_at'], name='custorder_updated_idx'),
+            # Dine-in orders looked up by table number (floor status)
+            models.Index(
+                fields=['table_number', 'status'], name='custorder_table_status_idx',
+                condition=models.Q(table_number__isnull=False),
+            ),
+        ]
 
 class CustomerOrderItem(models.Model):
     order = models.ForeignKey(CustomerOrder, related_name='items', on_delete=models.CASCADE)
@@ -0,0 +1,87 @@
+# customer/search.py
+"""Full-text search over customer orders for the staff order list.
+
+On SQLite, order number, customer name and email are mirrored into an FTS5
+table keyed by the order's id and kept current by customer.signals, so a
+search is an index lookup instead of three ``icontains`` scans. Terms match
+word prefixes: "ana exam" finds ana@example.com. Other databases fall back
+to the ``icontains`` filter.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+SEARCH_TABLE = 'customer_customerorder_search'
+SEARCH_FIELDS = ('order_number', 'customer_name', 'customer_email')
+
+CREATE_SEARCH_TABLE = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    f"{', '.join(SEARCH_FIELDS)}, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+)
+DROP_SEARCH_TABLE = f'DROP TABLE IF EXISTS {SEARCH_TABLE}'
+
+
+def search_index_available(using=None):
+    return (using or connection).vendor == 'sqlite'
+
+
+def index_orders(orders, using=None):
+    """Insert or refresh the search rows for an iterable of CustomerOrders."""
+    using = using or connection
+    rows = [(order.pk, *(getattr(order, field) or '' for field in SEARCH_FIELDS)) for order in orders]
+    if rows and search_index_available(using):
+        with using.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO {SEARCH_TABLE} (rowid, {', '.join(SEARCH_FIELDS)}) "
+                f"VALUES (%s, {', '.join(['%s'] * len(SEARCH_FIELDS))})",
+                rows,
+            )
+
+
+def unindex_order(pk, using=None):
+    using = using or connection
+    if search_index_available(using):
+        with using.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [pk])
+
+
+def rebuild_order_search_index(batch_size=2000, using=None):
+    """Repopulate the index from CustomerOrder, e.g. after bulk imports."""
+    from .models import CustomerOrder
+
+    using = using or connection
+    if not search_index_available(using):
+        return 0
+    with using.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+    count, batch = 0, []
+    for order in CustomerOrder.objects.only('pk', *SEARCH_FIELDS).iterator(chunk_size=batch_size):
+        batch.append(order)
+        if len(batch) == batch_size:
+            index_orders(batch, using)
+            count, batch = count + len(batch), []
+    index_orders(batch, using)
+    return count + len(batch)
+
+
+def match_expression(term):
+    """Turn free text into an FTS5 query of quoted prefix terms, ANDed together."""
+    tokens = re.findall(r'\w+', term.lower())
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def search_orders(queryset, term):
+    if not search_index_available():
+        return queryset.filter(
+            Q(order_number__icontains=term) |
+            Q(customer_name__icontains=term) |
+            Q(customer_email__icontains=term)
+        )
+    expression = match_expression(term)
+    if not expression:
+        return queryset.none()
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s', [expression]
+    ))
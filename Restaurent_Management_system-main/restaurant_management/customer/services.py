@@ -0,0 +1,334 @@
+# customer/services.py
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import DecimalField, Exists, F, OuterRef, PositiveIntegerField, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.inventory.models import MenuItem
+from apps.inventory.stock import decrement_stock, merge_quantities, restore_stock
+from .models import Cart, CartItem
+
+
+def stock_holds_enabled():
+    return getattr(settings, 'STOCK_HOLD_ENABLED', False)
+
+
+@transaction.atomic
+def sync_stock_hold(cart_item, quantity):
+    """Move the stock held by ``cart_item`` to ``quantity`` units.
+
+    Only the difference is taken from or returned to the menu item, so the
+    hold follows the cart as the customer changes quantities.
+    """
+    delta = quantity - cart_item.held_quantity
+    if delta > 0:
+        decrement_stock({cart_item.menu_item_id: delta})
+    elif delta < 0:
+        restore_stock({cart_item.menu_item_id: -delta})
+    if delta and cart_item.pk:
+        CartItem.objects.filter(pk=cart_item.pk).update(held_quantity=quantity)
+    cart_item.held_quantity = quantity
+
+
+def release_stock_holds(cart_items):
+    """Return all stock held by a queryset of cart items, in one UPDATE per table."""
+    with transaction.atomic():
+        rows = list(
+            cart_items.filter(held_quantity__gt=0).select_for_update().values_list(
+                'pk', 'menu_item_id', 'held_quantity'
+            )
+        )
+        if not rows:
+            return 0
+        restore_stock(merge_quantities((menu_item_id, held) for _, menu_item_id, held in rows))
+        CartItem.objects.filter(pk__in=[pk for pk, _, _ in rows]).update(held_quantity=0)
+    return sum(held for _, _, held in rows)
+
+
+def release_expired_stock_holds(minutes=None):
+    minutes = minutes if minutes is not None else getattr(settings, 'STOCK_HOLD_MINUTES', 30)
+    cutoff = timezone.now() - timedelta(minutes=minutes)
+    return release_stock_holds(CartItem.objects.filter(updated_at__lt=cutoff))
+
+
+def unheld_quantities(cart_items):
+    """{menu_item_id: quantity still to take from stock} for a checkout."""
+    return dict(
+        cart_items.annotate(needed=F('quantity') - F('held_quantity')).values_list(
+            'menu_item_id', 'needed'
+        )
+    )
+
+
+# Cart totals. Cart.item_count / Cart.subtotal are adjusted in place on each
+# mutation, so reading a cart's totals never walks its items.
+def _bump_cart_totals(cart, quantity_delta, price):
+    if quantity_delta:
+        Cart.objects.filter(pk=cart.pk).update(
+            item_count=F('item_count') + quantity_delta,
+            subtotal=F('subtotal') + quantity_delta * price,
+            updated_at=timezone.now(),
+        )
+
+
+def refresh_cart_totals(carts):
+    """Recompute the stored totals for a queryset of carts in one UPDATE."""
+    items = CartItem.objects.filter(cart=OuterRef('pk')).values('cart')
+    return carts.update(
+        item_count=Coalesce(
+            Subquery(items.annotate(total=Sum('quantity')).values('total')),
+            0, output_field=PositiveIntegerField(),
+        ),
+        subtotal=Coalesce(
+            Subquery(items.annotate(
+                total=Sum(F('quantity') * F('menu_item__price'))
+            ).values('total')),
+            0, output_field=DecimalField(max_digits=10, decimal_places=2),
+        ),
+    )
+
+
+def _locked_quantity(cart_item):
+    # Read the stored quantity under a row lock so concurrent edits can't skew the totals
+    return CartItem.objects.select_for_update().values_list('quantity', flat=True).get(pk=cart_item.pk)
+
+
+@transaction.atomic
+def add_to_cart(cart, menu_item, quantity):
+    cart_item, created = CartItem.objects.get_or_create(
+        cart=cart,
+        menu_item=menu_item,
+        defaults={'quantity': quantity}
+    )
+    if not created:
+        cart_item.quantity = F('quantity') + quantity
+        cart_item.save(update_fields=['quantity', 'updated_at'])
+        cart_item.refresh_from_db(fields=['quantity'])
+
+    if stock_holds_enabled():
+        sync_stock_hold(cart_item, cart_item.quantity)
+    _bump_cart_totals(cart, quantity, menu_item.price)
+    cart.refresh_from_db(fields=['item_count', 'subtotal'])
+    return cart_item
+
+
+@transaction.atomic
+def set_cart_item_quantity(cart_item, quantity):
+    """Change a line's quantity; zero or less removes it."""
+    if quantity <= 0:
+        return remove_cart_item(cart_item)
+
+    delta = quantity - _locked_quantity(cart_item)
+    cart_item.quantity = quantity
+    cart_item.save(update_fields=['quantity', 'updated_at'])
+    if stock_holds_enabled():
+        sync_stock_hold(cart_item, quantity)
+    _bump_cart_totals(cart_item.cart, delta, cart_item.menu_item.price)
+    cart_item.cart.refresh_from_db(fields=['item_count', 'subtotal'])
+    return cart_item
+
+
+@transaction.atomic
+def remove_cart_item(cart_item):
+    cart_item.quantity = _locked_quantity(cart_item)
+    release_stock_holds(CartItem.objects.filter(pk=cart_item.pk))
+    cart_item.delete()
+    _bump_cart_totals(cart_item.cart, -cart_item.quantity, cart_item.menu_item.price)
+    cart_item.cart.refresh_from_db(fields=['item_count', 'subtotal'])
+    return None
+
+
+def clear_cart(cart):
+    cart.items.all().delete()
+    Cart.objects.filter(pk=cart.pk).update(item_count=0, subtotal=0, updated_at=timezone.now())
+    cart.item_count, cart.subtotal = 0, 0
+
+
+# Batched cart edits. The menu page queues clicks and sends them here in one
+# request instead of one add/update/remove round-trip per item.
+CART_BATCH_MAX_OPERATIONS = 100
+CART_BATCH_ACTIONS = ('add', 'update', 'remove')
+
+
+def _parse_cart_operation(operation, lines_by_id):
+    """Normalise one operation dict to ``(action, menu_item_id, quantity)``."""
+    if not isinstance(operation, dict) or operation.get('action') not in CART_BATCH_ACTIONS:
+        raise ValidationError('Each operation needs an action of add, update or remove.')
+    action = operation['action']
+    try:
+        quantity = int(operation.get('quantity', 1 if action == 'add' else 0))
+        menu_item_id = operation.get('menu_item_id')
+        cart_item_id = operation.get('cart_item_id')
+        menu_item_id = int(menu_item_id) if menu_item_id is not None else None
+        cart_item_id = int(cart_item_id) if cart_item_id is not None else None
+    except (TypeError, ValueError):
+        raise ValidationError('Invalid menu item, cart item or quantity.')
+
+    if menu_item_id is None and action != 'add' and cart_item_id is not None:
+        if cart_item_id not in lines_by_id:
+            raise ValidationError(f'Cart item {cart_item_id} is not in this cart.')
+        menu_item_id = lines_by_id[cart_item_id].menu_item_id
+    if menu_item_id is None:
+        raise ValidationError(f'The {action} operation needs a menu_item_id.')
+    if action == 'add' and quantity < 1:
+        raise ValidationError('Quantities must be at least 1.')
+    return action, menu_item_id, quantity
+
+
+@transaction.atomic
+def apply_cart_operations(cart, operations):
+    """Apply a list of add/update/remove operations to ``cart`` in one transaction.
+
+    The final quantity of every line is worked out in memory first, then
+    written with one DELETE and one upserting ``bulk_create``; stock holds
+    move in one conditional UPDATE and the stored totals are recomputed once.
+    The query count does not grow with the number of operations. Returns the
+    cart's lines after the batch, with their menu items loaded.
+    """
+    if not isinstance(operations, list):
+        raise ValidationError('operations must be a list.')
+    if len(operations) > CART_BATCH_MAX_OPERATIONS:
+        raise ValidationError(f'At most {CART_BATCH_MAX_OPERATIONS} operations per request.')
+
+    lines = {line.menu_item_id: line for line in cart.items.select_for_update()}
+    lines_by_id = {line.pk: line for line in lines.values()}
+    parsed = [_parse_cart_operation(operation, lines_by_id) for operation in operations]
+
+    new_ids = {menu_item_id for action, menu_item_id, _ in parsed if action == 'add'} - lines.keys()
+    if new_ids:
+        available = MenuItem.objects.filter(is_available=True).in_bulk(new_ids)
+        missing = new_ids - available.keys()
+        if missing:
+            raise ValidationError(
+                'Unavailable menu item(s): %s' % ', '.join(str(item_id) for item_id in sorted(missing))
+            )
+
+    quantities = {menu_item_id: line.quantity for menu_item_id, line in lines.items()}
+    for action, menu_item_id, quantity in parsed:
+        if action == 'add':
+            quantities[menu_item_id] = quantities.get(menu_item_id, 0) + quantity
+        elif action == 'update' and quantity > 0:
+            if menu_item_id not in quantities:
+                raise ValidationError(f'Menu item {menu_item_id} is not in this cart.')
+            quantities[menu_item_id] = quantity
+        else:
+            quantities.pop(menu_item_id, None)
+
+    removed = [menu_item_id for menu_item_id in lines if menu_item_id not in quantities]
+    changed = {
+        menu_item_id: quantity for menu_item_id, quantity in quantities.items()
+        if menu_item_id not in lines or lines[menu_item_id].quantity != quantity
+    }
+
+    holds = stock_holds_enabled()
+    if holds:
+        take, give_back = {}, {}
+        for menu_item_id in removed + list(changed):
+            held = lines[menu_item_id].held_quantity if menu_item_id in lines else 0
+            delta = quantities.get(menu_item_id, 0) - held
+            if delta > 0:
+                take[menu_item_id] = delta
+            elif delta < 0:
+                give_back[menu_item_id] = -delta
+        decrement_stock(take)
+        restore_stock(give_back)
+
+    if removed:
+        CartItem.objects.filter(cart=cart, menu_item_id__in=removed).delete()
+    if changed:
+        CartItem.objects.bulk_create(
+            [
+                CartItem(
+                    cart=cart,
+                    menu_item_id=menu_item_id,
+                    quantity=quantity,
+                    held_quantity=quantity if holds else getattr(lines.get(menu_item_id), 'held_quantity', 0),
+                )
+                for menu_item_id, quantity in changed.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['cart', 'menu_item'],
+            update_fields=['quantity', 'held_quantity', 'updated_at'],
+        )
+    if removed or changed:
+        refresh_cart_totals(Cart.objects.filter(pk=cart.pk))
+
+    cart_items = list(cart.items.select_related('menu_item').order_by('created_at', 'pk'))
+    # Same values refresh_cart_totals just stored, without reading the cart back
+    cart.item_count = sum(item.quantity for item in cart_items)
+    cart.subtotal = sum((item.subtotal for item in cart_items), Decimal('0.00'))
+    return cart_items
+
+
+# Guest carts. A cart is keyed by the browser session and only created on the
+# first add, so visitors who only browse (crawlers included) leave no rows.
+def session_cart(request, create=False):
+    """The guest cart for ``request``'s session, or None if there isn't one.
+
+    With ``create=True`` the session and cart are created when missing; the
+    unique session_key constraint makes concurrent first adds share a cart.
+    """
+    session_key = request.session.session_key
+    if not session_key:
+        if not create:
+            return None
+        request.session.create()
+        session_key = request.session.session_key
+    if create:
+        return Cart.objects.get_or_create(session_key=session_key)[0]
+    return Cart.objects.filter(session_key=session_key).first()
+
+
+def _db_sessions():
+    return settings.SESSION_ENGINE in (
+        'django.contrib.sessions.backends.db', 'django.contrib.sessions.backends.cached_db',
+    )
+
+
+def abandoned_guest_carts(idle_since, now=None):
+    """Guest carts untouched since ``idle_since`` or whose session has expired."""
+    now = now or timezone.now()
+    abandoned = Q(updated_at__lt=idle_since)
+    if _db_sessions():
+        live = Session.objects.filter(session_key=OuterRef('session_key'), expire_date__gt=now)
+        abandoned |= ~Exists(live)
+    return Cart.objects.filter(abandoned, customer__isnull=True, session_key__isnull=False)
+
+
+def _delete_in_batches(queryset, batch_size, before_delete=None):
+    deleted = 0
+    while True:
+        pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        with transaction.atomic():
+            if before_delete:
+                before_delete(pks)
+            queryset.model.objects.filter(pk__in=pks).delete()
+        deleted += len(pks)
+
+
+def purge_guest_carts(idle_since, batch_size=500, now=None):
+    """Delete abandoned guest carts and expired sessions, ``batch_size`` rows at a time.
+
+    Held stock is returned before a cart goes. Each batch is its own short
+    transaction so the tables stay writable while a large backlog drains.
+    Returns ``(carts, sessions)`` deleted.
+    """
+    now = now or timezone.now()
+
+    def release(cart_pks):
+        release_stock_holds(CartItem.objects.filter(cart_id__in=cart_pks))
+        CartItem.objects.filter(cart_id__in=cart_pks).delete()
+
+    carts = _delete_in_batches(abandoned_guest_carts(idle_since, now), batch_size, release)
+    sessions = 0
+    if _db_sessions():
+        sessions = _delete_in_batches(Session.objects.filter(expire_date__lte=now), batch_size)
+    return carts, sessions
@@ -0,0 +1,73 @@
+# customer/signals.py
+from django.db import connections
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.utils import timezone
+
+from apps.inventory.alerts import availability_changed
+from apps.inventory.catalog import menu_imported
+from apps.inventory.models import Category, MenuItem
+from .menu_cache import bump_menu_version
+from .models import Cart, CustomerOrder, CustomerOrderItem
+from .search import SEARCH_FIELDS, index_orders, unindex_order
+from .services import refresh_cart_totals
+
+
+def menu_changed(sender, **kwargs):
+    # Any catalogue change retires the cached menu snapshot and fragments
+    bump_menu_version()
+
+
+def menu_item_saved(sender, instance, created, **kwargs):
+    # Stored cart subtotals are priced at the current menu price
+    if not created:
+        refresh_cart_totals(Cart.objects.filter(items__menu_item=instance))
+
+
+def menu_items_imported(sender, repriced_ids, **kwargs):
+    # The bulk import skips post_save, so reprice the affected carts here
+    if repriced_ids:
+        refresh_cart_totals(Cart.objects.filter(items__menu_item_id__in=repriced_ids))
+
+
+def menu_item_deleting(sender, instance, **kwargs):
+    instance._cart_ids = list(
+        Cart.objects.filter(items__menu_item=instance).values_list('pk', flat=True)
+    )
+
+
+def menu_item_deleted(sender, instance, **kwargs):
+    if getattr(instance, '_cart_ids', None):
+        refresh_cart_totals(Cart.objects.filter(pk__in=instance._cart_ids))
+
+
+def customer_order_saved(sender, instance, using, update_fields=None, **kwargs):
+    # Status-only saves leave the search row as it is
+    if update_fields is not None and not set(update_fields) & set(SEARCH_FIELDS):
+        return
+    index_orders([instance], connections[using])
+
+
+def customer_order_deleted(sender, instance, using, **kwargs):
+    unindex_order(instance.pk, connections[using])
+
+
+def customer_order_item_changed(sender, instance, **kwargs):
+    # Keeps ?since= polling on the kitchen display aware of line edits
+    CustomerOrder.objects.filter(pk=instance.order_id).update(updated_at=timezone.now())
+
+
+def connect():
+    for model in (Category, MenuItem):
+        post_save.connect(menu_changed, sender=model, dispatch_uid=f'menu_version_saved_{model.__name__}')
+        post_delete.connect(menu_changed, sender=model, dispatch_uid=f'menu_version_deleted_{model.__name__}')
+    # Stock running out (or coming back) flips availability with a bulk UPDATE
+    availability_changed.connect(menu_changed, dispatch_uid='menu_version_availability_changed')
+    menu_imported.connect(menu_changed, dispatch_uid='menu_version_imported')
+    menu_imported.connect(menu_items_imported, dispatch_uid='cart_totals_menu_imported')
+    post_save.connect(menu_item_saved, sender=MenuItem, dispatch_uid='cart_totals_menu_item_saved')
+    pre_delete.connect(menu_item_deleting, sender=MenuItem, dispatch_uid='cart_totals_menu_item_deleting')
+    post_delete.connect(menu_item_deleted, sender=MenuItem, dispatch_uid='cart_totals_menu_item_deleted')
+    post_save.connect(customer_order_saved, sender=CustomerOrder, dispatch_uid='order_search_saved')
+    post_delete.connect(customer_order_deleted, sender=CustomerOrder, dispatch_uid='order_search_deleted')
+    post_save.connect(customer_order_item_changed, sender=CustomerOrderItem, dispatch_uid='kitchen_customer_item_saved')
+    post_delete.connect(customer_order_item_changed, sender=CustomerOrderItem, dispatch_uid='kitchen_customer_item_deleted')
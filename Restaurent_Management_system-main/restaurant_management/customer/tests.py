@@ -1,3 +1,401 @@
-from django.test import TestCase
+from decimal import Decimal
+import json
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.dashboard.models import DailyItemSalesRollup, DailySalesRollup, OrderLineFact
+from apps.inventory.models import Category, MenuItem
+from .models import Cart, CartItem, CustomerOrder, CustomerOrderItem
+from .services import purge_guest_carts, release_expired_stock_holds
+
+
+class CartTestMixin:
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Mains')
+        cls.pizza = MenuItem.objects.create(
+            name='Pizza', category=category, price=Decimal('10.00'), stock_quantity=5,
+        )
+
+    def add_to_cart(self, menu_item, quantity=1):
+        return self.client.post(
+            reverse('customer:add_to_cart'),
+            json.dumps({'menu_item_id': menu_item.id, 'quantity': quantity}),
+            content_type='application/json',
+        ).json()
+
+    def checkout(self):
+        return self.client.post(reverse('customer:checkout'), {
+            'customer_name': 'Ana',
+            'customer_email': 'ana@example.com',
+            'customer_phone': '123',
+        })
+
+    def pizza_stock(self):
+        self.pizza.refresh_from_db()
+        return self.pizza.stock_quantity
+
+
+class CheckoutStockTests(CartTestMixin, TestCase):
+    def test_checkout_takes_stock(self):
+        self.add_to_cart(self.pizza, 2)
+        self.assertEqual(self.pizza_stock(), 5)
+        response = self.checkout()
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.pizza_stock(), 3)
+
+    def test_checkout_inserts_lines_in_one_batch(self):
+        soup = MenuItem.objects.create(
+            name='Soup', category=self.pizza.category, price=Decimal('4.50'), stock_quantity=5,
+        )
+        self.add_to_cart(self.pizza, 2)
+        self.add_to_cart(soup, 1)
+        with CaptureQueriesContext(connection) as queries:
+            self.checkout()
+        inserts = [q['sql'] for q in queries if q['sql'].startswith('INSERT INTO "customer_customerorderitem"')]
+        self.assertEqual(len(inserts), 1)
+        order = CustomerOrder.objects.get()
+        self.assertEqual(order.total_amount, Decimal('24.50'))
+        self.assertEqual(
+            sorted(OrderLineFact.objects.values_list('source', 'order_id', 'menu_item_name', 'line_total')),
+            [('customer_order', order.pk, 'Pizza', Decimal('20.00')),
+             ('customer_order', order.pk, 'Soup', Decimal('4.50'))],
+        )
+        self.assertEqual(
+            sorted(DailyItemSalesRollup.objects.values_list('status', 'menu_item', 'quantity')),
+            [('confirmed', self.pizza.pk, 2), ('confirmed', soup.pk, 1)],
+        )
+        self.assertEqual(DailySalesRollup.objects.get(source='customer_order').items_sold, 3)
+
+    def test_checkout_rejects_insufficient_stock(self):
+        self.add_to_cart(self.pizza, 6)
+        response = self.checkout()
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(CustomerOrder.objects.exists())
+        self.assertEqual(self.pizza_stock(), 5)
+
+
+@override_settings(STOCK_HOLD_ENABLED=True)
+class StockHoldTests(CartTestMixin, TestCase):
+    def test_cart_holds_stock_until_checkout(self):
+        self.assertTrue(self.add_to_cart(self.pizza, 2)['success'])
+        self.assertEqual(self.pizza_stock(), 3)
+
+        result = self.add_to_cart(self.pizza, 4)
+        self.assertFalse(result['success'])
+        self.assertIn('Not enough stock', result['message'])
+        self.assertEqual(CartItem.objects.get().quantity, 2)
+
+        self.checkout()
+        self.assertEqual(self.pizza_stock(), 3)
+        self.assertEqual(CustomerOrder.objects.count(), 1)
+
+    def test_removing_and_expiring_release_holds(self):
+        self.add_to_cart(self.pizza, 2)
+        item = CartItem.objects.get()
+        self.client.post(
+            reverse('customer:remove_from_cart'),
+            json.dumps({'cart_item_id': item.id}),
+            content_type='application/json',
+        )
+        self.assertEqual(self.pizza_stock(), 5)
+
+        self.add_to_cart(self.pizza, 3)
+        self.assertEqual(release_expired_stock_holds(minutes=-1), 3)
+        self.assertEqual(self.pizza_stock(), 5)
+        self.assertEqual(CartItem.objects.get().held_quantity, 0)
+
+
+class CartTotalsTests(CartTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.menu = [
+            MenuItem.objects.create(
+                name=f'Side {n}', category=cls.pizza.category, price=Decimal('2.50'), stock_quantity=10,
+            )
+            for n in range(12)
+        ]
+
+    def cart(self):
+        return Cart.objects.get()
+
+    def test_totals_are_maintained(self):
+        self.add_to_cart(self.pizza, 2)
+        result = self.add_to_cart(self.menu[0], 3)
+        self.assertEqual(result['cart_items_count'], 5)
+        self.assertEqual(result['cart_total'], 27.5)
+
+        item = CartItem.objects.get(menu_item=self.pizza)
+        result = self.client.post(
+            reverse('customer:update_cart_item'),
+            json.dumps({'cart_item_id': item.id, 'quantity': 1}),
+            content_type='application/json',
+        ).json()
+        self.assertEqual((result['cart_items_count'], result['cart_total']), (4, 17.5))
+
+        self.menu[0].price = Decimal('3.00')
+        self.menu[0].save()
+        self.assertEqual(self.cart().subtotal, Decimal('19.00'))
+
+    def test_cart_api_query_count_is_independent_of_cart_size(self):
+        self.add_to_cart(self.pizza)
+        with CaptureQueriesContext(connection) as small:
+            self.add_to_cart(self.pizza)
+        for item in self.menu:
+            self.add_to_cart(item)
+        with CaptureQueriesContext(connection) as large:
+            self.add_to_cart(self.pizza)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('customer:cart_info'))
+        self.assertEqual(response.json()['cart_items_count'], 15)
+
+
+class MenuCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mains = Category.objects.create(name='Mains', display_order=1)
+        cls.drinks = Category.objects.create(name='Drinks', display_order=2)
+        Category.objects.create(name='Empty', display_order=3)
+        cls.pizza = MenuItem.objects.create(name='Pizza', category=cls.mains, price=Decimal('10.00'))
+        MenuItem.objects.create(name='Water', category=cls.drinks, price=Decimal('1.00'))
+        MenuItem.objects.create(
+            name='Secret', category=cls.drinks, price=Decimal('1.00'), is_available=False,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous_menu_is_served_without_queries(self):
+        response = self.client.get(reverse('customer:menu'))
+        self.assertEqual(
+            [(category.name, [item.name for item in items])
+             for category, items in response.context['menu_data'].items()],
+            [('Mains', ['Pizza']), ('Drinks', ['Water'])],
+        )
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('customer:menu'))
+        self.assertContains(response, 'Pizza')
+        self.assertNotContains(response, 'Secret')
+
+    def test_catalogue_changes_invalidate_the_menu(self):
+        self.client.get(reverse('customer:menu'))
+        self.pizza.name = 'Margherita'
+        self.pizza.save()
+        response = self.client.get(reverse('customer:menu'))
+        self.assertContains(response, 'Margherita')
+
+        self.drinks.is_active = False
+        self.drinks.save()
+        response = self.client.get(reverse('customer:menu'))
+        self.assertNotContains(response, 'Water')
+
+
+class CartBatchTests(CartTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.menu = [
+            MenuItem.objects.create(
+                name=f'Side {n}', category=cls.pizza.category, price=Decimal('2.50'), stock_quantity=10,
+            )
+            for n in range(12)
+        ]
+
+    def batch(self, operations):
+        return self.client.post(
+            reverse('customer:cart_batch'),
+            json.dumps({'operations': operations}),
+            content_type='application/json',
+        ).json()
+
+    def test_operations_are_applied_in_order(self):
+        self.add_to_cart(self.pizza, 1)
+        pizza_line = CartItem.objects.get()
+        result = self.batch([
+            {'action': 'add', 'menu_item_id': self.menu[0].id, 'quantity': 2},
+            {'action': 'add', 'menu_item_id': self.menu[0].id},
+            {'action': 'add', 'menu_item_id': self.menu[1].id},
+            {'action': 'update', 'cart_item_id': pizza_line.id, 'quantity': 4},
+            {'action': 'remove', 'menu_item_id': self.menu[1].id},
+        ])
+        self.assertTrue(result['success'])
+        self.assertEqual((result['cart_items_count'], result['cart_total']), (7, 47.5))
+        self.assertEqual(
+            [(item['name'], item['quantity']) for item in result['items']],
+            [('Pizza', 4), ('Side 0', 3)],
+        )
+        cart = Cart.objects.get()
+        self.assertEqual((cart.item_count, cart.subtotal), (7, Decimal('47.50')))
+        self.assertEqual(CartItem.objects.get(pk=pizza_line.pk).quantity, 4)
+
+    def test_invalid_batch_changes_nothing(self):
+        self.add_to_cart(self.pizza, 1)
+        result = self.batch([
+            {'action': 'add', 'menu_item_id': self.menu[0].id},
+            {'action': 'update', 'cart_item_id': 999999, 'quantity': 2},
+        ])
+        self.assertFalse(result['success'])
+        self.assertEqual(CartItem.objects.count(), 1)
+        self.assertEqual(Cart.objects.get().item_count, 1)
+
+    @override_settings(STOCK_HOLD_ENABLED=True)
+    def test_holds_follow_the_batch(self):
+        self.assertTrue(self.batch([{'action': 'add', 'menu_item_id': self.pizza.id, 'quantity': 3}])['success'])
+        self.assertEqual(self.pizza_stock(), 2)
+
+        result = self.batch([
+            {'action': 'add', 'menu_item_id': self.menu[0].id},
+            {'action': 'update', 'menu_item_id': self.pizza.id, 'quantity': 6},
+        ])
+        self.assertFalse(result['success'])
+        self.assertEqual(self.pizza_stock(), 2)
+        self.assertFalse(CartItem.objects.filter(menu_item=self.menu[0]).exists())
+
+        self.batch([{'action': 'update', 'menu_item_id': self.pizza.id, 'quantity': 1}])
+        self.assertEqual(self.pizza_stock(), 4)
+        self.assertEqual(CartItem.objects.get().held_quantity, 1)
+
+    def test_query_count_is_independent_of_operation_count(self):
+        self.add_to_cart(self.pizza)
+        with CaptureQueriesContext(connection) as one:
+            self.batch([{'action': 'add', 'menu_item_id': self.menu[0].id}])
+        with CaptureQueriesContext(connection) as many:
+            self.batch(
+                [{'action': 'add', 'menu_item_id': item.id} for item in self.menu[1:]]
+                + [{'action': 'update', 'menu_item_id': self.pizza.id, 'quantity': 3}]
+            )
+        self.assertEqual(len(one.captured_queries), len(many.captured_queries))
+        self.assertEqual(Cart.objects.get().item_count, 15)
+
+
+class CustomerOrderAdminListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff', password='secret')
+        cls.pizza = MenuItem.objects.create(
+            name='Pizza', category=Category.objects.create(name='Mains'), price=Decimal('10.00'),
+        )
+
+    def make_order(self, number, name, email, quantities=(1,)):
+        order = CustomerOrder.objects.create(
+            order_number=number, customer_name=name, customer_email=email,
+            customer_phone='123', total_amount=Decimal('10.00'),
+        )
+        for quantity in quantities:
+            CustomerOrderItem.objects.create(
+                order=order, menu_item=self.pizza, quantity=quantity, price_at_time=self.pizza.price,
+            )
+        return order
+
+    def list_orders(self, **params):
+        return self.client.get(reverse('customer:admin_order_list'), params)
+
+    def test_item_counts_are_annotated(self):
+        self.client.force_login(self.user)
+        self.make_order('A1', 'Ana', 'ana@example.com', quantities=(2, 3))
+        self.list_orders()
+        with CaptureQueriesContext(connection) as small:
+            self.list_orders()
+        for n in range(10):
+            self.make_order(f'B{n}', f'Guest {n}', f'guest{n}@example.com')
+        with CaptureQueriesContext(connection) as large:
+            response = self.list_orders()
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        order = next(o for o in response.context['orders'] if o.order_number == 'A1')
+        self.assertEqual((order.item_count, order.item_quantity), (2, 5))
+        self.assertContains(response, '2 items (5 units)')
+
+    def test_search_index_follows_orders(self):
+        self.client.force_login(self.user)
+        ana = self.make_order('K7M2Q9X', 'Ana Pérez', 'ana@example.com')
+        self.make_order('H3J8R1T', 'Bruno Silva', 'bruno@mail.test')
+
+        def found(term):
+            return [order.order_number for order in self.list_orders(search=term).context['orders']]
+
+        self.assertEqual(found('k7m'), ['K7M2Q9X'])
+        self.assertEqual(found('perez'), ['K7M2Q9X'])
+        self.assertEqual(found('bruno@mail'), ['H3J8R1T'])
+        self.assertEqual(found('ana silva'), [])
+
+        ana.customer_name = 'Ana Silva'
+        ana.save()
+        self.assertEqual(found('ana silva'), ['K7M2Q9X'])
+        ana.delete()
+        self.assertEqual(found('ana'), [])
+
+
+class GuestCartTests(CartTestMixin, TestCase):
+    def test_browsing_creates_no_session_or_cart(self):
+        self.client.get(reverse('customer:menu'))
+        self.client.get(reverse('customer:cart'))
+        self.assertFalse(Session.objects.exists())
+        self.assertFalse(Cart.objects.exists())
+
+    def test_first_add_creates_the_only_cart_for_the_session(self):
+        self.add_to_cart(self.pizza)
+        self.add_to_cart(self.pizza)
+        cart = Cart.objects.get()
+        self.assertEqual(cart.item_count, 2)
+        with self.assertRaises(IntegrityError):
+            Cart.objects.create(session_key=cart.session_key)
+
+    @override_settings(STOCK_HOLD_ENABLED=True)
+    def test_purge_drops_abandoned_carts_and_expired_sessions(self):
+        self.add_to_cart(self.pizza, 2)
+        idle = Cart.objects.get()
+        Cart.objects.filter(pk=idle.pk).update(updated_at=timezone.now() - timezone.timedelta(days=30))
+        self.client.logout()
+        self.add_to_cart(self.pizza, 1)
+        self.assertEqual(self.pizza_stock(), 2)
+
+        orphan = Cart.objects.create(session_key='gone')
+        Session.objects.create(session_key='old', session_data='', expire_date=timezone.now())
+
+        carts, sessions = purge_guest_carts(timezone.now() - timezone.timedelta(days=14), batch_size=1)
+        self.assertEqual((carts, sessions), (2, 1))
+        self.assertFalse(Cart.objects.filter(pk__in=[idle.pk, orphan.pk]).exists())
+        self.assertEqual(Cart.objects.count(), 1)
+        self.assertEqual(self.pizza_stock(), 4)
+
+
+class CustomerIndexTests(TestCase):
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN output checked on SQLite only')
+
+    def test_guest_cart_lookup_uses_session_index(self):
+        self.assertIn('cart_unique_session', Cart.objects.filter(session_key='abc').explain())
+
+    def test_dine_in_orders_by_table_use_partial_index(self):
+        orders = CustomerOrder.objects.filter(table_number=4, status__in=['pending', 'confirmed'])
+        self.assertIn('custorder_table_status_idx', orders.explain())
+
+
+class OrderTrackingTests(TestCase):
+    def track(self, typed):
+        return self.client.get(reverse('customer:track_order'), {'order_number': typed}).context['order']
+
+    def test_legacy_codes_keep_their_letters(self):
+        legacy = CustomerOrder.objects.create(
+            order_number='HOTEL1', customer_name='Ana', customer_email='ana@example.com',
+            customer_phone='123', total_amount=Decimal('10.00'),
+        )
+        self.assertEqual(self.track(' hotel1 '), legacy)
+
+    def test_new_codes_forgive_look_alikes(self):
+        order = CustomerOrder.objects.create(
+            order_number='AB0110Z', customer_name='Ana', customer_email='ana@example.com',
+            customer_phone='123', total_amount=Decimal('10.00'),
+        )
+        self.assertEqual(self.track('abOliOz'), order)
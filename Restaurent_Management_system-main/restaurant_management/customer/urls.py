@@ -20,5 +20,6 @@ urlpatterns = [
     path('api/add-to-cart/', views.AddToCartView.as_view(), name='add_to_cart'),
     path('api/update-cart-item/', views.UpdateCartItemView.as_view(), name='update_cart_item'),
     path('api/remove-from-cart/', views.RemoveFromCartView.as_view(), name='remove_from_cart'),
+    path('api/cart-batch/', views.CartBatchView.as_view(), name='cart_batch'),
     path('api/cart-info/', views.get_cart_info, name='cart_info'),
 ]
\ No newline at end of file
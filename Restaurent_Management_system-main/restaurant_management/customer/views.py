@@ -4,6 +4,7 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views import View
 from django.contrib import messages
+from django.core.exceptions import ValidationError
 from django.db import transaction
 from django.utils.decorators import method_decorator
 from django.views.decorators.http import require_http_methods
@@ -11,44 +12,48 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import ListView
 from django.db import models
+from django.db.models.functions import Coalesce
 import json
-import random
-import string
 
+from apps.dashboard.rollups import record_order_lines
 from apps.inventory.models import Category, MenuItem
+from apps.inventory.stock import InsufficientStock, decrement_stock
+from apps.orders.numbering import allocate_order_number, normalize_order_number
+from apps.orders.pagination import KeysetPaginationMixin
+from .menu_cache import MENU_CACHE_TIMEOUT, get_menu_snapshot, get_menu_version
 from .models import Customer, Cart, CartItem, CustomerOrder, CustomerOrderItem
+from .search import search_orders
+from .services import (
+    add_to_cart,
+    apply_cart_operations,
+    clear_cart,
+    remove_cart_item,
+    session_cart,
+    set_cart_item_quantity,
+    unheld_quantities,
+)
 
 
 # Customer Views (existing)
 class MenuView(View):
     def get(self, request):
-        categories = Category.objects.filter(is_active=True).prefetch_related('menu_items')
-        cart = self.get_or_create_cart(request)
-        
-        # Organize menu items by category
-        menu_data = {}
-        for category in categories:
-            menu_items = category.menu_items.filter(is_available=True)
-            if menu_items.exists():
-                menu_data[category] = menu_items
+        # Served from the cache; no queries until the menu version changes
+        menu_version = get_menu_version()
+        cart = self.get_cart(request)
         
         context = {
-            'menu_data': menu_data,
+            'menu_data': get_menu_snapshot(menu_version),
+            'menu_version': menu_version,
+            'menu_cache_timeout': MENU_CACHE_TIMEOUT,
             'cart': cart,
             'cart_total': cart.total_amount if cart else 0,
             'cart_items_count': cart.total_items if cart else 0,
         }
         return render(request, 'customer/menu.html', context)
     
-    def get_or_create_cart(self, request):
-        if not request.session.session_key:
-            request.session.create()
-        
-        cart, created = Cart.objects.get_or_create(
-            session_key=request.session.session_key,
-            defaults={'session_key': request.session.session_key}
-        )
-        return cart
+    def get_cart(self, request):
+        # Browsing never creates a session or cart; AddToCartView does that
+        return session_cart(request)
 
 
 class AddToCartView(View):
@@ -64,23 +69,9 @@ class AddToCartView(View):
             
             menu_item = get_object_or_404(MenuItem, id=menu_item_id, is_available=True)
             
-            if not request.session.session_key:
-                request.session.create()
-            
-            cart, created = Cart.objects.get_or_create(
-                session_key=request.session.session_key,
-                defaults={'session_key': request.session.session_key}
-            )
-            
-            cart_item, created = CartItem.objects.get_or_create(
-                cart=cart,
-                menu_item=menu_item,
-                defaults={'quantity': quantity}
-            )
+            cart = session_cart(request, create=True)
             
-            if not created:
-                cart_item.quantity += quantity
-                cart_item.save()
+            add_to_cart(cart, menu_item, quantity)
             
             return JsonResponse({
                 'success': True,
@@ -89,6 +80,8 @@ class AddToCartView(View):
                 'cart_items_count': cart.total_items,
             })
             
+        except InsufficientStock as e:
+            return JsonResponse({'success': False, 'message': e.messages[0]})
         except Exception as e:
             return JsonResponse({'success': False, 'message': str(e)})
 
@@ -98,17 +91,12 @@ class CartView(View):
         cart = self.get_cart(request)
         context = {
             'cart': cart,
-            'cart_items': cart.items.all() if cart else [],
+            'cart_items': cart.items.select_related('menu_item') if cart else [],
         }
         return render(request, 'customer/cart.html', context)
     
     def get_cart(self, request):
-        if not request.session.session_key:
-            return None
-        try:
-            return Cart.objects.get(session_key=request.session.session_key)
-        except Cart.DoesNotExist:
-            return None
+        return session_cart(request)
 
 
 class UpdateCartItemView(View):
@@ -122,15 +110,12 @@ class UpdateCartItemView(View):
             cart_item_id = data.get('cart_item_id')
             quantity = int(data.get('quantity', 1))
             
-            cart_item = get_object_or_404(CartItem, id=cart_item_id)
+            cart_item = get_object_or_404(
+                CartItem.objects.select_related('cart', 'menu_item'), id=cart_item_id
+            )
             
-            if quantity <= 0:
-                cart_item.delete()
-                message = 'Item removed from cart'
-            else:
-                cart_item.quantity = quantity
-                cart_item.save()
-                message = 'Cart updated'
+            set_cart_item_quantity(cart_item, quantity)
+            message = 'Cart updated' if quantity > 0 else 'Item removed from cart'
             
             cart = cart_item.cart
             return JsonResponse({
@@ -140,6 +125,8 @@ class UpdateCartItemView(View):
                 'cart_items_count': cart.total_items,
             })
             
+        except InsufficientStock as e:
+            return JsonResponse({'success': False, 'message': e.messages[0]})
         except Exception as e:
             return JsonResponse({'success': False, 'message': str(e)})
 
@@ -154,9 +141,11 @@ class RemoveFromCartView(View):
             data = json.loads(request.body)
             cart_item_id = data.get('cart_item_id')
             
-            cart_item = get_object_or_404(CartItem, id=cart_item_id)
+            cart_item = get_object_or_404(
+                CartItem.objects.select_related('cart', 'menu_item'), id=cart_item_id
+            )
             cart = cart_item.cart
-            cart_item.delete()
+            remove_cart_item(cart_item)
             
             return JsonResponse({
                 'success': True,
@@ -165,6 +154,53 @@ class RemoveFromCartView(View):
                 'cart_items_count': cart.total_items,
             })
             
+        except InsufficientStock as e:
+            return JsonResponse({'success': False, 'message': e.messages[0]})
+        except Exception as e:
+            return JsonResponse({'success': False, 'message': str(e)})
+
+
+class CartBatchView(View):
+    """Apply several cart operations in one request and return the whole cart.
+
+    Body: ``{"operations": [{"action": "add", "menu_item_id": 3, "quantity": 2},
+    {"action": "update", "cart_item_id": 7, "quantity": 1},
+    {"action": "remove", "cart_item_id": 8}]}``. Either every operation is
+    applied or none are.
+    """
+    @method_decorator(csrf_exempt)
+    def dispatch(self, *args, **kwargs):
+        return super().dispatch(*args, **kwargs)
+    
+    def post(self, request):
+        try:
+            data = json.loads(request.body)
+            operations = data.get('operations', [])
+            
+            cart = session_cart(request, create=True)
+            
+            cart_items = apply_cart_operations(cart, operations)
+            
+            return JsonResponse({
+                'success': True,
+                'message': 'Cart updated',
+                'cart_total': float(cart.total_amount),
+                'cart_items_count': cart.total_items,
+                'items': [
+                    {
+                        'cart_item_id': item.id,
+                        'menu_item_id': item.menu_item_id,
+                        'name': item.menu_item.name,
+                        'quantity': item.quantity,
+                        'price': float(item.menu_item.price),
+                        'subtotal': float(item.subtotal),
+                    }
+                    for item in cart_items
+                ],
+            })
+            
+        except ValidationError as e:
+            return JsonResponse({'success': False, 'message': e.messages[0]})
         except Exception as e:
             return JsonResponse({'success': False, 'message': str(e)})
 
@@ -172,19 +208,19 @@ class RemoveFromCartView(View):
 class CheckoutView(View):
     def get(self, request):
         cart = self.get_cart(request)
-        if not cart or not cart.items.exists():
+        if not cart or not cart.item_count:
             messages.error(request, 'Your cart is empty.')
             return redirect('customer:menu')
         
         context = {
             'cart': cart,
-            'cart_items': cart.items.all(),
+            'cart_items': cart.items.select_related('menu_item'),
         }
         return render(request, 'customer/checkout.html', context)
     
     def post(self, request):
         cart = self.get_cart(request)
-        if not cart or not cart.items.exists():
+        if not cart or not cart.item_count:
             messages.error(request, 'Your cart is empty.')
             return redirect('customer:menu')
         
@@ -202,8 +238,15 @@ class CheckoutView(View):
         
         try:
             with transaction.atomic():
+                # Take stock for everything not already held by the cart
+                decrement_stock(unheld_quantities(cart.items.all()))
+
+                # Price the order from the lines themselves
+                cart_items = list(cart.items.select_related('menu_item'))
+                total_amount = sum(item.subtotal for item in cart_items)
+
                 # Generate order number
-                order_number = self.generate_order_number()
+                order_number = allocate_order_number()
                 
                 # Create customer order
                 customer_order = CustomerOrder.objects.create(
@@ -211,45 +254,41 @@ class CheckoutView(View):
                     customer_name=customer_name,
                     customer_email=customer_email,
                     customer_phone=customer_phone,
-                    total_amount=cart.total_amount,
+                    total_amount=total_amount,
                     order_type=order_type,
                     table_number=int(table_number) if table_number else None,
                     notes=notes,
                     status='confirmed'
                 )
                 
-                # Create order items
-                for cart_item in cart.items.all():
-                    CustomerOrderItem.objects.create(
+                # Create order items in one insert; bulk_create skips the
+                # line signals, so the rollups and facts are recorded once
+                order_items = CustomerOrderItem.objects.bulk_create([
+                    CustomerOrderItem(
                         order=customer_order,
                         menu_item=cart_item.menu_item,
                         quantity=cart_item.quantity,
                         price_at_time=cart_item.menu_item.price
                     )
+                    for cart_item in cart_items
+                ])
+                record_order_lines('customer_order', customer_order, order_items)
                 
                 # Clear cart
-                cart.items.all().delete()
+                clear_cart(cart)
                 
                 messages.success(request, f'Order #{order_number} placed successfully!')
                 return redirect('customer:order_confirmation', order_number=order_number)
                 
+        except InsufficientStock as e:
+            messages.error(request, e.messages[0])
+            return self.get(request)
         except Exception as e:
             messages.error(request, f'Error placing order: {str(e)}')
             return self.get(request)
     
     def get_cart(self, request):
-        if not request.session.session_key:
-            return None
-        try:
-            return Cart.objects.get(session_key=request.session.session_key)
-        except Cart.DoesNotExist:
-            return None
-    
-    def generate_order_number(self):
-        while True:
-            order_number = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-            if not CustomerOrder.objects.filter(order_number=order_number).exists():
-                return order_number
+        return session_cart(request)
 
 
 class OrderConfirmationView(View):
@@ -257,7 +296,7 @@ class OrderConfirmationView(View):
         order = get_object_or_404(CustomerOrder, order_number=order_number)
         context = {
             'order': order,
-            'order_items': order.items.all(),
+            'order_items': order.items.select_related('menu_item'),
         }
         return render(request, 'customer/order_confirmation.html', context)
 
@@ -269,26 +308,35 @@ class OrderTrackingView(View):
         
         if order_number:
             try:
-                order = CustomerOrder.objects.get(order_number=order_number.upper())
+                order = CustomerOrder.objects.get(order_number=normalize_order_number(order_number))
             except CustomerOrder.DoesNotExist:
                 messages.error(request, 'Order not found.')
         
         context = {
             'order': order,
-            'order_items': order.items.all() if order else [],
+            'order_items': order.items.select_related('menu_item') if order else [],
         }
         return render(request, 'customer/order_tracking.html', context)
 
 
 # Admin Views for Customer Order Management
-class CustomerOrderListView(LoginRequiredMixin, ListView):
+class CustomerOrderListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = CustomerOrder
     template_name = 'customer/admin/order_list.html'
     context_object_name = 'orders'
     paginate_by = 20
     
     def get_queryset(self):
-        queryset = CustomerOrder.objects.all().order_by('-created_at')
+        # Per-row subqueries only run for the 20 orders on the page
+        lines = CustomerOrderItem.objects.filter(order=models.OuterRef('pk')).values('order')
+        queryset = CustomerOrder.objects.annotate(
+            item_count=Coalesce(models.Subquery(
+                lines.annotate(n=models.Count('pk')).values('n')
+            ), 0),
+            item_quantity=Coalesce(models.Subquery(
+                lines.annotate(n=models.Sum('quantity')).values('n')
+            ), 0),
+        ).order_by('-created_at')
         
         # Filter by status
         status = self.request.GET.get('status')
@@ -300,14 +348,10 @@ class CustomerOrderListView(LoginRequiredMixin, ListView):
         if order_type:
             queryset = queryset.filter(order_type=order_type)
         
-        # Search by order number or customer name
+        # Search by order number, customer name or email
         search = self.request.GET.get('search')
         if search:
-            queryset = queryset.filter(
-                models.Q(order_number__icontains=search) |
-                models.Q(customer_name__icontains=search) |
-                models.Q(customer_email__icontains=search)
-            )
+            queryset = search_orders(queryset, search)
         
         return queryset
     
@@ -340,14 +384,10 @@ def update_customer_order_status(request, order_id):
 @require_http_methods(["GET"])
 def get_cart_info(request):
     """API endpoint to get current cart information"""
-    if not request.session.session_key:
-        return JsonResponse({'cart_items_count': 0, 'cart_total': 0})
-    
-    try:
-        cart = Cart.objects.get(session_key=request.session.session_key)
-        return JsonResponse({
-            'cart_items_count': cart.total_items,
-            'cart_total': float(cart.total_amount),
-        })
-    except Cart.DoesNotExist:
+    cart = session_cart(request)
+    if cart is None:
         return JsonResponse({'cart_items_count': 0, 'cart_total': 0})
+    return JsonResponse({
+        'cart_items_count': cart.total_items,
+        'cart_total': float(cart.total_amount),
+    })